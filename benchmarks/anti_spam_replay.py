@@ -0,0 +1,286 @@
+"""Replay synthetic traffic through AntiSpamManager and report throughput.
+
+Usage:
+    python -m benchmarks.anti_spam_replay --guilds 50 --users 500 --messages 200000
+"""
+
+import argparse
+import heapq
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from src.utils.anti_spam import AntiSpamManager
+from src.utils.raid_scorer import DISCORD_EPOCH_MS
+
+# (timestamp, guild_id, user_id, channel_id, content)
+MessageEvent = Tuple[float, int, int, int, str]
+
+# (timestamp, guild_id, member)
+JoinEvent = Tuple[float, int, object]
+
+# Simulated start time; events carry virtual timestamps so the replay
+# runs as fast as possible while detectors see realistic spacing.
+START_TIME = 1_700_000_000.0
+
+# Default share of each traffic pattern
+DEFAULT_MIX = {
+    "normal": 0.80,
+    "flood": 0.08,
+    "duplicate": 0.05,
+    "mention": 0.03,
+    "link": 0.04,
+}
+
+WORDS = (
+    "hello gg nice lol ok thanks what when where why map score pp rank "
+    "play again tonight anyone 哈哈 今天 好玩 真的 等等 大家 早安 晚安"
+).split()
+
+FILTER_WORDS = ["scam", "free nitro", "代儲"]
+DENY_DOMAINS = ["*.phish.example", "steamcommunlty.ru"]
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 12)))
+
+
+def generate_messages(
+    guilds: int,
+    users: int,
+    count: int,
+    mix: Dict[str, float] = None,
+    seed: int = 1,
+    rate: float = 200.0,
+) -> Iterator[MessageEvent]:
+    """Yield a reproducible stream of messages mixing the given patterns.
+
+    ``rate`` is the simulated number of messages per second across all
+    guilds; messages inside a burst are 0.2s apart. Bursts overlap with
+    later arrivals, so events are held in a heap and yielded in timestamp
+    order — the replayed clock never runs backwards.
+    """
+    rng = random.Random(seed)
+    now = START_TIME
+    pending: List[MessageEvent] = []
+    mix = mix or DEFAULT_MIX
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    produced = 0
+
+    while produced < count:
+        guild_id = rng.randint(1, guilds)
+        user_id = guild_id * 1_000_000 + rng.randint(1, users)
+        channel_id = guild_id * 1_000 + rng.randint(1, 5)
+        kind = rng.choices(kinds, weights)[0]
+
+        if kind == "flood":
+            # One user bursting many short messages
+            burst = [(guild_id, user_id, channel_id, rng.choice(WORDS))
+                     for _ in range(rng.randint(5, 20))]
+        elif kind == "duplicate":
+            # The same copypasta from several users
+            text = _sentence(rng) + " " + rng.choice(FILTER_WORDS)
+            burst = [(guild_id, guild_id * 1_000_000 + rng.randint(1, users), channel_id, text)
+                     for _ in range(rng.randint(3, 10))]
+        elif kind == "mention":
+            mentions = " ".join(f"<@{rng.randint(1, 10**18)}>" for _ in range(rng.randint(3, 15)))
+            burst = [(guild_id, user_id, channel_id, mentions)]
+        elif kind == "link":
+            hosts = ["example.com", "youtu.be", "osu.ppy.sh", "a.phish.example",
+                     "discord.gg/abc123"]
+            links = " ".join(f"https://{rng.choice(hosts)}/{rng.randint(1, 9999)}"
+                             for _ in range(rng.randint(1, 4)))
+            burst = [(guild_id, user_id, channel_id, links)]
+        else:
+            burst = [(guild_id, user_id, channel_id, _sentence(rng))]
+
+        for i, event in enumerate(burst[: count - produced]):
+            produced += 1
+            heapq.heappush(pending, (now + i * 0.2,) + event)
+        now += rng.expovariate(rate)
+        while pending and pending[0][0] <= now:
+            yield heapq.heappop(pending)
+
+    while pending:
+        yield heapq.heappop(pending)
+
+
+def generate_joins(
+    guilds: int, count: int, seed: int = 1, rate: float = 2.0
+) -> Iterator[JoinEvent]:
+    """Yield member joins: mostly established accounts plus fresh look-alike waves."""
+    rng = random.Random(seed)
+    now = START_TIME
+    now_ms = int(now * 1000)
+    for i in range(count):
+        now += rng.expovariate(rate)
+        guild_id = rng.randint(1, guilds)
+        if rng.random() < 0.2:
+            age_ms = rng.randint(0, 3_600_000)
+            name = f"raider{rng.randint(0, 999)}"
+            avatar = None
+        else:
+            age_ms = rng.randint(30, 2000) * 86_400_000
+            name = rng.choice(WORDS) + str(i)
+            avatar = object()
+        snowflake = ((now_ms - age_ms - DISCORD_EPOCH_MS) << 22) | (i & 0x3FFFFF)
+        yield now, guild_id, SimpleNamespace(id=snowflake, name=name, avatar=avatar)
+
+
+def make_manager(settings_dir: str, guilds: int, rate_mode: str = "window") -> AntiSpamManager:
+    """Create a manager whose settings live in a scratch directory."""
+
+    class BenchManager(AntiSpamManager):
+        SETTINGS_FILE = os.path.join(settings_dir, "anti_spam_settings.json")
+        clock = START_TIME
+
+        def _now(self) -> float:
+            return self.clock
+
+    manager = BenchManager()
+    for guild_id in range(1, guilds + 1):
+        manager.settings[guild_id] = {
+            "enabled": True,
+            "rate_mode": rate_mode,
+            "wordfilter_enabled": True,
+            "wordfilter_words": list(FILTER_WORDS),
+            "domain_deny": list(DENY_DOMAINS),
+        }
+    return manager
+
+
+def _percentile(sorted_values: List[int], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct))
+    return sorted_values[index] / 1000  # ns -> us
+
+
+def _summarize(latencies: List[int], elapsed: float) -> Dict[str, float]:
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_us": _percentile(latencies, 0.50),
+        "p99_us": _percentile(latencies, 0.99),
+        "max_us": latencies[-1] / 1000 if latencies else 0.0,
+    }
+
+
+def replay_messages(manager: AntiSpamManager, events: List[MessageEvent]) -> Dict[str, float]:
+    """Drive check_message over the events and time each call."""
+    check = manager.check_message
+    clock = time.perf_counter_ns
+    latencies = []
+    append = latencies.append
+    triggered = 0
+    started = time.perf_counter()
+    for ts, guild_id, user_id, channel_id, content in events:
+        manager.clock = ts
+        t0 = clock()
+        if check(guild_id, user_id, content, channel_id):
+            triggered += 1
+        append(clock() - t0)
+    result = _summarize(latencies, time.perf_counter() - started)
+    result["triggered"] = triggered
+    return result
+
+
+def replay_joins(manager: AntiSpamManager, joins: List[JoinEvent]) -> Dict[str, float]:
+    """Drive check_member_join over the joins and time each call."""
+    check = manager.check_member_join
+    clock = time.perf_counter_ns
+    latencies = []
+    triggered = 0
+    started = time.perf_counter()
+    for ts, guild_id, member in joins:
+        manager.clock = ts
+        t0 = clock()
+        if check(guild_id, member):
+            triggered += 1
+        latencies.append(clock() - t0)
+    result = _summarize(latencies, time.perf_counter() - started)
+    result["triggered"] = triggered
+    return result
+
+
+def run(
+    guilds: int = 20,
+    users: int = 200,
+    messages: int = 50_000,
+    joins: int = 2_000,
+    rate_mode: str = "window",
+    seed: int = 1,
+    measure_memory: bool = True,
+) -> Dict[str, object]:
+    """Run the full replay and return the report."""
+    events = list(generate_messages(guilds, users, messages, seed=seed))
+    join_events = list(generate_joins(guilds, joins, seed=seed))
+    report: Dict[str, object] = {"rate_mode": rate_mode}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, guilds, rate_mode)
+        report["messages"] = replay_messages(manager, events)
+        report["joins"] = replay_joins(manager, join_events)
+
+        if measure_memory:
+            # Separate pass: tracemalloc slows allocation-heavy code down
+            manager = make_manager(tmp, guilds, rate_mode)
+            tracemalloc.start()
+            try:
+                replay_messages(manager, events)
+                replay_joins(manager, join_events)
+                report["peak_memory_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+            finally:
+                tracemalloc.stop()
+    return report
+
+
+def _print_report(report: Dict[str, object]):
+    print(f"rate mode: {report['rate_mode']}")
+    for name in ("messages", "joins"):
+        r = report[name]
+        print(
+            f"{name:>9}: {r['calls']:>8} calls  {r['per_sec']:>10.0f}/s  "
+            f"p50 {r['p50_us']:7.1f}us  p99 {r['p99_us']:7.1f}us  "
+            f"max {r['max_us']:8.1f}us  triggered {r['triggered']}"
+        )
+    if "peak_memory_kb" in report:
+        print(f"peak memory: {report['peak_memory_kb']:.0f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--users", type=int, default=200, help="users per guild")
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--joins", type=int, default=2_000)
+    parser.add_argument("--rate-mode", choices=["window", "ewma", "both"], default="both")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    args = parser.parse_args()
+
+    modes = ["window", "ewma"] if args.rate_mode == "both" else [args.rate_mode]
+    for mode in modes:
+        _print_report(run(
+            guilds=args.guilds,
+            users=args.users,
+            messages=args.messages,
+            joins=args.joins,
+            rate_mode=mode,
+            seed=args.seed,
+            measure_memory=not args.no_memory,
+        ))
+        print()
+
+
+if __name__ == "__main__":
+    main()
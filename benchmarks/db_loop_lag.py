@@ -0,0 +1,98 @@
+"""Measure event-loop lag caused by DatabaseManager writes.
+
+Runs the same write workload with SQLite executed inline on the event loop
+and on the dedicated executor threads, while a ticker measures how late the
+loop wakes up.
+
+Usage:
+    python -m benchmarks.db_loop_lag --operations 2000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict
+from typing import List
+
+from src.utils.database_manager import DatabaseManager
+
+# Ticker period used to sample loop lag
+TICK_SECONDS = 0.005
+
+
+async def _ticker(samples: List[float], stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(TICK_SECONDS)
+        samples.append(max(0.0, loop.time() - started - TICK_SECONDS))
+
+
+async def measure(db: DatabaseManager, operations: int, concurrency: int) -> Dict[str, float]:
+    """Run a mixed write workload and report loop lag and throughput."""
+    samples: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.ensure_future(_ticker(samples, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            if i % 3 == 0:
+                await db.cache_set(f"bench:{i % 500}", {"i": i}, ttl=60)
+            elif i % 3 == 1:
+                await db.store_metric("bench_metric", float(i), {"i": i})
+            else:
+                await db.log_audit("bench", str(i), "1", {"i": i})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(operations)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    samples.sort()
+    p99 = samples[int(len(samples) * 0.99) - 1] if samples else 0.0
+    return {
+        "ops_per_sec": operations / elapsed if elapsed else 0.0,
+        "lag_mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "lag_p99_ms": p99 * 1000,
+        "lag_max_ms": samples[-1] * 1000 if samples else 0.0,
+    }
+
+
+async def run(operations: int, concurrency: int, readers: int) -> Dict[str, Dict[str, float]]:
+    """Compare inline and threaded execution on fresh database files."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, threaded in (("inline", False), ("threaded", True)):
+            db = DatabaseManager(
+                os.path.join(tmp, f"{mode}.db"), threaded=threaded, readers=readers
+            )
+            try:
+                results[mode] = await measure(db, operations, concurrency)
+            finally:
+                await db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=1)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.operations, args.concurrency, args.readers))
+    for mode, stats in results.items():
+        print(
+            f"{mode:<9} {stats['ops_per_sec']:9.0f} ops/s  "
+            f"loop lag mean {stats['lag_mean_ms']:6.2f}ms  "
+            f"p99 {stats['lag_p99_ms']:6.2f}ms  max {stats['lag_max_ms']:6.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
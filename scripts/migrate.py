@@ -1,8 +1,21 @@
 """Database migration scripts."""
 
+import argparse
+import contextlib
 import json
 import os
 from pathlib import Path
+import sqlite3
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.db_migrations import apply_migrations  # noqa: E402
+from src.utils.db_migrations import current_version  # noqa: E402
+from src.utils.json_importer import DEFAULT_SOURCES  # noqa: E402
+from src.utils.json_importer import JsonImporter  # noqa: E402
+
+DEFAULT_DB = "data/storage/bot_database.db"
 
 def migrate_config():
     """Migrate old config to new structure."""
@@ -56,9 +69,85 @@ def migrate_logs():
                 shutil.move(str(file), str(new_path))
                 print(f"Moved {file.name} to logs")
 
-if __name__ == "__main__":
+def migrate_database(db_path: str = DEFAULT_DB, target: int = None):
+    """Apply pending schema migrations."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    with contextlib.closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        before = current_version(conn)
+        applied = apply_migrations(conn, target)
+        print(f"Schema version {before} -> {current_version(conn)} (applied {applied or 'none'})")
+
+
+def import_storage(
+    db_path: str = DEFAULT_DB,
+    only: list = None,
+    resume: bool = True,
+    fresh: bool = False,
+    verify: bool = True,
+) -> bool:
+    """Stream the JSON storage files into SQLite; returns False if verification fails."""
+    sources = [s for s in DEFAULT_SOURCES if not only or s.name in only]
+    ok = True
+    with contextlib.closing(sqlite3.connect(db_path)) as conn:
+        # WAL lets the running bot keep reading while the import commits batches
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        apply_migrations(conn)
+        importer = JsonImporter(conn)
+        for source in sources:
+            result = importer.import_source(
+                source,
+                resume=resume,
+                fresh=fresh,
+                progress=lambda name, rows: print(f"  {name}: {rows} rows", end="\r"),
+            )
+            print(
+                f"{result['source']:<20} {result['status']:<10} rows={result['rows']}"
+                + (f" (resumed at byte {result['resumed_from']})" if result["resumed_from"] else "")
+            )
+            if verify and result["status"] != "missing":
+                check = importer.verify(source)
+                ok = ok and check["ok"]
+                print(
+                    f"{'':<20} verify: file={check['file_items']} "
+                    f"table={check['table_rows']} {'OK' if check['ok'] else 'MISMATCH'}"
+                )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database path")
+    parser.add_argument("--target", type=int, help="Migrate the schema to this version")
+    parser.add_argument(
+        "--only", nargs="+", choices=[s.name for s in DEFAULT_SOURCES], help="Sources to import"
+    )
+    parser.add_argument("--no-files", action="store_true", help="Skip moving legacy files")
+    parser.add_argument("--no-import", action="store_true", help="Only migrate the schema")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved import progress")
+    parser.add_argument("--fresh", action="store_true", help="Delete imported rows first")
+    parser.add_argument("--no-verify", action="store_true", help="Skip count verification")
+    args = parser.parse_args()
+
     print("Starting migration...")
-    migrate_config()
-    migrate_storage() 
-    migrate_logs()
-    print("Migration completed!")
+    if not args.no_files:
+        migrate_config()
+        migrate_storage()
+        migrate_logs()
+    migrate_database(args.db, args.target)
+    ok = True
+    if not args.no_import:
+        ok = import_storage(
+            args.db,
+            only=args.only,
+            resume=not args.restart,
+            fresh=args.fresh,
+            verify=not args.no_verify,
+        )
+    print("Migration completed!" if ok else "Migration completed with verification errors")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,39 @@
 import os
 import pkgutil
 import asyncio
+import time
 import discord
 from discord import app_commands
 from discord.ext import commands
 from dotenv import load_dotenv
 from src.utils.blacklist_manager import BlacklistManager
+from src.utils.command_sync import CommandSyncCache
+from src.utils.command_sync import GLOBAL_SCOPE
+from src.utils.command_sync import parse_guild_ids
+from src.utils.config_manager import get_guild_log_channel
+from src.utils.database_manager import get_database_manager
+from src.utils.guild_scheduler import GuildScheduler
+from src.utils.guild_scheduler import run_fair
+from src.utils.interaction_watchdog import InteractionWatchdog
+from src.utils.json_store import flush_all
+from src.utils.load_shedder import init_load_shedder
+from src.utils.load_shedder import LEVEL_EFFECTS
+from src.utils.load_shedder import LEVEL_NAMES
+from src.utils.load_shedder import LEVEL_NORMAL
 
 load_dotenv()
 
 class BlacklistCheckTree(app_commands.CommandTree):
+    def __init__(self, client, **kwargs):
+        super().__init__(client, **kwargs)
+        # 處理函式逾時未回應時自動 defer (3 秒期限)
+        self.watchdog = InteractionWatchdog()
+    async def _call(self, interaction: discord.Interaction) -> None:
+        timer = self.watchdog.attach(interaction)
+        try:
+            await super()._call(interaction)
+        finally:
+            self.watchdog.detach(timer, interaction)
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         bot: Bot = interaction.client
         if interaction.command and interaction.command.name in ["申訴", "申訴狀態"]:
@@ -50,47 +74,159 @@ class Bot(commands.Bot):
         self.api_key = os.getenv("BLACKLIST_API_KEY")
         self.api_base = "https://api.cathome.shop/blacklist"
         self.blacklist_manager = BlacklistManager(self.api_key, self.api_base)
+        # 每伺服器公平排程 (避免單一伺服器的訊息洪水拖慢其他伺服器)
+        self.guild_scheduler = GuildScheduler(
+            workers=int(os.getenv("GUILD_SCHEDULER_WORKERS", "4")),
+            max_queue=int(os.getenv("GUILD_SCHEDULER_MAX_QUEUE", "200")),
+        )
+        # 依事件迴圈延遲自動降級 (各 Cog 以 feature_allowed 檢查)
+        self.load_shedder = init_load_shedder()
+        self.load_shedder.add_listener(self._on_load_level_change)
     async def setup_hook(self):
+        self.guild_scheduler.start()
         await self.blacklist_manager.setup()
         await self.load_cogs()
-        await self.tree.sync()
+        await self.sync_commands()
+    async def on_ready(self):
+        # 啟動期間的同步匯入與指令同步不應被當成迴圈延遲而觸發降級
+        self.load_shedder.start()
+    async def sync_commands(self):
+        # 指令樹未變更時略過同步；DEV_GUILD_IDS 指定時只同步到開發伺服器
+        cache = CommandSyncCache()
+        guild_ids = parse_guild_ids(os.getenv("DEV_GUILD_IDS"))
+        force = os.getenv("FORCE_TREE_SYNC", "").lower() in ("1", "true", "yes")
+        results = await cache.sync(self.tree, guild_ids=guild_ids, force=force)
+        for scope, status in results.items():
+            label = "全域" if scope == GLOBAL_SCOPE else f"伺服器 {scope}"
+            print(f"[指令] {label}: {'已同步' if status == 'synced' else '未變更，略過同步'}")
     async def close(self):
+        await self.load_shedder.close()
+        await self.guild_scheduler.close()
         await self.blacklist_manager.close()
+        # 寫入延遲中的 JSON 儲存檔
+        await flush_all()
+        db_manager = get_database_manager()
+        if db_manager:
+            # 等待資料庫執行緒寫完已排入的工作
+            await db_manager.close()
         await super().close()
+    async def _on_load_level_change(self, old: int, new: int, lag: float):
+        # 在背景通知各伺服器日誌頻道，避免延遲量測迴圈
+        asyncio.ensure_future(self._broadcast_load_level(old, new, lag))
+    async def _broadcast_load_level(self, old: int, new: int, lag: float):
+        degraded = new > old
+        embed = discord.Embed(
+            title="[負載] 已進入降級模式" if degraded else "[負載] 負載已下降",
+            description=(
+                f"{LEVEL_NAMES[old]} → **{LEVEL_NAMES[new]}**\n"
+                f"事件迴圈延遲: {lag * 1000:.0f}ms"
+            ),
+            color=discord.Color.from_rgb(255, 165, 0) if new != LEVEL_NORMAL
+            else discord.Color.from_rgb(46, 204, 113),
+        )
+        embed.add_field(name="影響", value=LEVEL_EFFECTS[new], inline=False)
+        semaphore = asyncio.Semaphore(2)
+        async def send(guild: discord.Guild):
+            channel_id = get_guild_log_channel(guild.id)
+            channel = self.get_channel(channel_id) if channel_id else None
+            if channel is None:
+                return
+            async with semaphore:
+                try:
+                    await channel.send(embed=embed)
+                except Exception:
+                    pass
+        await asyncio.gather(*(send(guild) for guild in self.guilds))
     async def load_cogs(self):
         base_package = "src.cogs"
         cogs_path = os.path.join(os.path.dirname(__file__), "cogs")
-        for module_info in pkgutil.walk_packages(
-            path=[cogs_path],
-            prefix=f"{base_package}.",
-        ):
-            if module_info.ispkg:
-                continue
-            await self.load_extension(module_info.name)
+        names = [
+            module_info.name
+            for module_info in pkgutil.walk_packages(
+                path=[cogs_path],
+                prefix=f"{base_package}.",
+            )
+            if not module_info.ispkg
+        ]
+        # {擴充名稱: {"import": 秒, "setup": 秒}}
+        self.startup_report = {}
+        started = time.perf_counter()
+        # 依序載入: 模組匯入是同步的，並行 load_extension 幾乎沒有重疊
+        for name in names:
+            load_started = time.perf_counter()
+            await self.load_extension(name)
+            timings = self.startup_report.setdefault(name, {})
+            elapsed = time.perf_counter() - load_started
+            timings["setup"] = elapsed - timings.get("import", 0.0)
+        self.print_startup_report(time.perf_counter() - started)
+    async def _load_from_module_spec(self, spec, key: str) -> None:
+        # 量測模組本體執行 (匯入) 的時間；其餘為 setup。模組只執行一次
+        report = getattr(self, "startup_report", None)
+        loader = spec.loader
+        if report is not None and loader is not None:
+            exec_module = loader.exec_module
+            def timed_exec(module):
+                import_started = time.perf_counter()
+                try:
+                    exec_module(module)
+                finally:
+                    report.setdefault(key, {})["import"] = time.perf_counter() - import_started
+            loader.exec_module = timed_exec
+        await super()._load_from_module_spec(spec, key)
+    def print_startup_report(self, total: float):
+        print(f"[啟動] 已依序載入 {len(self.startup_report)} 個 Cog，耗時 {total * 1000:.0f}ms")
+        slowest = sorted(
+            self.startup_report.items(),
+            key=lambda item: sum(item[1].values()),
+            reverse=True,
+        )
+        for name, timings in slowest:
+            print(
+                f"[啟動]   {name.rsplit('.', 1)[-1]:<20} "
+                f"匯入 {timings.get('import', 0) * 1000:6.1f}ms  "
+                f"setup {timings.get('setup', 0) * 1000:6.1f}ms"
+            )
     async def on_message(self, message: discord.Message):
         if message.author.bot:
             await self.process_commands(message)
             return
-        entry = await self.blacklist_manager.check(message.author.id)
-        if entry:
-            mode = entry.get("mode")
-            reason = entry.get("reason", "未提供原因")
-            if mode == "global_ban" and message.guild:
-                try:
-                    await message.guild.ban(
-                        message.author,
-                        reason=f"Global Ban: {reason}",
-                    )
-                except:
-                    pass
-            embed = discord.Embed(
-                title="[拒絕] 禁止使用",
-                description=f"""您已被加入黑名單。\n\n原因: {reason}\n模式: {mode}""",
-                color=discord.Color.red(),
-            )
-            await message.reply(embed=embed, delete_after=10)
+        # 黑名單與全域封禁在排程器之外執行，洪水期間佇列已滿也不會漏掉
+        if await self._enforce_blacklist(message):
             return
-        await self.process_commands(message)
+        guild_id = message.guild.id if message.guild else None
+        # 前綴指令不可因佇列已滿被丟棄；一般訊息的指令解析可丟棄
+        prefixes = await self.get_prefix(message)
+        if isinstance(prefixes, str):
+            prefixes = (prefixes,)
+        is_command = bool(message.content) and message.content.startswith(tuple(prefixes))
+        await run_fair(
+            self,
+            guild_id,
+            lambda: self.process_commands(message),
+            kind="commands",
+            force=is_command,
+        )
+    async def _enforce_blacklist(self, message: discord.Message) -> bool:
+        entry = await self.blacklist_manager.check(message.author.id)
+        if not entry:
+            return False
+        mode = entry.get("mode")
+        reason = entry.get("reason", "未提供原因")
+        if mode == "global_ban" and message.guild:
+            try:
+                await message.guild.ban(
+                    message.author,
+                    reason=f"Global Ban: {reason}",
+                )
+            except:
+                pass
+        embed = discord.Embed(
+            title="[拒絕] 禁止使用",
+            description=f"""您已被加入黑名單。\n\n原因: {reason}\n模式: {mode}""",
+            color=discord.Color.red(),
+        )
+        await message.reply(embed=embed, delete_after=10)
+        return True
     async def on_member_join(self, member: discord.Member):
         entry = await self.blacklist_manager.check(member.id)
         if entry:
@@ -4,13 +4,133 @@ from datetime import timezone
 import json
 import os
 import time
+from typing import Optional
 
 import discord
+from discord import app_commands
 from discord.ext import commands
 
+from src.utils.database_manager import get_database_manager
+from src.utils.load_shedder import feature_allowed
+from src.utils.load_shedder import PRIORITY_STANDARD
+
 # UTC+8 時區
 TZ_OFFSET = timezone(timedelta(hours=8))
 
+# 寫入 audit_logs 的動作與顯示名稱
+AUDIT_ACTIONS = {
+    "member_join": "成員加入",
+    "member_remove": "成員離開",
+    "voice_join": "加入語音",
+    "voice_leave": "離開語音",
+    "voice_move": "移動語音",
+    "role_add": "角色新增",
+    "role_remove": "角色移除",
+    "nick_change": "暱稱變更",
+    "channel_create": "頻道建立",
+    "channel_delete": "頻道刪除",
+    "channel_update": "頻道修改",
+}
+
+# /audit search 每頁筆數
+SEARCH_PAGE_SIZE = 10
+# 未指定起始時間時查詢的天數
+SEARCH_DEFAULT_DAYS = 7
+
+
+def parse_time(text: str) -> Optional[float]:
+    """解析 "YYYY-MM-DD" 或 "YYYY-MM-DD HH:MM" (UTC+8) 為時間戳，格式錯誤時回傳 None"""
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text.strip(), fmt).replace(tzinfo=TZ_OFFSET).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def describe_event(action: str, details: dict) -> str:
+    """審計紀錄的簡短說明"""
+    if "channel_id" in details:
+        text = f"<#{details['channel_id']}>"
+        if "from_channel_id" in details:
+            text = f"<#{details['from_channel_id']}> → {text}"
+        if details.get("changes"):
+            text += f" ({', '.join(details['changes'])})"
+        return text
+    if "role_ids" in details:
+        return ", ".join(f"<@&{role_id}>" for role_id in details["role_ids"])
+    if action == "nick_change":
+        return f"{details.get('before') or '(無暱稱)'} → {details.get('after') or '(無暱稱)'}"
+    if "name" in details:
+        return details["name"]
+    return ""
+
+
+class AuditSearchView(discord.ui.View):
+    """審計紀錄查詢的翻頁按鈕 (鍵集分頁: 記住每一頁的起始游標)"""
+
+    def __init__(self, owner_id: int, query: dict, next_cursor):
+        super().__init__(timeout=180)
+        self.owner_id = owner_id
+        self.query = query
+        self.cursors = [None]
+        self.page = 0
+        self.next_cursor = next_cursor
+        self._sync_buttons()
+
+    def _sync_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.next_cursor is None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("[失敗] 只有查詢者可以翻頁", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="上一頁", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        await self._show(interaction)
+
+    @discord.ui.button(label="下一頁", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        if self.page == len(self.cursors):
+            self.cursors.append(self.next_cursor)
+        await self._show(interaction)
+
+    async def _show(self, interaction: discord.Interaction):
+        db_manager = get_database_manager()
+        rows, self.next_cursor = await db_manager.search_audit(
+            **self.query, after=self.cursors[self.page], limit=SEARCH_PAGE_SIZE
+        )
+        self._sync_buttons()
+        await interaction.response.edit_message(
+            embed=build_search_embed(rows, self.page), view=self
+        )
+
+
+def build_search_embed(rows: list, page: int) -> discord.Embed:
+    """審計紀錄查詢結果的 Embed"""
+    embed = discord.Embed(
+        title="[審計] 查詢結果",
+        color=discord.Color.from_rgb(52, 152, 219),
+    )
+    if not rows:
+        embed.description = "沒有符合條件的紀錄"
+    else:
+        lines = []
+        for row in rows:
+            when = datetime.fromtimestamp(row["timestamp"], TZ_OFFSET).strftime("%m/%d %H:%M")
+            label = AUDIT_ACTIONS.get(row["action"], row["action"])
+            user = f"<@{row['user_id']}>" if row["user_id"] else ""
+            summary = describe_event(row["action"], row["details"])
+            lines.append(f"`{when}` [{label}] {user} {summary}".rstrip())
+        embed.description = "\n".join(lines)[:4096]
+    embed.set_footer(text=f"第 {page + 1} 頁")
+    return embed
+
 
 class AuditLog(commands.Cog):
     """伺服器審計日誌 Cog — 記錄成員、語音、角色、暱稱、頻道事件"""
@@ -47,6 +167,18 @@ class AuditLog(commands.Cog):
         self._cache_time = now
         return self._channel_cache
 
+    def record_event(self, action: str, guild_id: int, user_id: int = None, **details):
+        """將事件寫入 audit_logs (經由記憶體緩衝批次寫入，不等待 I/O)"""
+        db_manager = get_database_manager()
+        if db_manager is None:
+            return
+        db_manager.record_audit(
+            action,
+            str(user_id) if user_id is not None else None,
+            str(guild_id),
+            details,
+        )
+
     def get_log_channel_id(self, guild_id: int):
         """取得伺服器的日誌頻道 ID (從快取)"""
         channels = self._load_all_log_channels()
@@ -54,6 +186,9 @@ class AuditLog(commands.Cog):
 
     async def send_log_embed(self, guild_id: int, embed: discord.Embed):
         """發送日誌 Embed 到設定的日誌頻道"""
+        # 僅保留管理功能時略過審計日誌
+        if not feature_allowed(PRIORITY_STANDARD):
+            return
         log_channel_id = self.get_log_channel_id(guild_id)
         if not log_channel_id:
             return
@@ -76,6 +211,7 @@ class AuditLog(commands.Cog):
         if member.bot:
             return
 
+        self.record_event("member_join", member.guild.id, member.id, name=str(member))
         embed = discord.Embed(
             title="[加入] 成員加入伺服器",
             color=discord.Color.from_rgb(46, 204, 113),
@@ -112,6 +248,7 @@ class AuditLog(commands.Cog):
         if member.bot:
             return
 
+        self.record_event("member_remove", member.guild.id, member.id, name=str(member))
         # 計算在伺服器待了多久
         if member.joined_at:
             stay_duration = datetime.now(TZ_OFFSET) - member.joined_at.astimezone(
@@ -177,6 +314,7 @@ class AuditLog(commands.Cog):
 
         # 加入語音頻道
         if before.channel is None and after.channel is not None:
+            self.record_event("voice_join", guild_id, member.id, channel_id=after.channel.id)
             embed = discord.Embed(
                 title="[語音] 加入語音頻道",
                 color=discord.Color.from_rgb(52, 152, 219),
@@ -200,6 +338,7 @@ class AuditLog(commands.Cog):
 
         # 離開語音頻道
         elif before.channel is not None and after.channel is None:
+            self.record_event("voice_leave", guild_id, member.id, channel_id=before.channel.id)
             embed = discord.Embed(
                 title="[語音] 離開語音頻道",
                 color=discord.Color.from_rgb(231, 76, 60),
@@ -227,6 +366,13 @@ class AuditLog(commands.Cog):
             and after.channel is not None
             and before.channel.id != after.channel.id
         ):
+            self.record_event(
+                "voice_move",
+                guild_id,
+                member.id,
+                from_channel_id=before.channel.id,
+                channel_id=after.channel.id,
+            )
             embed = discord.Embed(
                 title="[語音] 移動語音頻道",
                 color=discord.Color.from_rgb(241, 196, 15),
@@ -269,6 +415,9 @@ class AuditLog(commands.Cog):
             removed = set(before.roles) - set(after.roles)
 
             if added:
+                self.record_event(
+                    "role_add", guild_id, after.id, role_ids=[role.id for role in added]
+                )
                 roles_text = ", ".join(role.mention for role in added)
                 embed = discord.Embed(
                     title="[角色] 角色新增",
@@ -292,6 +441,9 @@ class AuditLog(commands.Cog):
                 await self.send_log_embed(guild_id, embed)
 
             if removed:
+                self.record_event(
+                    "role_remove", guild_id, after.id, role_ids=[role.id for role in removed]
+                )
                 roles_text = ", ".join(role.mention for role in removed)
                 embed = discord.Embed(
                     title="[角色] 角色移除",
@@ -316,6 +468,9 @@ class AuditLog(commands.Cog):
 
         # 暱稱變更
         if before.nick != after.nick:
+            self.record_event(
+                "nick_change", guild_id, after.id, before=before.nick, after=after.nick
+            )
             embed = discord.Embed(
                 title="[暱稱] 暱稱變更",
                 color=discord.Color.from_rgb(155, 89, 182),
@@ -359,6 +514,9 @@ class AuditLog(commands.Cog):
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
         """頻道建立"""
+        self.record_event(
+            "channel_create", channel.guild.id, channel_id=channel.id, name=channel.name
+        )
         embed = discord.Embed(
             title="[頻道] 頻道建立",
             color=discord.Color.from_rgb(46, 204, 113),
@@ -388,6 +546,9 @@ class AuditLog(commands.Cog):
     @commands.Cog.listener()
     async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
         """頻道刪除"""
+        self.record_event(
+            "channel_delete", channel.guild.id, channel_id=channel.id, name=channel.name
+        )
         embed = discord.Embed(
             title="[頻道] 頻道刪除",
             color=discord.Color.from_rgb(231, 76, 60),
@@ -481,6 +642,13 @@ class AuditLog(commands.Cog):
         if not changes:
             return
 
+        self.record_event(
+            "channel_update",
+            after.guild.id,
+            channel_id=after.id,
+            changes=[field_name for field_name, _, _ in changes],
+        )
+
         embed = discord.Embed(
             title="[頻道] 頻道修改",
             color=discord.Color.from_rgb(241, 196, 15),
@@ -506,6 +674,59 @@ class AuditLog(commands.Cog):
 
         await self.send_log_embed(after.guild.id, embed)
 
+    # ===== 審計紀錄查詢 =====
+
+    audit = app_commands.Group(name="audit", description="審計紀錄", guild_only=True)
+
+    @audit.command(name="search", description="查詢伺服器審計紀錄")
+    @app_commands.describe(
+        user="只顯示此用戶的紀錄",
+        action="只顯示此類事件",
+        since="起始時間 YYYY-MM-DD 或 YYYY-MM-DD HH:MM (預設 7 天前)",
+        until="結束時間 YYYY-MM-DD 或 YYYY-MM-DD HH:MM (預設現在)",
+    )
+    @app_commands.choices(
+        action=[
+            app_commands.Choice(name=label, value=key) for key, label in AUDIT_ACTIONS.items()
+        ]
+    )
+    @app_commands.checks.has_permissions(view_audit_log=True)
+    async def audit_search(
+        self,
+        interaction: discord.Interaction,
+        user: Optional[discord.User] = None,
+        action: Optional[app_commands.Choice[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ):
+        start = parse_time(since) if since else time.time() - SEARCH_DEFAULT_DAYS * 86400
+        end = parse_time(until) if until else None
+        if start is None or (until and end is None):
+            await interaction.response.send_message(
+                "[失敗] 時間格式錯誤，請使用 YYYY-MM-DD 或 YYYY-MM-DD HH:MM",
+                ephemeral=True,
+            )
+            return
+
+        db_manager = get_database_manager()
+        if db_manager is None:
+            await interaction.response.send_message("[失敗] 資料庫尚未初始化", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        # 先寫入緩衝中的事件，避免查不到剛發生的紀錄
+        await db_manager.flush()
+        query = {
+            "guild_id": interaction.guild_id,
+            "user_id": user.id if user else None,
+            "action": action.value if action else None,
+            "since": start,
+            "until": end,
+        }
+        rows, next_cursor = await db_manager.search_audit(**query, limit=SEARCH_PAGE_SIZE)
+        view = AuditSearchView(interaction.user.id, query, next_cursor)
+        await interaction.followup.send(embed=build_search_embed(rows, 0), view=view, ephemeral=True)
+
 
 async def setup(bot: commands.Bot):
     """載入 Cog"""
@@ -11,6 +11,9 @@ from discord.ext import commands
 from discord.ext import tasks
 
 from src.utils.config_manager import ensure_data_dir
+from src.utils.guild_scheduler import run_fair
+from src.utils.load_shedder import feature_allowed
+from src.utils.load_shedder import PRIORITY_STANDARD
 from src.utils.message_cache import get_message_cache
 
 # UTC+8 時區
@@ -19,6 +22,9 @@ TZ_OFFSET = timezone(timedelta(hours=8))
 # 日誌保留天數
 LOG_RETENTION_DAYS = 30
 
+# 公平排程的工作類型 (佇列滿時丟棄並彙總回報)
+LOG_JOB_KIND = "message_log"
+
 
 class MessageLogger(commands.Cog):
     """訊息編輯和刪除日誌 Cog"""
@@ -394,6 +400,22 @@ class MessageLogger(commands.Cog):
 
         return embed
 
+    async def _report_shed(self, log_channel: discord.TextChannel, guild_id: int):
+        """彙總回報因負載過高而略過的日誌"""
+        scheduler = getattr(self.bot, "guild_scheduler", None)
+        if scheduler is None:
+            return
+        skipped = scheduler.drain_shed(guild_id, LOG_JOB_KIND)
+        if not skipped:
+            return
+        embed = discord.Embed(
+            title="[日誌] 部分紀錄已略過",
+            description=f"伺服器訊息量過高，已略過 **{skipped}** 筆訊息紀錄/編刪日誌",
+            color=discord.Color.from_rgb(255, 165, 0),
+            timestamp=datetime.now(TZ_OFFSET),
+        )
+        await log_channel.send(embed=embed)
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """監聽所有訊息 - 記錄內容以備後用"""
@@ -405,7 +427,17 @@ class MessageLogger(commands.Cog):
         if message.guild is None:
             return
 
-        # 記錄訊息內容
+        # 僅保留管理功能時略過
+        if not feature_allowed(PRIORITY_STANDARD):
+            return
+
+        # 記錄訊息內容 (寫檔經公平排程，避免洪水伺服器拖慢其他伺服器)
+        await run_fair(
+            self.bot, message.guild.id, lambda: self._record_message(message), LOG_JOB_KIND
+        )
+
+    async def _record_message(self, message: discord.Message):
+        """記錄訊息內容"""
         record = self.get_message_record(message.guild.id, message.id)
         if not record:
             self.add_message_record(
@@ -424,10 +456,17 @@ class MessageLogger(commands.Cog):
         if before.author.bot:
             return
 
-        # 內容相同，忽略
-        if before.content == after.content:
+        # 內容相同，或僅保留管理功能時忽略
+        if before.content == after.content or not feature_allowed(PRIORITY_STANDARD):
             return
 
+        guild_id = before.guild.id if before.guild else None
+        await run_fair(
+            self.bot, guild_id, lambda: self._handle_edit(before, after), LOG_JOB_KIND
+        )
+
+    async def _handle_edit(self, before: discord.Message, after: discord.Message):
+        """處理訊息編輯 (記錄歷史並發送日誌)"""
         try:
             guild_id = before.guild.id
             channel_id = before.channel.id
@@ -487,6 +526,7 @@ class MessageLogger(commands.Cog):
 
                 await log_channel.send(embed=embed)
                 print(f"[✓] 編輯日誌已發送到頻道 {log_channel_id}")
+                await self._report_shed(log_channel, guild_id)
 
                 # 觸發成就
                 try:
@@ -505,10 +545,17 @@ class MessageLogger(commands.Cog):
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
         """監聽訊息刪除"""
-        # 忽略bot訊息
-        if message.author.bot:
+        # 忽略bot訊息；僅保留管理功能時略過
+        if message.author.bot or not feature_allowed(PRIORITY_STANDARD):
             return
 
+        guild_id = message.guild.id if message.guild else None
+        await run_fair(
+            self.bot, guild_id, lambda: self._handle_delete(message), LOG_JOB_KIND
+        )
+
+    async def _handle_delete(self, message: discord.Message):
+        """處理訊息刪除 (標記紀錄並發送日誌)"""
         try:
             guild_id = message.guild.id
             channel_id = message.channel.id
@@ -567,6 +614,7 @@ class MessageLogger(commands.Cog):
 
                 await log_channel.send(embed=embed)
                 print(f"[✓] 刪除日誌已發送到頻道 {log_channel_id}")
+                await self._report_shed(log_channel, guild_id)
 
                 # 觸發成就
                 try:
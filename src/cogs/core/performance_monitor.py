@@ -4,6 +4,7 @@ from discord.ext import tasks
 from src.utils.api_optimizer import get_api_optimizer
 from src.utils.config_optimizer import get_config_manager
 from src.utils.database_manager import get_database_manager
+from src.utils.load_shedder import get_load_shedder
 from src.utils.network_optimizer import get_network_optimizer
 
 
@@ -27,11 +28,44 @@ class PerformanceMonitorCog(commands.Cog):
             print(f"[效能監控] 收集指標時發生錯誤: {e}")
 
     async def collect_performance_metrics(self):
-        """收集效能指標"""
+        """收集效能指標 (所有指標以單一批次寫入)"""
         db_manager = get_database_manager()
-        if db_manager:
-            cache_stats = await db_manager.get_cache_stats()
-            await db_manager.store_metric(
+        if not db_manager:
+            return
+        rows = []
+
+        pool_stats = db_manager.get_pool_stats()
+        if pool_stats["mode"] == "inline":
+            rows.append(
+                (
+                    "database_pool_wait_ms",
+                    pool_stats["avg_wait_ms"],
+                    {
+                        "max_wait_ms": pool_stats["max_wait_ms"],
+                        "timeouts": pool_stats["timeouts"],
+                        "replaced": pool_stats["replaced"],
+                        "write": pool_stats["write"],
+                        "read": pool_stats["read"],
+                    },
+                )
+            )
+        else:
+            rows.append(
+                (
+                    "database_queue_depth",
+                    pool_stats["write_queue"] + pool_stats["read_queue"],
+                    {
+                        "write_queue": pool_stats["write_queue"],
+                        "read_queue": pool_stats["read_queue"],
+                        "commits": pool_stats["commits"],
+                        "errors": pool_stats["errors"],
+                    },
+                )
+            )
+
+        cache_stats = await db_manager.get_cache_stats()
+        rows.append(
+            (
                 "database_cache_size",
                 cache_stats["total_entries"],
                 {
@@ -39,35 +73,91 @@ class PerformanceMonitorCog(commands.Cog):
                     "expired_entries": cache_stats["expired_entries"],
                 },
             )
+        )
 
         config_manager = get_config_manager()
-        if config_manager and db_manager:
+        if config_manager:
             config_stats = config_manager.get_cache_stats()
-            await db_manager.store_metric(
-                "config_cache_size",
-                config_stats["cache_size"],
-                {
-                    "file_locks": config_stats["file_locks"],
-                    "active_watchers": config_stats["active_watchers"],
-                },
+            rows.append(
+                (
+                    "config_cache_size",
+                    config_stats["cache_size"],
+                    {
+                        "file_locks": config_stats["file_locks"],
+                        "active_watchers": config_stats["active_watchers"],
+                    },
+                )
+            )
+
+        shedder = get_load_shedder()
+        if shedder:
+            shed_stats = shedder.get_stats()
+            rows.append(
+                (
+                    "event_loop_lag_ms",
+                    shed_stats["lag_ms"],
+                    {
+                        "level": shed_stats["level"],
+                        "max_lag_ms": shed_stats["max_lag_ms"],
+                        "transitions": shed_stats["transitions"],
+                    },
+                )
+            )
+
+        scheduler = getattr(self.bot, "guild_scheduler", None)
+        if scheduler:
+            sched_stats = scheduler.get_stats()
+            # 只記錄佇列最深的幾個伺服器，避免指標數量隨伺服器數成長
+            busiest = sorted(
+                sched_stats["guilds"].items(),
+                key=lambda item: item[1]["max_depth"],
+                reverse=True,
+            )[:5]
+            rows.append(
+                (
+                    "scheduler_queue_depth",
+                    sched_stats["queued"],
+                    {
+                        "active_guilds": sched_stats["active_guilds"],
+                        "shed": sched_stats["shed"],
+                        "busiest": {str(gid): stats for gid, stats in busiest},
+                    },
+                )
+            )
+
+        watchdog = getattr(self.bot.tree, "watchdog", None)
+        if watchdog:
+            watchdog_stats = watchdog.get_stats()
+            rows.append(
+                (
+                    "interaction_deadline_misses",
+                    watchdog_stats["deadline_misses"],
+                    {
+                        "interactions": watchdog_stats["interactions"],
+                        "auto_deferred": watchdog_stats["auto_deferred"],
+                        "expired": watchdog_stats["expired"],
+                        "slow_commands": dict(watchdog_stats["slow_commands"]),
+                    },
+                )
             )
 
         network_optimizer = get_network_optimizer()
-        if network_optimizer and db_manager:
+        if network_optimizer:
             network_stats = network_optimizer.get_network_stats()
             for hostname, stats in network_stats.get("response_times", {}).items():
-                await db_manager.store_metric(
-                    f"network_response_time_{hostname}",
-                    stats["avg"],
-                    {"count": stats["count"], "min": stats["min"], "max": stats["max"]},
+                rows.append(
+                    (
+                        f"network_response_time_{hostname}",
+                        stats["avg"],
+                        {"count": stats["count"], "min": stats["min"], "max": stats["max"]},
+                    )
                 )
-            await db_manager.store_metric(
-                "active_requests",
-                sum(network_stats.get("active_requests", {}).values()),
-            )
-            await db_manager.store_metric(
-                "dns_cache_size", network_stats.get("dns_cache_size", 0)
+            rows.append(
+                ("active_requests", sum(network_stats.get("active_requests", {}).values()))
             )
+            rows.append(("dns_cache_size", network_stats.get("dns_cache_size", 0)))
+
+        await db_manager.store_metrics_batch(rows)
 
 
 async def setup(bot: commands.Bot):
@@ -4,7 +4,6 @@ import time
 
 from discord.ext import commands
 from discord.ext import tasks
-import psutil
 
 from src.utils.api_optimizer import get_api_optimizer
 from src.utils.api_optimizer import performance_monitor
@@ -80,6 +79,8 @@ class SystemMaintenance(commands.Cog):
 
     async def check_system_health(self):
         try:
+            import psutil  # 首次健康檢查時才載入
+
             memory_percent = psutil.virtual_memory().percent
             cpu_percent = await asyncio.to_thread(psutil.cpu_percent, 1)
 
@@ -101,9 +102,9 @@ class SystemMaintenance(commands.Cog):
 
             api_optimizer = get_api_optimizer()
             if api_optimizer:
-                api_optimizer.clear_cache("channel_")
-                api_optimizer.clear_cache("user_")
-                api_optimizer.clear_cache("guild_")
+                api_optimizer.clear_cache(namespace="channel")
+                api_optimizer.clear_cache(namespace="user")
+                api_optimizer.clear_cache(namespace="guild")
 
             for task in asyncio.all_tasks():
                 if task.done() and not task.cancelled():
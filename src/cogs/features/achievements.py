@@ -1,13 +1,16 @@
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
-import json
 import os
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
+from src.utils.json_store import get_json_store
+from src.utils.load_shedder import feature_allowed
+from src.utils.load_shedder import PRIORITY_COSMETIC
+
 # UTC+8 時區
 TZ_OFFSET = timezone(timedelta(hours=8))
 
@@ -118,30 +121,19 @@ class Achievements(commands.Cog):
         self.bot = bot
         self.data_file = "data/storage/achievements.json"
         self.ensure_data_dir()
+        self._store = get_json_store(self.data_file)
 
     def ensure_data_dir(self):
         """確保資料目錄存在"""
         os.makedirs("data/storage", exist_ok=True)
 
     def load_achievements(self) -> dict:
-        """載入成就數據"""
-        if not os.path.exists(self.data_file):
-            return {}
-
-        try:
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"[錯誤] 無法載入成就數據: {e}")
-            return {}
+        """載入成就數據 (記憶體副本)"""
+        return self._store.data
 
     def save_achievements(self, data: dict):
-        """保存成就數據"""
-        try:
-            with open(self.data_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"[錯誤] 無法保存成就數據: {e}")
+        """保存成就數據 (延遲寫入磁碟)"""
+        self._store.set(data)
 
     def get_user_achievements(self, user_id: int, guild_id: int = None) -> list:
         """獲取用戶成就列表"""
@@ -455,28 +447,34 @@ class Achievements(commands.Cog):
         return color_map.get(rarity, discord.Color.greyple())
 
     # 事件監聽和成就觸發方法（後續整合）
+    def _trigger(self, user_id: int, guild_id: int, achievement_id: str):
+        """自動觸發成就 (負載過高時略過，屬裝飾性功能)"""
+        if not feature_allowed(PRIORITY_COSMETIC):
+            return
+        self.unlock_achievement(user_id, guild_id, achievement_id)
+
     def trigger_edit_achievement(self, user_id: int, guild_id: int):
         """觸發編輯成就檢查"""
-        self.unlock_achievement(user_id, guild_id, "first_edit")
+        self._trigger(user_id, guild_id, "first_edit")
 
     def trigger_delete_achievement(self, user_id: int, guild_id: int):
         """觸發刪除成就檢查"""
-        self.unlock_achievement(user_id, guild_id, "first_delete")
+        self._trigger(user_id, guild_id, "first_delete")
 
     def trigger_interaction_achievement(self, user_id: int, guild_id: int):
         """觸發互動成就檢查"""
-        self.unlock_achievement(user_id, guild_id, "first_interaction")
+        self._trigger(user_id, guild_id, "first_interaction")
 
     def trigger_game_loss(self, user_id: int, guild_id: int, game_type: str):
         """觸發遊戲失敗成就"""
         if game_type == "russian_roulette":
-            self.unlock_achievement(user_id, guild_id, "halo_broken")
+            self._trigger(user_id, guild_id, "halo_broken")
         elif game_type == "submarine":
-            self.unlock_achievement(user_id, guild_id, "kursk_sinking")
+            self._trigger(user_id, guild_id, "kursk_sinking")
 
     def trigger_codex_achievement(self, user_id: int, guild_id: int):
         """觸發圖鑑成就檢查"""
-        self.unlock_achievement(user_id, guild_id, "achievement_explorer")
+        self._trigger(user_id, guild_id, "achievement_explorer")
 
 
 async def setup(bot: commands.Bot):
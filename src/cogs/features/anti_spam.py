@@ -1,9 +1,15 @@
+import asyncio
 from datetime import timedelta
+import time
+from typing import List
+from typing import Optional
 
 import discord
 from discord import app_commands
 from discord.ext import commands
+from discord.ext import tasks
 
+from src.utils.action_executor import ModerationExecutor
 from src.utils.anti_spam import ACTION_BAN
 from src.utils.anti_spam import ACTION_DELETE
 from src.utils.anti_spam import ACTION_KICK
@@ -14,11 +20,28 @@ from src.utils.anti_spam import ACTION_WARN
 from src.utils.anti_spam import ALL_DETECTIONS
 from src.utils.anti_spam import AntiSpamManager
 from src.utils.anti_spam import DETECT_NAMES
+from src.utils.anti_spam import INVITE_RE
 from src.utils.anti_spam import VALID_ACTIONS
+from src.utils.anti_spam import VALID_RATE_MODES
 from src.utils.anti_spam import create_anti_spam_log_embed
 from src.utils.anti_spam import create_raid_alert_embed
-from src.utils.blacklist_manager import blacklist_manager
+from src.utils.auto_slowmode import parse_levels
+from src.utils.auto_slowmode import SlowmodeController
 from src.utils.config_manager import get_guild_log_channel
+from src.utils.guild_scheduler import run_fair
+from src.utils.invite_resolver import InviteResolver
+from src.utils.lockdown import LockdownEngine
+from src.utils.lockdown import VALID_LOCKDOWN_MODES
+
+
+# 突襲可疑帳號可批次執行的動作
+RAID_COHORT_ACTIONS = (ACTION_MUTE, ACTION_KICK, ACTION_BAN)
+
+# 批次處理時同時進行的請求數
+RAID_COHORT_CONCURRENCY = 5
+
+# 公平排程的工作類型 (偵測日誌)
+LOG_JOB_KIND = "anti_spam_log"
 
 
 class AntiSpam(commands.Cog):
@@ -27,6 +50,19 @@ class AntiSpam(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.manager = AntiSpamManager()
+        self.executor = ModerationExecutor()
+        self.lockdown = LockdownEngine()
+        # 重啟後依持久化快照恢復封鎖狀態
+        for guild_id in self.lockdown.snapshots:
+            self.manager.set_lockdown(guild_id, True)
+        self.slowmode = SlowmodeController()
+        self._slowmode_tasks = set()
+        self.invites = InviteResolver(self._fetch_invite_guild)
+        self._slowmode_cooldown.start()
+
+    async def cog_unload(self):
+        self._slowmode_cooldown.cancel()
+        await self.executor.close()
 
     # ───────────── 輔助方法 ─────────────
 
@@ -40,6 +76,15 @@ class AntiSpam(commands.Cog):
             if not ch:
                 ch = await self.bot.fetch_channel(log_channel_id)
             await ch.send(embed=embed)
+            # 彙總回報因負載過高而略過的偵測日誌
+            scheduler = getattr(self.bot, "guild_scheduler", None)
+            skipped = scheduler.drain_shed(guild_id, LOG_JOB_KIND) if scheduler else 0
+            if skipped:
+                await ch.send(embed=discord.Embed(
+                    title="[防炸群] 部分偵測日誌已略過",
+                    description=f"訊息量過高，已略過 **{skipped}** 筆偵測日誌 (懲罰仍照常執行)",
+                    color=discord.Color.from_rgb(255, 165, 0),
+                ))
         except Exception:
             pass
 
@@ -49,109 +94,195 @@ class AntiSpam(commands.Cog):
         message: discord.Message,
         detail: str,
         detection_type: str,
-    ):
-        """執行懲罰動作"""
+    ) -> bool:
+        """執行懲罰動作 (經執行器去重合併)，回傳是否實際執行"""
         member = message.author
         guild = message.guild
+        executor = self.executor
+        if executor.is_removed(guild.id, member.id):
+            return False
+
         s = self.manager.get_settings(guild.id)
         reason = f"防炸群: {DETECT_NAMES.get(detection_type, detection_type)} — {detail}"
 
-        try:
-            if action == ACTION_WARN:
-                try:
-                    warn_embed = discord.Embed(
-                        title="[警告] 防炸群系統",
-                        description=f"你的行為觸發了 **{DETECT_NAMES.get(detection_type)}** 偵測\n請停止此行為，否則將自動升級懲罰",
-                        color=discord.Color.from_rgb(255, 200, 0),
-                    )
-                    await member.send(embed=warn_embed)
-                except discord.Forbidden:
-                    pass
+        # 刪除訊息: 合併到同頻道的批次刪除，日誌在去重視窗內只記一次
+        if action == ACTION_DELETE:
+            if not executor.purge_user(guild.id, member.id):
+                executor.queue_delete(message.channel, [message.id])
+            return executor.claim(guild.id, member.id, action)
 
-            elif action == ACTION_DELETE:
-                try:
-                    await message.channel.purge(
-                        limit=15,
-                        check=lambda m: m.author.id == member.id,
-                    )
-                except discord.HTTPException:
+        # 已在禁言中: 只需清除訊息
+        if action == ACTION_MUTE and isinstance(member, discord.Member) and member.is_timed_out():
+            executor.purge_user(guild.id, member.id)
+            return False
+
+        async def perform():
+            try:
+                if action == ACTION_WARN:
                     try:
-                        await message.delete()
-                    except discord.HTTPException:
+                        warn_embed = discord.Embed(
+                            title="[警告] 防炸群系統",
+                            description=f"你的行為觸發了 **{DETECT_NAMES.get(detection_type)}** 偵測\n請停止此行為，否則將自動升級懲罰",
+                            color=discord.Color.from_rgb(255, 200, 0),
+                        )
+                        await member.send(embed=warn_embed)
+                    except discord.Forbidden:
                         pass
 
-            elif action == ACTION_MUTE:
-                duration = s.get("mute_duration", 3600)
-                await member.timeout(
-                    timedelta(seconds=duration), reason=reason
-                )
-                try:
-                    await message.channel.purge(
-                        limit=10,
-                        check=lambda m: m.author.id == member.id,
+                elif action == ACTION_MUTE:
+                    duration = s.get("mute_duration", 3600)
+                    await member.timeout(
+                        timedelta(seconds=duration), reason=reason
                     )
-                except discord.HTTPException:
-                    pass
-
-            elif action == ACTION_KICK:
-                try:
-                    await message.channel.purge(
-                        limit=15,
-                        check=lambda m: m.author.id == member.id,
+                    executor.purge_user(guild.id, member.id)
+
+                elif action == ACTION_KICK:
+                    executor.purge_user(guild.id, member.id)
+                    await guild.kick(member, reason=reason)
+                    executor.mark_removed(guild.id, member.id)
+
+                elif action == ACTION_BAN:
+                    delete_days = s.get("ban_delete_days", 1)
+                    await guild.ban(
+                        member,
+                        reason=reason,
+                        delete_message_days=delete_days,
                     )
-                except discord.HTTPException:
-                    pass
-                await guild.kick(member, reason=reason)
-
-            elif action == ACTION_BAN:
-                delete_days = s.get("ban_delete_days", 1)
-                await guild.ban(
-                    member,
-                    reason=reason,
-                    delete_message_days=delete_days,
-                )
+                    executor.mark_removed(guild.id, member.id)
 
-            elif action == ACTION_LOCKDOWN:
-                await self._activate_lockdown(guild)
+                elif action == ACTION_LOCKDOWN:
+                    await self._activate_lockdown(guild)
 
-        except discord.Forbidden:
-            pass
-        except Exception:
-            pass
+            except discord.Forbidden:
+                pass
+            except Exception:
+                pass
 
-    async def _activate_lockdown(self, guild: discord.Guild):
-        """啟用封鎖模式 — 鎖定所有文字頻道"""
+        # 封鎖為伺服器層級動作，以 user_id=0 去重
+        target_id = 0 if action == ACTION_LOCKDOWN else member.id
+        return await executor.execute(guild.id, target_id, action, perform)
+
+    async def _fetch_invite_guild(self, code: str) -> Optional[int]:
+        """查詢邀請碼的目標伺服器 ID (無效或已過期的邀請回傳 None)"""
+        try:
+            invite = await self.bot.fetch_invite(code, with_counts=False)
+        except discord.NotFound:
+            return None
+        guild = invite.guild
+        return guild.id if guild is not None else None
+
+    async def _invites_allowed(self, guild_id: int, codes: List[str]) -> bool:
+        """訊息中的所有邀請是否都指向本伺服器或合作伺服器"""
+        for code in codes:
+            try:
+                target = await self.invites.resolve(code)
+            except discord.HTTPException:
+                return False  # 查詢失敗時保守處理
+            if not self.manager.is_invite_allowed(guild_id, target):
+                return False
+        return True
+
+    async def _activate_lockdown(
+        self,
+        guild: discord.Guild,
+        on_progress=None,
+        mode: str = None,
+    ):
+        """啟用封鎖模式 — 並行鎖定文字頻道 (或切換 @everyone 權限)"""
         if self.manager.is_lockdown(guild.id):
-            return
+            return None
         self.manager.set_lockdown(guild.id, True)
 
-        default_role = guild.default_role
-        for channel in guild.text_channels:
-            try:
-                overwrite = channel.overwrites_for(default_role)
-                overwrite.send_messages = False
-                await channel.set_permissions(
-                    default_role, overwrite=overwrite,
-                    reason="防炸群: 突襲封鎖模式啟動",
-                )
-            except discord.Forbidden:
-                continue
+        mode = mode or self.manager.get_compiled(guild.id).lockdown_mode
+        result = await self.lockdown.lock(
+            guild,
+            reason="防炸群: 突襲封鎖模式啟動",
+            mode=mode,
+            on_progress=on_progress,
+        )
+        self.manager.set_lockdown(guild.id, self.lockdown.is_active(guild.id))
+        return result
+
+    async def _deactivate_lockdown(self, guild: discord.Guild, on_progress=None):
+        """解除封鎖模式 — 依快照還原原本的權限覆寫"""
+        result = await self.lockdown.unlock(
+            guild,
+            reason="防炸群: 封鎖模式解除",
+            on_progress=on_progress,
+        )
+        self.manager.set_lockdown(guild.id, self.lockdown.is_active(guild.id))
+        return result
 
-    async def _deactivate_lockdown(self, guild: discord.Guild):
-        """解除封鎖模式"""
-        self.manager.set_lockdown(guild.id, False)
+    def _progress_reporter(self, interaction: discord.Interaction, title: str):
+        """建立以編輯回覆訊息回報進度的回呼"""
 
-        default_role = guild.default_role
-        for channel in guild.text_channels:
-            try:
-                overwrite = channel.overwrites_for(default_role)
-                overwrite.send_messages = None
-                await channel.set_permissions(
-                    default_role, overwrite=overwrite,
-                    reason="防炸群: 封鎖模式解除",
-                )
-            except discord.Forbidden:
+        async def report(done: int, total: int):
+            await interaction.edit_original_response(
+                content=f"[進度] {title}: {done}/{total} 個頻道"
+            )
+
+        return report
+
+    def _observe_channel_rate(self, message: discord.Message):
+        """記錄頻道訊息速率，必要時在背景調整慢速模式"""
+        s = self.manager.get_compiled(message.guild.id)
+        if not s.enabled or not s.slowmode_enabled:
+            return
+        channel = message.channel
+        if not isinstance(channel, discord.TextChannel):
+            return
+        delay = self.slowmode.observe(
+            channel.id, time.monotonic(), s.slowmode_levels, channel.slowmode_delay
+        )
+        if delay is not None:
+            self._schedule_slowmode(channel, delay)
+
+    def _schedule_slowmode(self, channel: discord.TextChannel, delay: int):
+        """在背景套用慢速模式，不阻塞訊息處理"""
+        if channel.slowmode_delay == delay:
+            return
+        task = asyncio.ensure_future(self._apply_slowmode(channel, delay))
+        self._slowmode_tasks.add(task)
+        task.add_done_callback(self._slowmode_tasks.discard)
+
+    async def _apply_slowmode(self, channel: discord.TextChannel, delay: int):
+        """修改頻道慢速模式並記錄日誌"""
+        previous = channel.slowmode_delay
+        try:
+            await channel.edit(slowmode_delay=delay, reason="防炸群: 自動慢速模式")
+        except discord.HTTPException as e:
+            # 保留級距狀態並暫停調整，避免每則訊息都重試修改
+            backoff = self.slowmode.edit_failed(channel.id, time.monotonic())
+            print(f"[防炸群] 無法修改 #{channel.name} 的慢速模式，{backoff:.0f}s 後再試: {e}")
+            return
+        self.slowmode.edit_succeeded(channel.id)
+
+        raising = delay > previous
+        embed = discord.Embed(
+            title="[防炸群] 自動慢速模式" + ("提高" if raising else "降低"),
+            description=f"{channel.mention}: {previous}s → **{delay}s**",
+            color=discord.Color.from_rgb(255, 165, 0) if raising else discord.Color.from_rgb(46, 204, 113),
+        )
+        rate = self.slowmode.rate_per_minute(channel.id, time.monotonic())
+        embed.add_field(name="目前速率", value=f"約 {rate:.0f} 則/分鐘", inline=True)
+        embed.set_footer(text=f"{channel.guild.name} ({channel.guild.id})")
+        await self._send_log(channel.guild.id, embed)
+
+    @tasks.loop(seconds=20)
+    async def _slowmode_cooldown(self):
+        """定期檢查已提高慢速模式的頻道，流量平息後逐級降低"""
+        now = time.monotonic()
+        for channel_id in self.slowmode.active_channels():
+            channel = self.bot.get_channel(channel_id)
+            if not isinstance(channel, discord.TextChannel):
+                self.slowmode.forget(channel_id)
                 continue
+            s = self.manager.get_compiled(channel.guild.id)
+            levels = s.slowmode_levels if s.slowmode_enabled else ()
+            delay = self.slowmode.evaluate(channel_id, now, levels)
+            if delay is not None:
+                self._schedule_slowmode(channel, delay)
+        self.slowmode.prune_idle(now)
 
     # ───────────── 事件監聽 ─────────────
 
@@ -160,9 +291,14 @@ class AntiSpam(commands.Cog):
         """監聽訊息 — 多層偵測"""
         if message.author.bot or message.guild is None:
             return
-        if blacklist_manager.is_blacklisted(message.author.id):
+        # 只查本地快取: 遠端查詢由 Bot.on_message 負責，不可擋在防炸群前面
+        blacklist = getattr(self.bot, "blacklist_manager", None)
+        if blacklist is not None and blacklist.peek(message.author.id):
             return
 
+        # 頻道速率 (含白名單與管理員的訊息，反映真實流量)
+        self._observe_channel_rate(message)
+
         # 權限跳過: 管理員與機器人無法懲罰的成員
         member = message.author
         if isinstance(member, discord.Member):
@@ -171,12 +307,12 @@ class AntiSpam(commands.Cog):
             if message.guild.me.top_role <= member.top_role:
                 return
 
-        # 邀請連結快速攔截
-        if self.manager.is_invite_link(message.content or "", message.guild.id):
-            try:
-                await message.delete()
-            except discord.HTTPException:
-                pass
+        self.executor.track_message(message)
+
+        # 邀請連結攔截 (合作伺服器除外，併入批次刪除)
+        invite_codes = self.manager.find_invite_codes(message.content or "", message.guild.id)
+        if invite_codes and not await self._invites_allowed(message.guild.id, invite_codes):
+            self.executor.queue_delete(message.channel, [message.id])
 
         triggers = self.manager.check_message(
             guild_id=message.guild.id,
@@ -197,10 +333,13 @@ class AntiSpam(commands.Cog):
             message.guild.id, message.author.id
         )
 
-        # 執行動作
-        await self._execute_action(
+        # 執行動作 (同一用戶的重複動作已合併時，不重複發送日誌)
+        executed = await self._execute_action(
             worst_action, message, worst_detail, worst_det
         )
+        if not executed:
+            self.manager.reset_user(message.guild.id, message.author.id)
+            return
 
         # 發送日誌
         embed = create_anti_spam_log_embed(
@@ -223,36 +362,103 @@ class AntiSpam(commands.Cog):
             )
             embed.add_field(name="其他觸發", value=others, inline=False)
 
-        await self._send_log(message.guild.id, embed)
+        # 日誌經公平排程發送，突襲期間不會拖慢其他伺服器
+        guild_id = message.guild.id
+        await run_fair(
+            self.bot, guild_id, lambda: self._send_log(guild_id, embed), LOG_JOB_KIND
+        )
 
         # 重設紀錄
         self.manager.reset_user(message.guild.id, message.author.id)
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
-        """監聽成員加入 — 突襲偵測"""
+        """監聽成員加入 — 突襲評分偵測"""
         if member.bot:
             return
 
-        result = self.manager.check_member_join(member.guild.id)
+        guild = member.guild
+        result = self.manager.check_member_join(guild.id, member)
         if not result:
             return
 
         det_type, action, detail = result
-        s = self.manager.get_settings(member.guild.id)
+        s = self.manager.get_compiled(guild.id)
+        now = self.manager.now()
+        recent = self.manager.raid_scorer.recent(guild.id, now, s.raid_window)
+        cohort = self.manager.get_raid_cohort(guild.id)
 
         embed = create_raid_alert_embed(
-            guild_name=member.guild.name,
-            guild_id=member.guild.id,
-            join_count=s["raid_joins"],
-            window=s["raid_window"],
+            guild_name=guild.name,
+            guild_id=guild.id,
+            join_count=len(recent),
+            window=s.raid_window,
             action=action,
+            score=sum(r.score for r in recent),
+            cohort=cohort,
         )
 
-        await self._send_log(member.guild.id, embed)
+        await self._send_log(guild.id, embed)
 
         if action == ACTION_LOCKDOWN:
-            await self._activate_lockdown(member.guild)
+            await self._activate_lockdown(guild)
+        elif action in RAID_COHORT_ACTIONS and cohort:
+            await self._act_on_cohort(guild, cohort, action, f"防炸群: 突襲 — {detail}")
+
+    async def _act_on_cohort(
+        self,
+        guild: discord.Guild,
+        cohort: list,
+        action: str,
+        reason: str,
+    ) -> dict:
+        """
+        批次處理突襲可疑帳號
+
+        以有限並行度送出請求 (速率限制由 discord.py 依路由處理)，
+        每位用戶經執行器去重，避免與訊息偵測重複懲罰。
+        """
+        s = self.manager.get_settings(guild.id)
+        executor = self.executor
+        result = {"total": len(cohort), "done": 0, "failed": 0}
+        semaphore = asyncio.Semaphore(RAID_COHORT_CONCURRENCY)
+
+        async def handle(record):
+            user_id = record.user_id
+
+            async def perform():
+                if action == ACTION_BAN:
+                    # 以 ID 封禁，已離開的帳號也能處理
+                    await guild.ban(
+                        discord.Object(id=user_id),
+                        reason=reason,
+                        delete_message_days=s.get("ban_delete_days", 1),
+                    )
+                    executor.mark_removed(guild.id, user_id)
+                    return
+                member = guild.get_member(user_id)
+                if member is None:
+                    return
+                if action == ACTION_KICK:
+                    await guild.kick(member, reason=reason)
+                    executor.mark_removed(guild.id, user_id)
+                elif action == ACTION_MUTE:
+                    await member.timeout(
+                        timedelta(seconds=s.get("mute_duration", 3600)), reason=reason
+                    )
+
+            async with semaphore:
+                try:
+                    # 已由其他偵測處理 (去重) 的帳號不計入
+                    if await executor.execute(guild.id, user_id, action, perform):
+                        result["done"] += 1
+                except discord.HTTPException:
+                    result["failed"] += 1
+
+        await asyncio.gather(*(handle(r) for r in cohort))
+        if action in (ACTION_KICK, ACTION_BAN):
+            self.manager.raid_scorer.discard(guild.id, (r.user_id for r in cohort))
+        return result
 
     # ───────────── 指令群組 ─────────────
 
@@ -426,7 +632,7 @@ class AntiSpam(commands.Cog):
     @anti_spam_group.command(name="raid", description="設定突襲偵測")
     @app_commands.describe(
         enabled="是否啟用",
-        joins="觸發人數",
+        joins="觸發門檻 (風險分數，正常帳號每人 1 分，新帳號/預設頭像/相似名稱加權)",
         window="時間視窗 (秒)",
         action="觸發動作 (建議 lockdown)",
     )
@@ -456,11 +662,82 @@ class AntiSpam(commands.Cog):
             title=f"[設定] 突襲偵測 — {status}",
             color=discord.Color.from_rgb(46, 204, 113),
         )
-        embed.add_field(name="觸發人數", value=f"{joins} 人", inline=True)
+        embed.add_field(name="觸發門檻", value=f"{max(3, joins)} 分", inline=True)
         embed.add_field(name="時間視窗", value=f"{window} 秒", inline=True)
         embed.add_field(name="動作", value=ACTION_NAMES.get(action, action), inline=True)
         await interaction.followup.send(embed=embed)
 
+    @anti_spam_group.command(name="rate_mode", description="設定洪水/連結/突襲的速率計算模式")
+    @app_commands.describe(
+        mode="window (保存時間戳，精確) 或 ewma (指數加權估計，固定記憶體)",
+    )
+    async def rate_mode_cmd(self, interaction: discord.Interaction, mode: str):
+        """設定速率計算模式"""
+        if mode not in VALID_RATE_MODES:
+            await interaction.response.send_message(
+                f"[失敗] 無效模式，可選: {', '.join(VALID_RATE_MODES)}", ephemeral=True
+            )
+            return
+        await interaction.response.defer()
+        self.manager.update_settings(interaction.guild_id, {"rate_mode": mode})
+        embed = discord.Embed(
+            title="[設定] 速率計算模式已更新",
+            description=f"模式: **{mode}**",
+            color=discord.Color.from_rgb(46, 204, 113),
+        )
+        embed.add_field(
+            name="說明",
+            value=(
+                "ewma 模式下每位用戶只保存固定大小的計數器，適合大型伺服器\n"
+                "門檻沿用現有的訊息數/時間視窗設定"
+            ),
+            inline=False,
+        )
+        await interaction.followup.send(embed=embed)
+
+    @anti_spam_group.command(name="slowmode", description="設定自動慢速模式")
+    @app_commands.describe(
+        enabled="是否啟用",
+        levels="級距 (每分鐘訊息數:慢速秒數，以逗號分隔)，例如 30:2,60:5,120:10,240:30",
+    )
+    async def slowmode_cmd(
+        self,
+        interaction: discord.Interaction,
+        enabled: bool = True,
+        levels: str = None,
+    ):
+        """設定自動慢速模式"""
+        updates = {"slowmode_enabled": enabled}
+        if levels:
+            try:
+                updates["slowmode_levels"] = [list(lv) for lv in parse_levels(levels)]
+            except ValueError:
+                await interaction.response.send_message(
+                    "[失敗] 級距格式錯誤，格式: 每分鐘訊息數:秒數 (遞增)，例如 30:2,60:5",
+                    ephemeral=True,
+                )
+                return
+        await interaction.response.defer()
+        self.manager.update_settings(interaction.guild_id, updates)
+        s = self.manager.get_compiled(interaction.guild_id)
+
+        status = "啟用" if enabled else "禁用"
+        embed = discord.Embed(
+            title=f"[設定] 自動慢速模式 — {status}",
+            color=discord.Color.from_rgb(46, 204, 113),
+        )
+        embed.add_field(
+            name="級距",
+            value="\n".join(f"≥ {rate} 則/分鐘 → {delay}s" for rate, delay in s.slowmode_levels),
+            inline=False,
+        )
+        embed.add_field(
+            name="機制說明",
+            value="速率超過門檻時提高慢速模式；低於門檻 60% 並維持 1 分鐘後逐級降低，最後恢復原設定",
+            inline=False,
+        )
+        await interaction.followup.send(embed=embed)
+
     @anti_spam_group.command(name="escalation", description="設定自動升級懲罰")
     @app_commands.describe(
         enabled="是否啟用自動升級",
@@ -495,6 +772,152 @@ class AntiSpam(commands.Cog):
         )
         await interaction.followup.send(embed=embed)
 
+    @anti_spam_group.command(name="invite_allowlist", description="管理允許的邀請目標伺服器")
+    @app_commands.describe(
+        mode="add、remove 或 list",
+        target="伺服器 ID 或該伺服器的邀請連結",
+    )
+    async def invite_allowlist_cmd(
+        self,
+        interaction: discord.Interaction,
+        mode: str,
+        target: str = "",
+    ):
+        """管理合作伺服器邀請白名單"""
+        if mode not in ("add", "remove", "list"):
+            await interaction.response.send_message(
+                "[失敗] mode 必須為 add、remove 或 list", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer()
+        guild_id = interaction.guild_id
+        current = [int(g) for g in self.manager.get_settings(guild_id).get("invite_allowlist", [])]
+
+        if mode == "list":
+            listing = "\n".join(f"`{g}`" for g in current) or "無"
+            embed = discord.Embed(
+                title=f"[查詢] 允許的邀請目標 ({len(current)} 個)",
+                description=listing[:4000],
+                color=discord.Color.from_rgb(52, 152, 219),
+            )
+            embed.set_footer(text="本伺服器的邀請一律允許")
+            await interaction.followup.send(embed=embed)
+            return
+
+        # 可直接貼上邀請連結，由解析器取得伺服器 ID
+        target = target.strip()
+        codes = [m.group(2) for m in INVITE_RE.finditer(target)]
+        try:
+            if codes:
+                target_id = await self.invites.resolve(codes[0])
+            else:
+                target_id = int(target)
+        except (ValueError, discord.HTTPException):
+            target_id = None
+        if target_id is None:
+            await interaction.followup.send(
+                "[失敗] 無效的伺服器 ID 或邀請連結", ephemeral=True
+            )
+            return
+
+        if mode == "add" and target_id not in current:
+            current.append(target_id)
+            change = f"新增允許的邀請目標: `{target_id}`"
+        elif mode == "remove" and target_id in current:
+            current.remove(target_id)
+            change = f"移除允許的邀請目標: `{target_id}`"
+        else:
+            await interaction.followup.send("[提示] 無變更", ephemeral=True)
+            return
+
+        self.manager.update_settings(guild_id, {"invite_allowlist": current})
+        embed = discord.Embed(
+            title="[設定] 邀請白名單已更新",
+            description=change,
+            color=discord.Color.from_rgb(46, 204, 113),
+        )
+        await interaction.followup.send(embed=embed)
+
+    @anti_spam_group.command(name="domains", description="管理網域允許/封鎖清單")
+    @app_commands.describe(
+        list_type="allow (允許) 或 deny (封鎖)",
+        mode="add、remove 或 list",
+        entries="網域，多個以逗號分隔 (*.example.com 涵蓋所有子網域)",
+        action="命中封鎖網域時的動作",
+    )
+    async def domains_cmd(
+        self,
+        interaction: discord.Interaction,
+        list_type: str,
+        mode: str,
+        entries: str = "",
+        action: str = None,
+    ):
+        """管理網域允許/封鎖清單"""
+        if list_type not in ("allow", "deny"):
+            await interaction.response.send_message(
+                "[失敗] list_type 必須為 allow 或 deny", ephemeral=True
+            )
+            return
+        if mode not in ("add", "remove", "list"):
+            await interaction.response.send_message(
+                "[失敗] mode 必須為 add、remove 或 list", ephemeral=True
+            )
+            return
+        if action is not None and action not in VALID_ACTIONS:
+            await interaction.response.send_message(
+                f"[失敗] 無效動作，可選: {', '.join(VALID_ACTIONS)}", ephemeral=True
+            )
+            return
+
+        rules = [e.strip() for e in entries.replace("，", ",").split(",") if e.strip()]
+        if mode != "list" and not rules:
+            await interaction.response.send_message(
+                "[失敗] 請提供至少一個網域", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer()
+        guild_id = interaction.guild_id
+        key = f"domain_{list_type}"
+        label = "允許" if list_type == "allow" else "封鎖"
+        if action is not None:
+            self.manager.update_settings(guild_id, {"domain_action": action})
+
+        if mode == "list":
+            current = self.manager.get_settings(guild_id).get(key, [])
+            listing = "\n".join(f"`{r}`" for r in current) or "無"
+            embed = discord.Embed(
+                title=f"[查詢] {label}網域 ({len(current)} 個)",
+                description=listing[:4000],
+                color=discord.Color.from_rgb(52, 152, 219),
+            )
+            s = self.manager.get_settings(guild_id)
+            embed.set_footer(
+                text=f"封鎖動作: {ACTION_NAMES.get(s.get('domain_action'), s.get('domain_action'))}"
+                f" | 全域清單: {len(self.manager.global_denylist)} 個網域"
+            )
+            await interaction.followup.send(embed=embed)
+            return
+
+        if mode == "add":
+            changed = self.manager.update_domain_rules(guild_id, key, add=rules)
+        else:
+            changed = self.manager.update_domain_rules(guild_id, key, remove=rules)
+
+        if not changed:
+            await interaction.followup.send("[提示] 無變更", ephemeral=True)
+            return
+
+        verb = "新增" if mode == "add" else "移除"
+        embed = discord.Embed(
+            title=f"[設定] {label}網域已{verb}",
+            description=", ".join(f"`{r}`" for r in changed)[:4000],
+            color=discord.Color.from_rgb(46, 204, 113),
+        )
+        await interaction.followup.send(embed=embed)
+
     @anti_spam_group.command(name="whitelist", description="管理白名單")
     @app_commands.describe(
         action="add 或 remove",
@@ -522,28 +945,36 @@ class AntiSpam(commands.Cog):
 
         await interaction.response.defer()
         s = self.manager.get_settings(interaction.guild_id)
+        # 複製清單後整體更新，確保設定被儲存且編譯快取重建
+        roles = list(s["whitelisted_roles"])
+        channels = list(s["whitelisted_channels"])
         changes = []
 
         if role:
-            if action == "add" and role.id not in s["whitelisted_roles"]:
-                s["whitelisted_roles"].append(role.id)
+            if action == "add" and role.id not in roles:
+                roles.append(role.id)
                 changes.append(f"新增角色白名單: {role.mention}")
-            elif action == "remove" and role.id in s["whitelisted_roles"]:
-                s["whitelisted_roles"].remove(role.id)
+            elif action == "remove" and role.id in roles:
+                roles.remove(role.id)
                 changes.append(f"移除角色白名單: {role.mention}")
 
         if channel:
-            if action == "add" and channel.id not in s["whitelisted_channels"]:
-                s["whitelisted_channels"].append(channel.id)
+            if action == "add" and channel.id not in channels:
+                channels.append(channel.id)
                 changes.append(f"新增頻道白名單: {channel.mention}")
-            elif action == "remove" and channel.id in s["whitelisted_channels"]:
-                s["whitelisted_channels"].remove(channel.id)
+            elif action == "remove" and channel.id in channels:
+                channels.remove(channel.id)
                 changes.append(f"移除頻道白名單: {channel.mention}")
 
         if not changes:
             await interaction.followup.send("[提示] 無變更", ephemeral=True)
             return
 
+        self.manager.update_settings(interaction.guild_id, {
+            "whitelisted_roles": roles,
+            "whitelisted_channels": channels,
+        })
+
         embed = discord.Embed(
             title="[設定] 白名單已更新",
             description="\n".join(changes),
@@ -551,6 +982,169 @@ class AntiSpam(commands.Cog):
         )
         await interaction.followup.send(embed=embed)
 
+    @anti_spam_group.command(name="wordfilter", description="設定違禁詞彙過濾")
+    @app_commands.describe(
+        enabled="是否啟用",
+        action="觸發動作",
+    )
+    async def wordfilter_cmd(
+        self,
+        interaction: discord.Interaction,
+        enabled: bool = True,
+        action: str = "delete",
+    ):
+        """設定違禁詞過濾"""
+        if action not in VALID_ACTIONS:
+            await interaction.response.send_message(
+                f"[失敗] 無效動作，可選: {', '.join(VALID_ACTIONS)}", ephemeral=True
+            )
+            return
+        await interaction.response.defer()
+        self.manager.update_settings(interaction.guild_id, {
+            "wordfilter_enabled": enabled,
+            "wordfilter_action": action,
+        })
+        status = "啟用" if enabled else "禁用"
+        word_count = len(self.manager.get_word_filter(interaction.guild_id))
+        embed = discord.Embed(
+            title=f"[設定] 違禁詞過濾 — {status}",
+            color=discord.Color.from_rgb(46, 204, 113),
+        )
+        embed.add_field(name="詞彙數量", value=f"{word_count} 個", inline=True)
+        embed.add_field(name="動作", value=ACTION_NAMES.get(action, action), inline=True)
+        await interaction.followup.send(embed=embed)
+
+    @anti_spam_group.command(name="wordfilter_words", description="管理違禁詞清單")
+    @app_commands.describe(
+        mode="add、remove 或 list",
+        phrases="詞彙，多個以逗號分隔",
+    )
+    async def wordfilter_words_cmd(
+        self,
+        interaction: discord.Interaction,
+        mode: str,
+        phrases: str = "",
+    ):
+        """新增/移除/列出違禁詞"""
+        if mode not in ("add", "remove", "list"):
+            await interaction.response.send_message(
+                "[失敗] mode 必須為 add、remove 或 list", ephemeral=True
+            )
+            return
+
+        words = [p.strip() for p in phrases.replace("，", ",").split(",") if p.strip()]
+        if mode != "list" and not words:
+            await interaction.response.send_message(
+                "[失敗] 請提供至少一個詞彙", ephemeral=True
+            )
+            return
+
+        # 詞彙清單屬敏感內容，僅回覆給管理員本人
+        await interaction.response.defer(ephemeral=True)
+        guild_id = interaction.guild_id
+
+        if mode == "list":
+            current = self.manager.get_settings(guild_id).get("wordfilter_words", [])
+            listing = ", ".join(f"`{w}`" for w in current) or "無"
+            embed = discord.Embed(
+                title=f"[查詢] 違禁詞清單 ({len(current)} 個)",
+                description=listing[:4000],
+                color=discord.Color.from_rgb(52, 152, 219),
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            return
+
+        if mode == "add":
+            changed = self.manager.add_filter_words(guild_id, words)
+            title = "[設定] 違禁詞已新增"
+        else:
+            changed = self.manager.remove_filter_words(guild_id, words)
+            title = "[設定] 違禁詞已移除"
+
+        if not changed:
+            await interaction.followup.send("[提示] 無變更", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title=title,
+            description=", ".join(f"`{w}`" for w in changed)[:4000],
+            color=discord.Color.from_rgb(46, 204, 113),
+        )
+        embed.set_footer(
+            text=f"目前共 {len(self.manager.get_word_filter(guild_id))} 個詞彙"
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @anti_spam_group.command(name="lockdown_on", description="手動啟用封鎖模式")
+    @app_commands.describe(
+        mode="channels (逐頻道覆寫) 或 role (切換 @everyone 權限，單次呼叫)",
+    )
+    async def lockdown_on_cmd(
+        self, interaction: discord.Interaction, mode: str = None
+    ):
+        """手動啟用封鎖模式"""
+        if mode is not None and mode not in VALID_LOCKDOWN_MODES:
+            await interaction.response.send_message(
+                f"[失敗] 無效模式，可選: {', '.join(VALID_LOCKDOWN_MODES)}", ephemeral=True
+            )
+            return
+        if self.manager.is_lockdown(interaction.guild_id):
+            await interaction.response.send_message(
+                "[提示] 目前已處於封鎖模式", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer()
+        result = await self._activate_lockdown(
+            interaction.guild,
+            on_progress=self._progress_reporter(interaction, "封鎖中"),
+            mode=mode,
+        )
+        if result is None:
+            await interaction.followup.send("[提示] 目前已處於封鎖模式", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title="[成功] 封鎖模式已啟用",
+            description=f"已修改 {result['done']}/{result['total']} 項權限",
+            color=discord.Color.from_rgb(231, 76, 60),
+        )
+        if result["failed"]:
+            embed.add_field(name="失敗", value=f"{result['failed']} 項", inline=True)
+        await interaction.edit_original_response(content=None, embed=embed)
+
+        await self._send_log(interaction.guild_id, discord.Embed(
+            title="[防炸群] 封鎖模式已手動啟用",
+            description=f"由 {interaction.user.mention} 啟用",
+            color=discord.Color.from_rgb(231, 76, 60),
+        ))
+
+    @anti_spam_group.command(name="lockdown_mode", description="設定封鎖模式的執行方式")
+    @app_commands.describe(
+        mode="channels (逐頻道覆寫，可精確還原) 或 role (切換 @everyone 權限，最快)",
+    )
+    async def lockdown_mode_cmd(self, interaction: discord.Interaction, mode: str):
+        """設定封鎖方式"""
+        if mode not in VALID_LOCKDOWN_MODES:
+            await interaction.response.send_message(
+                f"[失敗] 無效模式，可選: {', '.join(VALID_LOCKDOWN_MODES)}", ephemeral=True
+            )
+            return
+        await interaction.response.defer()
+        self.manager.update_settings(interaction.guild_id, {"lockdown_mode": mode})
+        embed = discord.Embed(
+            title="[設定] 封鎖方式已更新",
+            description=f"封鎖方式: **{mode}**",
+            color=discord.Color.from_rgb(46, 204, 113),
+        )
+        if mode == "role":
+            embed.add_field(
+                name="注意",
+                value="頻道中明確允許 @everyone 發言的覆寫不受角色權限影響",
+                inline=False,
+            )
+        await interaction.followup.send(embed=embed)
+
     @anti_spam_group.command(name="lockdown_off", description="解除封鎖模式")
     async def lockdown_off_cmd(self, interaction: discord.Interaction):
         """手動解除封鎖模式"""
@@ -561,14 +1155,29 @@ class AntiSpam(commands.Cog):
             return
 
         await interaction.response.defer()
-        await self._deactivate_lockdown(interaction.guild)
+        result = await self._deactivate_lockdown(
+            interaction.guild,
+            on_progress=self._progress_reporter(interaction, "還原中"),
+        )
+
+        if result["failed"]:
+            embed = discord.Embed(
+                title="[失敗] 部分頻道權限未能還原",
+                description=(
+                    f"已還原 {result['done']}/{result['total']} 項權限\n"
+                    "快照已保留，可再次執行此指令重試"
+                ),
+                color=discord.Color.from_rgb(231, 76, 60),
+            )
+            await interaction.edit_original_response(content=None, embed=embed)
+            return
 
         embed = discord.Embed(
             title="[成功] 封鎖模式已解除",
-            description="所有頻道的發言權限已恢復",
+            description="所有頻道的發言權限已恢復為封鎖前的設定",
             color=discord.Color.from_rgb(46, 204, 113),
         )
-        await interaction.followup.send(embed=embed)
+        await interaction.edit_original_response(content=None, embed=embed)
 
         await self._send_log(interaction.guild_id, discord.Embed(
             title="[防炸群] 封鎖模式已手動解除",
@@ -576,6 +1185,70 @@ class AntiSpam(commands.Cog):
             color=discord.Color.from_rgb(46, 204, 113),
         ))
 
+    @anti_spam_group.command(name="raid_cohort", description="查看或批次處理近期突襲的可疑帳號")
+    @app_commands.describe(
+        action="list (僅列出)、mute、kick 或 ban",
+        include_all="是否包含未被標記為可疑的加入者",
+    )
+    async def raid_cohort_cmd(
+        self,
+        interaction: discord.Interaction,
+        action: str = "list",
+        include_all: bool = False,
+    ):
+        """查看或批次處理突襲可疑帳號"""
+        if action != "list" and action not in RAID_COHORT_ACTIONS:
+            await interaction.response.send_message(
+                "[失敗] action 必須為 list、mute、kick 或 ban", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer()
+        guild = interaction.guild
+        cohort = self.manager.get_raid_cohort(guild.id, include_all=include_all)
+        if not cohort:
+            await interaction.followup.send("[提示] 目前沒有需要處理的可疑帳號")
+            return
+
+        if action == "list":
+            lines = [f"<@{r.user_id}> — {r.describe()} (分數 {r.score:.1f})" for r in cohort[:25]]
+            if len(cohort) > 25:
+                lines.append(f"...等共 {len(cohort)} 人")
+            embed = discord.Embed(
+                title=f"[查詢] 突襲可疑帳號 ({len(cohort)} 人)",
+                description="\n".join(lines),
+                color=discord.Color.from_rgb(52, 152, 219),
+            )
+            await interaction.followup.send(embed=embed)
+            return
+
+        result = await self._act_on_cohort(
+            guild,
+            cohort,
+            action,
+            f"防炸群: 突襲批次處理 (由 {interaction.user} 執行)",
+        )
+        embed = discord.Embed(
+            title="[成功] 突襲帳號已批次處理",
+            description=(
+                f"動作: **{ACTION_NAMES.get(action, action)}**\n"
+                f"已處理 {result['done']}/{result['total']} 人"
+            ),
+            color=discord.Color.from_rgb(46, 204, 113),
+        )
+        if result["failed"]:
+            embed.add_field(name="失敗", value=f"{result['failed']} 人", inline=True)
+        await interaction.followup.send(embed=embed)
+
+        await self._send_log(guild.id, discord.Embed(
+            title="[防炸群] 突襲帳號已批次處理",
+            description=(
+                f"由 {interaction.user.mention} 執行 "
+                f"**{ACTION_NAMES.get(action, action)}**，共 {result['done']} 人"
+            ),
+            color=discord.Color.from_rgb(231, 76, 60),
+        ))
+
     @anti_spam_group.command(name="status", description="查看防炸群系統完整狀態")
     async def status_cmd(self, interaction: discord.Interaction):
         """顯示完整防炸群設定狀態"""
@@ -619,7 +1292,7 @@ class AntiSpam(commands.Cog):
         inv = "是" if s["invite_auto_delete"] else "否"
         embed.add_field(
             name=f"連結轟炸 [{link_st}]",
-            value=f"{s['link_limit']} 個 / {s['link_window']}s → {ACTION_NAMES.get(s['link_action'])}\n自動刪除邀請: {inv}",
+            value=f"{s['link_limit']} 個 / {s['link_window']}s → {ACTION_NAMES.get(s['link_action'])}\n自動刪除邀請: {inv} (允許 {len(s.get('invite_allowlist', []))} 個合作伺服器)",
             inline=True,
         )
 
@@ -643,7 +1316,40 @@ class AntiSpam(commands.Cog):
         raid_st = "開" if s["raid_enabled"] else "關"
         embed.add_field(
             name=f"突襲偵測 [{raid_st}]",
-            value=f"{s['raid_joins']} 人 / {s['raid_window']}s → {ACTION_NAMES.get(s['raid_action'])}",
+            value=f"{s['raid_joins']} 分 / {s['raid_window']}s → {ACTION_NAMES.get(s['raid_action'])}\n封鎖方式: {s.get('lockdown_mode', 'channels')}",
+            inline=True,
+        )
+
+        # 自動慢速模式
+        sm_st = "開" if s.get("slowmode_enabled") else "關"
+        sm_levels = self.manager.get_compiled(interaction.guild_id).slowmode_levels
+        embed.add_field(
+            name=f"自動慢速 [{sm_st}]",
+            value=", ".join(f"{rate}/分→{delay}s" for rate, delay in sm_levels),
+            inline=True,
+        )
+
+        # 違禁詞
+        wf_st = "開" if s.get("wordfilter_enabled") else "關"
+        wf_action = s.get("wordfilter_action", ACTION_DELETE)
+        embed.add_field(
+            name=f"違禁詞彙 [{wf_st}]",
+            value=f"{len(s.get('wordfilter_words', []))} 個詞彙 → {ACTION_NAMES.get(wf_action)}",
+            inline=True,
+        )
+
+        # 網域信譽
+        dom_st = "開" if s.get("domain_enabled", True) else "關"
+        dom_action = s.get("domain_action", ACTION_DELETE)
+        global_count = (
+            len(self.manager.global_denylist) if s.get("domain_global_denylist", True) else 0
+        )
+        embed.add_field(
+            name=f"網域信譽 [{dom_st}]",
+            value=(
+                f"允許 {len(s.get('domain_allow', []))} / 封鎖 {len(s.get('domain_deny', []))}"
+                f" + 全域 {global_count} → {ACTION_NAMES.get(dom_action)}"
+            ),
             inline=True,
         )
 
@@ -664,7 +1370,12 @@ class AntiSpam(commands.Cog):
             inline=False,
         )
 
-        embed.set_footer(text=f"禁言時長: {s['mute_duration']}s | 封禁刪除天數: {s['ban_delete_days']}d")
+        embed.set_footer(
+            text=(
+                f"禁言時長: {s['mute_duration']}s | 封禁刪除天數: {s['ban_delete_days']}d"
+                f" | 速率模式: {s.get('rate_mode', 'window')}"
+            )
+        )
 
         await interaction.followup.send(embed=embed)
 
@@ -1,7 +1,6 @@
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
-import json
 import os
 from typing import Optional
 
@@ -13,6 +12,13 @@ from discord.ext import tasks
 
 from src.utils.github_manager import get_github_manager
 from src.utils.github_manager import init_github_manager
+from src.utils.json_store import get_json_store
+from src.utils.load_shedder import feature_allowed
+from src.utils.load_shedder import PRIORITY_COSMETIC
+from src.utils.tiered_cache import get_tiered_cache
+
+# 最新 commit 的快取秒數 (多個伺服器監看同一 repo 時共用一次查詢)
+COMMITS_CACHE_TTL = 60
 
 # UTC+8 時區
 TZ_OFFSET = timezone(timedelta(hours=8))
@@ -36,7 +42,8 @@ class GithubWatch(commands.Cog):
         self.data_file = "data/storage/github_watch.json"
         os.makedirs("data/storage", exist_ok=True)
 
-        self._config = self._load_config()
+        self._store = get_json_store(self.data_file)
+        self._config = self._store.data
         self._session: aiohttp.ClientSession | None = None
 
         self._poll_task.start()
@@ -44,18 +51,8 @@ class GithubWatch(commands.Cog):
     def cog_unload(self):
         self._poll_task.cancel()
 
-    def _load_config(self) -> dict:
-        if not os.path.exists(self.data_file):
-            return {}
-        try:
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-
     def _save_config(self):
-        with open(self.data_file, "w", encoding="utf-8") as f:
-            json.dump(self._config, f, ensure_ascii=False, indent=2)
+        self._store.set(self._config)
 
     def _get_guild_cfg(self, guild_id: int) -> Optional[dict]:
         return self._config.get(str(guild_id))
@@ -68,7 +65,11 @@ class GithubWatch(commands.Cog):
         github_manager = await self._ensure_session()
 
         try:
-            commits = await github_manager.get_commits(owner, repo, per_page=1)
+            commits = await get_tiered_cache().get_or_load(
+                f"github:commits:{owner}/{repo}".lower(),
+                lambda: github_manager.get_commits(owner, repo, per_page=1),
+                ttl=COMMITS_CACHE_TTL,
+            )
 
             # 304 Not Modified — 無變更
             if commits is None:
@@ -155,6 +156,9 @@ class GithubWatch(commands.Cog):
 
     @tasks.loop(minutes=2)
     async def _poll_task(self):
+        # 負載過高時暫停輪詢 (裝飾性功能)
+        if not feature_allowed(PRIORITY_COSMETIC):
+            return
         for guild_key, cfg in list(self._config.items()):
             try:
                 enabled = cfg.get("enabled", False)
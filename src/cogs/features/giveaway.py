@@ -1,5 +1,4 @@
 import asyncio
-import json
 import os
 import random
 from datetime import datetime
@@ -14,6 +13,8 @@ from discord import ui
 from discord.ext import commands
 from discord.ext import tasks
 
+from src.utils.json_store import get_json_store
+
 # UTC+8 時區
 TZ_OFFSET = timezone(timedelta(hours=8))
 
@@ -31,34 +32,18 @@ GIVEAWAY_EMOJI = "\U0001f389"  # 🎉
 # 全域鎖：防止並發讀寫競態條件
 _giveaway_lock = asyncio.Lock()
 
-# 記憶體快取
-_giveaway_cache: Optional[dict] = None
+# 記憶體副本 + 延遲寫回
+_giveaway_store = get_json_store(GIVEAWAY_FILE)
 
 
 def _load_giveaways() -> dict:
-    """載入抽獎資料 (優先讀取快取)"""
-    global _giveaway_cache
-    if _giveaway_cache is not None:
-        return _giveaway_cache
-
-    if os.path.exists(GIVEAWAY_FILE):
-        try:
-            with open(GIVEAWAY_FILE, "r", encoding="utf-8") as f:
-                _giveaway_cache = json.load(f)
-                return _giveaway_cache
-        except (json.JSONDecodeError, OSError):
-            pass
-    _giveaway_cache = {}
-    return _giveaway_cache
+    """載入抽獎資料 (記憶體副本)"""
+    return _giveaway_store.data
 
 
 def _save_giveaways(data: dict):
-    """儲存抽獎資料並更新快取"""
-    global _giveaway_cache
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(GIVEAWAY_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    _giveaway_cache = data
+    """儲存抽獎資料 (延遲寫入磁碟)"""
+    _giveaway_store.set(data)
 
 
 class GiveawayView(ui.View):
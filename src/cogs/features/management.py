@@ -2,9 +2,7 @@ import asyncio
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
-import json
 import os
-import shutil
 from typing import Any, Dict, Optional
 
 import aiohttp
@@ -13,6 +11,8 @@ from discord import app_commands
 from discord.ext import commands
 from discord.ext import tasks
 
+from src.utils.json_store import get_json_store
+
 # UTC+8 時區
 TZ_OFFSET = timezone(timedelta(hours=8))
 
@@ -31,7 +31,8 @@ class Management(commands.Cog):
         self.data_file = "data/storage/management.json"
         os.makedirs("data/storage", exist_ok=True)
 
-        self._config = self._load_config()
+        self._store = get_json_store(self.data_file, backup=True)
+        self._config = self._store.data
         self._session: aiohttp.ClientSession | None = None
 
         self._repo_poll_task.start()
@@ -39,34 +40,9 @@ class Management(commands.Cog):
     def cog_unload(self):
         self._repo_poll_task.cancel()
 
-    def _load_config(self) -> dict:
-        if not os.path.exists(self.data_file):
-            return {}
-        try:
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-
     def _save_config(self):
-        """Save configuration with backup mechanism"""
-        try:
-            # Create backup before saving
-            if os.path.exists(self.data_file):
-                backup_file = f"{self.data_file}.backup"
-                shutil.copy2(self.data_file, backup_file)
-
-            # Save main config
-            with open(self.data_file, "w", encoding="utf-8") as f:
-                json.dump(self._config, f, ensure_ascii=False, indent=2)
-
-        except Exception as e:
-            print(f"儲存設定失敗: {e}")
-            # 嘗試從備份還原
-            backup_file = f"{self.data_file}.backup"
-            if os.path.exists(backup_file):
-                print("正在從備份還原...")
-                shutil.copy2(backup_file, self.data_file)
+        """Save configuration (debounced, atomic replace with backup)"""
+        self._store.set(self._config)
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create HTTP session with timeout and retry logic"""
@@ -1,5 +1,5 @@
+import asyncio
 from datetime import datetime
-import json
 import os
 from typing import Optional
 
@@ -7,10 +7,12 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
-try:
-    from ossapi import Ossapi
-except Exception:
-    Ossapi = None
+from src.utils.json_store import get_json_store
+from src.utils.tiered_cache import get_tiered_cache
+
+# 查詢結果快取秒數 (ossapi 物件無法序列化，只存在記憶體層)
+USER_CACHE_TTL = 300
+SCORES_CACHE_TTL = 60
 
 
 class OsuInfo(commands.Cog):
@@ -23,17 +25,46 @@ class OsuInfo(commands.Cog):
         self.data_file = "data/storage/osu_links.json"
         os.makedirs("data/storage", exist_ok=True)
 
-        client_id = os.getenv("OSU_CLIENT_ID")
-        client_secret = os.getenv("OSU_CLIENT_SECRET")
-        self.api = None
+        self._client_id = os.getenv("OSU_CLIENT_ID")
+        self._client_secret = os.getenv("OSU_CLIENT_SECRET")
+        self._api = None
         self._api_error = None
-        if Ossapi is None:
-            self._api_error = "ossapi 套件無法載入，osu! 功能已禁用"
-        elif not client_id or not client_secret:
+        if not self._client_id or not self._client_secret:
             self._api_error = "缺少 OSU_CLIENT_ID 或 OSU_CLIENT_SECRET 環境變數"
-        else:
-            self.api = Ossapi(int(client_id), client_secret)
-        self._links = self._load_links()
+        self._store = get_json_store(self.data_file)
+        self._links = self._store.data
+
+    @property
+    def api(self):
+        """osu! API 客戶端 (首次使用時才載入 ossapi，避免拖慢啟動)"""
+        if self._api is None and self._api_error is None:
+            try:
+                from ossapi import Ossapi
+            except Exception:
+                self._api_error = "ossapi 套件無法載入，osu! 功能已禁用"
+                return None
+            self._api = Ossapi(int(self._client_id), self._client_secret)
+        return self._api
+
+    async def _fetch_user(self, username: str):
+        """查詢 osu! 用戶 (ossapi 為同步呼叫，於執行緒中執行並快取結果)"""
+        return await get_tiered_cache().get_or_load(
+            f"osu:user:{username.lower()}",
+            lambda: asyncio.to_thread(self.api.user, username),
+            ttl=USER_CACHE_TTL,
+            persist=False,
+        )
+
+    async def _fetch_scores(self, user_id: int, score_type: str, limit: int):
+        """查詢用戶成績 (同上)"""
+        return await get_tiered_cache().get_or_load(
+            f"osu:scores:{user_id}:{score_type}:{limit}",
+            lambda: asyncio.to_thread(
+                self.api.user_scores, user_id, type=score_type, limit=limit
+            ),
+            ttl=SCORES_CACHE_TTL,
+            persist=False,
+        )
 
     def _ensure_api(self):
         if self.api is None:
@@ -51,7 +82,7 @@ class OsuInfo(commands.Cog):
             self._ensure_api()
 
             # 抓取玩家資料
-            user = self.api.user(username)
+            user = await self._fetch_user(username)
 
             # 創建嵌入消息
             embed = discord.Embed(
@@ -134,7 +165,7 @@ class OsuInfo(commands.Cog):
 
             self._ensure_api()
 
-            osu_user = self.api.user(username)
+            osu_user = await self._fetch_user(username)
             self._links[str(interaction.user.id)] = {
                 "username": osu_user.username,
                 "osu_user_id": osu_user.id,
@@ -178,8 +209,8 @@ class OsuInfo(commands.Cog):
             limit = max(1, min(10, limit))
             username = self._resolve_username(interaction.user.id, username)
 
-            osu_user = self.api.user(username)
-            scores = self.api.user_scores(osu_user.id, type="best", limit=limit)
+            osu_user = await self._fetch_user(username)
+            scores = await self._fetch_scores(osu_user.id, "best", limit)
 
             embed = discord.Embed(
                 title=f"osu! BP - {osu_user.username}",
@@ -216,8 +247,8 @@ class OsuInfo(commands.Cog):
             limit = max(1, min(10, limit))
             username = self._resolve_username(interaction.user.id, username)
 
-            osu_user = self.api.user(username)
-            scores = self.api.user_scores(osu_user.id, type="recent", limit=limit)
+            osu_user = await self._fetch_user(username)
+            scores = await self._fetch_scores(osu_user.id, "recent", limit)
 
             embed = discord.Embed(
                 title=f"osu! 最近遊玩 - {osu_user.username}",
@@ -270,18 +301,8 @@ class OsuInfo(commands.Cog):
         else:
             return f"{hours} 小時"
 
-    def _load_links(self) -> dict:
-        if not os.path.exists(self.data_file):
-            return {}
-        try:
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-
     def _save_links(self, data: dict):
-        with open(self.data_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        self._store.set(data)
 
     def get_bound_osu_username(self, discord_user_id: int) -> Optional[str]:
         bound = self._links.get(str(discord_user_id))
@@ -1,16 +1,16 @@
 import asyncio
-import json
 import os
 import time
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
-from typing import Optional
 
 import discord
 from discord import ui
 from discord.ext import commands
 
+from src.utils.json_store import get_json_store
+
 # UTC+8 時區
 TZ_OFFSET = timezone(timedelta(hours=8))
 
@@ -22,35 +22,19 @@ DATA_DIR = os.path.join(
 )
 TICKET_FILE = os.path.join(DATA_DIR, "tickets.json")
 
-# 全域鎖 + 快取
+# 全域鎖 + 記憶體副本 (延遲寫回)
 _ticket_lock = asyncio.Lock()
-_ticket_cache: Optional[dict] = None
+_ticket_store = get_json_store(TICKET_FILE, default=lambda: {"guilds": {}, "tickets": {}})
 
 
 def _load_tickets() -> dict:
-    """載入工單資料 (帶記憶體快取)"""
-    global _ticket_cache
-    if _ticket_cache is not None:
-        return _ticket_cache
-
-    if os.path.exists(TICKET_FILE):
-        try:
-            with open(TICKET_FILE, "r", encoding="utf-8") as f:
-                _ticket_cache = json.load(f)
-                return _ticket_cache
-        except (json.JSONDecodeError, OSError):
-            pass
-    _ticket_cache = {"guilds": {}, "tickets": {}}
-    return _ticket_cache
+    """載入工單資料 (記憶體副本)"""
+    return _ticket_store.data
 
 
 def _save_tickets(data: dict):
-    """儲存工單資料並更新快取"""
-    global _ticket_cache
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(TICKET_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    _ticket_cache = data
+    """儲存工單資料 (延遲寫入磁碟)"""
+    _ticket_store.set(data)
 
 
 class CloseReasonModal(ui.Modal, title="關閉工單"):
@@ -1,7 +1,6 @@
 import logging
 
 import discord
-from deep_translator import GoogleTranslator
 from discord import app_commands
 from discord.ext import commands
 
@@ -51,6 +50,9 @@ class LanguageSelect(discord.ui.Select):
         await interaction.response.defer(ephemeral=True)
 
         try:
+            # 首次翻譯時才載入 (約 100ms，避免拖慢啟動)
+            from deep_translator import GoogleTranslator
+
             translator = GoogleTranslator(source="auto", target=target_lang)
             translated = translator.translate(self.original_text)
         except Exception as e:
@@ -13,6 +13,7 @@ from .utils.database_manager import get_database_manager
 from .utils.database_manager import init_database_manager
 from .utils.network_optimizer import init_network_optimizer
 from .utils.network_optimizer import NetworkConfig
+from .utils.tiered_cache import init_tiered_cache
 
 # Load environment variables
 load_dotenv()
@@ -29,6 +30,7 @@ async def initialize_optimizations():
     """初始化所有優化模組"""
     print("[Init] 初始化數據庫管理器...")
     init_database_manager()
+    init_tiered_cache()
 
     print("[Init] 初始化配置優化器...")
     init_config_manager()
@@ -88,8 +90,14 @@ def main():
     # 建立並運行機器人
     bot = Bot()
 
-    # 初始化所有優化
+    # 初始化所有優化 (READY 在每次重新連線後都會觸發，只初始化一次)
+    initialized = False
+
     async def on_ready():
+        nonlocal initialized
+        if initialized:
+            return
+        initialized = True
         await initialize_optimizations()
         print("[資訊] 機器人和優化模組已就緒")
 
@@ -0,0 +1,249 @@
+import asyncio
+from collections import OrderedDict
+from collections import deque
+import time
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Iterable
+from typing import Set
+from typing import Tuple
+
+import discord
+
+# Discord 批次刪除一次最多 100 則訊息
+BULK_DELETE_LIMIT = 100
+
+
+class ModerationExecutor:
+    """防炸群懲罰執行器 — 合併同一用戶的重複動作，並將刪除訊息合併為批次刪除"""
+
+    def __init__(
+        self,
+        dedupe_window: float = 10.0,
+        purge_delay: float = 0.5,
+        track_per_user: int = 15,
+        max_tracked_users: int = 5000,
+    ):
+        """
+        初始化執行器
+
+        Args:
+            dedupe_window: 同一 (伺服器, 用戶, 動作) 在此秒數內只執行一次
+            purge_delay: 刪除請求的合併等待時間 (秒)
+            track_per_user: 每位用戶追蹤的最近訊息數 (取代 purge 的 limit)
+            max_tracked_users: 追蹤訊息的用戶上限 (LRU 淘汰)
+        """
+        self.dedupe_window = dedupe_window
+        self.purge_delay = purge_delay
+        self.track_per_user = track_per_user
+        self.max_tracked_users = max_tracked_users
+
+        # {(guild_id, user_id, action): Task} — 執行中的動作
+        self._in_flight: Dict[Tuple[int, int, str], asyncio.Task] = {}
+        # {(guild_id, user_id, action): monotonic} — 最近完成的動作
+        self._done: Dict[Tuple[int, int, str], float] = {}
+        # {(guild_id, user_id): monotonic} — 已踢出/封禁的用戶
+        self._removed: Dict[Tuple[int, int], float] = {}
+        # {(guild_id, user_id): deque[(channel_id, message_id)]} — 最近訊息
+        self._recent_messages: "OrderedDict[Tuple[int, int], Deque[Tuple[int, int]]]" = (
+            OrderedDict()
+        )
+        # {channel_id: channel} — 追蹤中或待刪除訊息所屬頻道
+        self._channels: Dict[int, discord.abc.Messageable] = {}
+        # {channel_id: 數量} — 追蹤中的訊息數 (歸零且無待刪除時移除頻道)
+        self._channel_refs: Dict[int, int] = {}
+        # {channel_id: {message_id}} — 待批次刪除的訊息
+        self._pending_deletes: Dict[int, Set[int]] = {}
+        # {channel_id: Task} — 已排程的批次刪除
+        self._flush_tasks: Dict[int, asyncio.Task] = {}
+
+        self.stats = {
+            "executed": 0,
+            "deduped": 0,
+            "deleted_messages": 0,
+            "delete_calls": 0,
+        }
+
+    # --- 訊息追蹤 ---
+
+    def track_message(self, message: discord.Message):
+        """記錄用戶最近訊息，供之後直接以 ID 批次刪除"""
+        key = (message.guild.id, message.author.id)
+        log = self._recent_messages.get(key)
+        if log is None:
+            log = deque(maxlen=self.track_per_user)
+            self._recent_messages[key] = log
+            if len(self._recent_messages) > self.max_tracked_users:
+                _, evicted = self._recent_messages.popitem(last=False)
+                self._release(evicted)
+        else:
+            self._recent_messages.move_to_end(key)
+            if len(log) == log.maxlen:
+                self._release((log[0],))
+        channel_id = message.channel.id
+        log.append((channel_id, message.id))
+        self._channels[channel_id] = message.channel
+        self._channel_refs[channel_id] = self._channel_refs.get(channel_id, 0) + 1
+
+    def forget_user(self, guild_id: int, user_id: int):
+        """清除用戶的訊息追蹤"""
+        log = self._recent_messages.pop((guild_id, user_id), None)
+        if log:
+            self._release(log)
+
+    def _release(self, entries: Iterable[Tuple[int, int]]):
+        """減少頻道參照，閒置頻道 (無追蹤訊息且無待刪除) 即移除"""
+        for channel_id, _ in entries:
+            refs = self._channel_refs.get(channel_id, 0) - 1
+            if refs > 0:
+                self._channel_refs[channel_id] = refs
+                continue
+            self._channel_refs.pop(channel_id, None)
+            self._evict_if_idle(channel_id)
+
+    def _evict_if_idle(self, channel_id: int):
+        if (
+            channel_id not in self._channel_refs
+            and channel_id not in self._pending_deletes
+            and channel_id not in self._flush_tasks
+        ):
+            self._channels.pop(channel_id, None)
+
+    # --- 去重 ---
+
+    def is_removed(self, guild_id: int, user_id: int) -> bool:
+        """用戶是否剛被踢出/封禁 (後續動作皆可略過)"""
+        ts = self._removed.get((guild_id, user_id))
+        return ts is not None and time.monotonic() - ts < self.dedupe_window
+
+    def mark_removed(self, guild_id: int, user_id: int):
+        """標記用戶已被踢出/封禁"""
+        self._removed[(guild_id, user_id)] = time.monotonic()
+        self.forget_user(guild_id, user_id)
+
+    def claim(self, guild_id: int, user_id: int, action: str) -> bool:
+        """
+        取得動作執行權
+
+        Returns:
+            True 表示應執行；False 表示相同動作正在執行或剛執行過
+        """
+        key = (guild_id, user_id, action)
+        now = time.monotonic()
+        if self.is_removed(guild_id, user_id) or key in self._in_flight:
+            self.stats["deduped"] += 1
+            return False
+        done_at = self._done.get(key)
+        if done_at is not None and now - done_at < self.dedupe_window:
+            self.stats["deduped"] += 1
+            return False
+        self._done[key] = now
+        self._prune(now)
+        return True
+
+    async def execute(
+        self,
+        guild_id: int,
+        user_id: int,
+        action: str,
+        func: Callable[[], Awaitable[None]],
+    ) -> bool:
+        """
+        去重後執行動作
+
+        Returns:
+            是否實際執行 (被合併時回傳 False)
+        """
+        if not self.claim(guild_id, user_id, action):
+            return False
+
+        key = (guild_id, user_id, action)
+        task = asyncio.ensure_future(func())
+        self._in_flight[key] = task
+        try:
+            await task
+        finally:
+            self._in_flight.pop(key, None)
+            self._done[key] = time.monotonic()
+        self.stats["executed"] += 1
+        return True
+
+    def _prune(self, now: float):
+        """清理過期的去重紀錄"""
+        if len(self._done) < 4096 and len(self._removed) < 4096:
+            return
+        window = self.dedupe_window
+        self._done = {k: t for k, t in self._done.items() if now - t < window}
+        self._removed = {k: t for k, t in self._removed.items() if now - t < window}
+
+    # --- 批次刪除 ---
+
+    def purge_user(self, guild_id: int, user_id: int) -> int:
+        """將用戶最近追蹤到的訊息加入批次刪除，回傳排入數量"""
+        log = self._recent_messages.pop((guild_id, user_id), None)
+        if not log:
+            return 0
+        by_channel: Dict[int, Set[int]] = {}
+        for channel_id, message_id in log:
+            by_channel.setdefault(channel_id, set()).add(message_id)
+        for channel_id, ids in by_channel.items():
+            channel = self._channels.get(channel_id)
+            if channel is not None:
+                self.queue_delete(channel, ids)
+        self._release(log)
+        return len(log)
+
+    def queue_delete(self, channel: discord.abc.Messageable, message_ids: Iterable[int]):
+        """排入待刪除訊息，短暫等待後與同頻道其他請求合併為一次批次刪除"""
+        pending = self._pending_deletes.setdefault(channel.id, set())
+        pending.update(message_ids)
+        self._channels[channel.id] = channel
+        if channel.id not in self._flush_tasks:
+            self._flush_tasks[channel.id] = asyncio.ensure_future(
+                self._delayed_flush(channel.id)
+            )
+
+    async def _delayed_flush(self, channel_id: int):
+        """等待合併視窗後刪除該頻道所有待刪除訊息"""
+        try:
+            await asyncio.sleep(self.purge_delay)
+        finally:
+            self._flush_tasks.pop(channel_id, None)
+        await self.flush_channel(channel_id)
+
+    async def flush_channel(self, channel_id: int):
+        """立即刪除頻道中所有待刪除訊息"""
+        ids = self._pending_deletes.pop(channel_id, None)
+        channel = self._channels.get(channel_id)
+        if not ids or channel is None:
+            self._evict_if_idle(channel_id)
+            return
+
+        ordered = sorted(ids)
+        for i in range(0, len(ordered), BULK_DELETE_LIMIT):
+            chunk = [discord.Object(id=mid) for mid in ordered[i : i + BULK_DELETE_LIMIT]]
+            try:
+                await channel.delete_messages(chunk, reason="防炸群: 批次刪除")
+                self.stats["deleted_messages"] += len(chunk)
+            except discord.NotFound:
+                # 部分訊息已被刪除時批次請求會失敗，改逐一刪除
+                for obj in chunk:
+                    try:
+                        await channel.get_partial_message(obj.id).delete()
+                        self.stats["deleted_messages"] += 1
+                    except discord.HTTPException:
+                        pass
+            except discord.HTTPException:
+                pass
+            self.stats["delete_calls"] += 1
+        self._evict_if_idle(channel_id)
+
+    async def close(self):
+        """立即執行所有待處理的批次刪除"""
+        for task in list(self._flush_tasks.values()):
+            task.cancel()
+        self._flush_tasks.clear()
+        for channel_id in list(self._pending_deletes):
+            await self.flush_channel(channel_id)
@@ -1,11 +1,11 @@
-import json
-import os
 import re
 from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
 from typing import Dict
+from typing import FrozenSet
 from typing import List
 from typing import Optional
 from typing import Set
@@ -13,6 +13,18 @@ from typing import Tuple
 
 import discord
 
+from src.utils.auto_slowmode import DEFAULT_SLOWMODE_LEVELS
+from src.utils.domain_filter import DomainTrie
+from src.utils.domain_filter import extract_host
+from src.utils.domain_filter import GlobalDenylist
+from src.utils.domain_filter import normalize_rule
+from src.utils.json_store import get_json_store
+from src.utils.raid_scorer import JoinRecord
+from src.utils.raid_scorer import RaidScorer
+from src.utils.rate_estimator import EwmaCounter
+from src.utils.rate_estimator import prune_idle
+from src.utils.word_filter import AhoCorasick
+
 # UTC+8 時區
 TZ_OFFSET = timezone(timedelta(hours=8))
 
@@ -24,10 +36,13 @@ DETECT_LINK = "link"             # 連結/邀請轟炸
 DETECT_EMOJI = "emoji"           # 表情轟炸
 DETECT_NEWLINE = "newline"       # 換行轟炸
 DETECT_RAID = "raid"             # 加入突襲
+DETECT_WORDFILTER = "wordfilter" # 違禁詞彙
+DETECT_DOMAIN = "domain"         # 封鎖網域
 
 ALL_DETECTIONS = [
     DETECT_FLOOD, DETECT_DUPLICATE, DETECT_MENTION,
     DETECT_LINK, DETECT_EMOJI, DETECT_NEWLINE, DETECT_RAID,
+    DETECT_WORDFILTER, DETECT_DOMAIN,
 ]
 
 # --- 動作常數 (嚴重度由低到高) ---
@@ -49,9 +64,18 @@ ACTION_SEVERITY = {
 
 VALID_ACTIONS = list(ACTION_SEVERITY.keys())
 
+# --- 速率計算模式 ---
+RATE_MODE_WINDOW = "window"  # 保存視窗內所有時間戳 (精確)
+RATE_MODE_EWMA = "ewma"      # 指數加權估計 (每個實體固定記憶體)
+
+VALID_RATE_MODES = [RATE_MODE_WINDOW, RATE_MODE_EWMA]
+
+# EWMA 模式下每處理多少則訊息清理一次閒置計數器
+EWMA_PRUNE_INTERVAL = 4096
+
 # 正則匹配
 INVITE_RE = re.compile(
-    r"(discord\.gg|discord\.com/invite|discordapp\.com/invite)/[A-Za-z0-9\-]+",
+    r"(discord\.gg|discord\.com/invite|discordapp\.com/invite)/([A-Za-z0-9\-]+)",
     re.IGNORECASE,
 )
 URL_RE = re.compile(r"https?://[^\s<>]+", re.IGNORECASE)
@@ -79,6 +103,14 @@ DEFAULT_SETTINGS = {
     "link_window": 15,
     "link_action": ACTION_DELETE,
     "invite_auto_delete": True,
+    # 允許的邀請目標伺服器 ID (合作伺服器；本伺服器的邀請一律允許)
+    "invite_allowlist": [],
+    # 網域信譽: 允許/封鎖清單 ("*.example.com" 涵蓋所有子網域)
+    "domain_enabled": True,
+    "domain_allow": [],
+    "domain_deny": [],
+    "domain_global_denylist": True,
+    "domain_action": ACTION_DELETE,
     # 表情轟炸偵測
     "emoji_enabled": True,
     "emoji_limit": 20,
@@ -92,6 +124,17 @@ DEFAULT_SETTINGS = {
     "raid_joins": 10,
     "raid_window": 30,
     "raid_action": ACTION_LOCKDOWN,
+    # 封鎖模式: channels (逐頻道覆寫) / role (切換 @everyone 權限)
+    "lockdown_mode": "channels",
+    # 違禁詞彙過濾
+    "wordfilter_enabled": False,
+    "wordfilter_words": [],
+    "wordfilter_action": ACTION_DELETE,
+    # 自動慢速模式: [[每分鐘訊息數, 慢速秒數], ...]
+    "slowmode_enabled": False,
+    "slowmode_levels": [list(level) for level in DEFAULT_SLOWMODE_LEVELS],
+    # 洪水/連結/突襲的速率計算模式
+    "rate_mode": RATE_MODE_WINDOW,
     # 自動升級
     "auto_escalate": True,
     "escalate_strikes": 3,
@@ -105,6 +148,89 @@ DEFAULT_SETTINGS = {
 }
 
 
+@dataclass(frozen=True)
+class CompiledSettings:
+    """編譯後的伺服器設定 — 熱路徑以屬性存取取代字串鍵查詢"""
+
+    __slots__ = (
+        "enabled",
+        "flood_messages", "flood_window", "flood_action",
+        "duplicate_enabled", "duplicate_count", "duplicate_window",
+        "duplicate_action",
+        "mention_enabled", "mention_limit", "mention_action",
+        "link_enabled", "link_limit", "link_window", "link_action",
+        "invite_auto_delete", "invite_allowlist",
+        "domain_enabled", "domain_global_denylist", "domain_action",
+        "emoji_enabled", "emoji_limit", "emoji_action",
+        "newline_enabled", "newline_limit", "newline_action",
+        "raid_enabled", "raid_joins", "raid_window", "raid_action",
+        "lockdown_mode",
+        "wordfilter_enabled", "wordfilter_action",
+        "rate_mode",
+        "slowmode_enabled", "slowmode_levels",
+        "auto_escalate", "escalate_strikes", "escalate_window",
+        "mute_duration", "ban_delete_days",
+        "whitelisted_roles", "whitelisted_channels",
+    )
+
+    enabled: bool
+    flood_messages: int
+    flood_window: int
+    flood_action: str
+    duplicate_enabled: bool
+    duplicate_count: int
+    duplicate_window: int
+    duplicate_action: str
+    mention_enabled: bool
+    mention_limit: int
+    mention_action: str
+    link_enabled: bool
+    link_limit: int
+    link_window: int
+    link_action: str
+    invite_auto_delete: bool
+    invite_allowlist: FrozenSet[int]
+    domain_enabled: bool
+    domain_global_denylist: bool
+    domain_action: str
+    emoji_enabled: bool
+    emoji_limit: int
+    emoji_action: str
+    newline_enabled: bool
+    newline_limit: int
+    newline_action: str
+    raid_enabled: bool
+    raid_joins: int
+    raid_window: int
+    raid_action: str
+    lockdown_mode: str
+    wordfilter_enabled: bool
+    wordfilter_action: str
+    rate_mode: str
+    slowmode_enabled: bool
+    slowmode_levels: Tuple[Tuple[int, int], ...]
+    auto_escalate: bool
+    escalate_strikes: int
+    escalate_window: int
+    mute_duration: int
+    ban_delete_days: int
+    whitelisted_roles: FrozenSet[int]
+    whitelisted_channels: FrozenSet[int]
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "CompiledSettings":
+        """由設定字典編譯 (缺少的鍵以預設值補齊)"""
+        merged = {**DEFAULT_SETTINGS, **raw}
+        values = {name: merged[name] for name in cls.__slots__}
+        values["whitelisted_roles"] = frozenset(merged["whitelisted_roles"])
+        values["whitelisted_channels"] = frozenset(merged["whitelisted_channels"])
+        values["invite_allowlist"] = frozenset(int(g) for g in merged["invite_allowlist"])
+        values["slowmode_levels"] = tuple(
+            (int(rate), int(delay)) for rate, delay in merged["slowmode_levels"]
+        )
+        return cls(**values)
+
+
 class AntiSpamManager:
     """頂級防炸群管理器 — 多層偵測 + 自動升級"""
 
@@ -125,42 +251,48 @@ class AntiSpamManager:
         self.link_log: Dict[int, Dict[int, List[float]]] = defaultdict(
             lambda: defaultdict(list)
         )
-        # {guild_id: [timestamp]} — 加入時間戳 (突襲偵測)
-        self.join_log: Dict[int, List[float]] = defaultdict(list)
+        # 突襲評分器 — 每伺服器有上限的加入紀錄 + 特徵分數
+        self.raid_scorer = RaidScorer()
+        # EWMA 模式: 每位用戶/伺服器只保存一個計數器
+        # {guild_id: {user_id: EwmaCounter}} — 訊息速率
+        self.message_rates: Dict[int, Dict[int, EwmaCounter]] = defaultdict(dict)
+        # {guild_id: {user_id: EwmaCounter}} — 連結速率
+        self.link_rates: Dict[int, Dict[int, EwmaCounter]] = defaultdict(dict)
+        self._ewma_ops = 0
         # {guild_id: {user_id: [(timestamp, detection_type)]}} — 違規紀錄
         self.strike_log: Dict[int, Dict[int, List[Tuple[float, str]]]] = defaultdict(
             lambda: defaultdict(list)
         )
         # {guild_id: bool} — 封鎖模式狀態
         self.lockdown_active: Dict[int, bool] = {}
+        # {guild_id: CompiledSettings} — 編譯後設定 (update_settings 時重建)
+        self.compiled: Dict[int, CompiledSettings] = {}
+        # {guild_id: AhoCorasick} — 違禁詞自動機 (詞彙變更時才重新編譯)
+        self.word_filters: Dict[int, AhoCorasick] = {}
+        # {guild_id: (允許, 封鎖)} — 網域字典樹 (清單變更時才重建)
+        self.domain_filters: Dict[int, Tuple[DomainTrie, DomainTrie]] = {}
+        # 全域惡意網域清單 (記憶體映射，所有伺服器共用)
+        self.global_denylist = GlobalDenylist.from_source()
+
+    @staticmethod
+    def _now() -> float:
+        """目前時間戳 (基準測試以虛擬時鐘覆寫)"""
+        return datetime.now(TZ_OFFSET).timestamp()
+
+    def now(self) -> float:
+        """偵測使用的目前時間戳 (與各項檢查共用同一個時鐘)"""
+        return self._now()
 
     # --- 設定管理 ---
 
     def _load_all_settings(self) -> Dict[int, dict]:
         """從檔案載入所有伺服器設定"""
-        if not os.path.exists(self.SETTINGS_FILE):
-            return {}
-        try:
-            with open(self.SETTINGS_FILE, "r", encoding="utf-8") as f:
-                raw = json.load(f)
-            return {int(k): v for k, v in raw.items()}
-        except (json.JSONDecodeError, OSError) as e:
-            print(f"[防刷屏] 無法載入設定: {e}")
-            return {}
+        self._settings_store = get_json_store(self.SETTINGS_FILE)
+        return {int(k): v for k, v in self._settings_store.data.items()}
 
     def _save_all_settings(self):
-        """儲存所有伺服器設定到檔案"""
-        os.makedirs(os.path.dirname(self.SETTINGS_FILE), exist_ok=True)
-        try:
-            with open(self.SETTINGS_FILE, "w", encoding="utf-8") as f:
-                json.dump(
-                    {str(k): v for k, v in self.settings.items()},
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                )
-        except OSError as e:
-            print(f"[防刷屏] 無法儲存設定: {e}")
+        """儲存所有伺服器設定 (延遲寫入磁碟)"""
+        self._settings_store.set({str(k): v for k, v in self.settings.items()})
 
     def get_settings(self, guild_id: int) -> dict:
         """取得伺服器設定 (不存在則建立預設)"""
@@ -172,19 +304,103 @@ class AntiSpamManager:
         """更新伺服器設定並儲存"""
         s = self.get_settings(guild_id)
         s.update(updates)
+        self.compiled.pop(guild_id, None)
+        if "wordfilter_words" in updates:
+            self.word_filters.pop(guild_id, None)
+        if "domain_allow" in updates or "domain_deny" in updates:
+            self.domain_filters.pop(guild_id, None)
         self._save_all_settings()
 
+    def get_compiled(self, guild_id: int) -> CompiledSettings:
+        """取得編譯後設定 (僅在設定變更後重建)"""
+        compiled = self.compiled.get(guild_id)
+        if compiled is None:
+            compiled = CompiledSettings.from_dict(self.get_settings(guild_id))
+            self.compiled[guild_id] = compiled
+        return compiled
+
+    def get_word_filter(self, guild_id: int) -> AhoCorasick:
+        """取得伺服器的違禁詞自動機 (延遲編譯並快取)"""
+        automaton = self.word_filters.get(guild_id)
+        if automaton is None:
+            words = self.get_settings(guild_id).get("wordfilter_words", [])
+            automaton = AhoCorasick(words)
+            self.word_filters[guild_id] = automaton
+        return automaton
+
+    def get_domain_filters(self, guild_id: int) -> Tuple[DomainTrie, DomainTrie]:
+        """取得伺服器的 (允許, 封鎖) 網域字典樹 (延遲建立並快取)"""
+        tries = self.domain_filters.get(guild_id)
+        if tries is None:
+            s = self.get_settings(guild_id)
+            tries = (
+                DomainTrie(s.get("domain_allow", [])),
+                DomainTrie(s.get("domain_deny", [])),
+            )
+            self.domain_filters[guild_id] = tries
+        return tries
+
+    def update_domain_rules(
+        self, guild_id: int, key: str, add: List[str] = (), remove: List[str] = ()
+    ) -> List[str]:
+        """
+        新增/移除網域規則 (key 為 domain_allow 或 domain_deny)
+
+        Returns:
+            實際變更的規則 (已正規化)
+        """
+        current = list(self.get_settings(guild_id).get(key, []))
+        changed = []
+        for rule in add:
+            rule = normalize_rule(rule)
+            if rule and rule not in current:
+                current.append(rule)
+                changed.append(rule)
+        for rule in remove:
+            rule = normalize_rule(rule)
+            if rule and rule in current:
+                current.remove(rule)
+                changed.append(rule)
+        if changed:
+            self.update_settings(guild_id, {key: current})
+        return changed
+
+    def add_filter_words(self, guild_id: int, words: List[str]) -> List[str]:
+        """新增違禁詞，回傳實際新增的詞彙"""
+        current = list(self.get_settings(guild_id).get("wordfilter_words", []))
+        existing = {w.casefold() for w in current}
+        added = []
+        for word in words:
+            word = word.strip()
+            if word and word.casefold() not in existing:
+                existing.add(word.casefold())
+                current.append(word)
+                added.append(word)
+        if added:
+            self.update_settings(guild_id, {"wordfilter_words": current})
+        return added
+
+    def remove_filter_words(self, guild_id: int, words: List[str]) -> List[str]:
+        """移除違禁詞，回傳實際移除的詞彙"""
+        targets = {w.strip().casefold() for w in words if w.strip()}
+        current = self.get_settings(guild_id).get("wordfilter_words", [])
+        kept = [w for w in current if w.casefold() not in targets]
+        removed = [w for w in current if w.casefold() in targets]
+        if removed:
+            self.update_settings(guild_id, {"wordfilter_words": kept})
+        return removed
+
     def is_whitelisted(
         self, guild_id: int, member: discord.Member, channel_id: int
     ) -> bool:
         """檢查成員/頻道是否在白名單"""
-        s = self.get_settings(guild_id)
-        if channel_id in s["whitelisted_channels"]:
+        s = self.get_compiled(guild_id)
+        if channel_id in s.whitelisted_channels:
             return True
-        member_role_ids = {r.id for r in member.roles}
-        if member_role_ids & set(s["whitelisted_roles"]):
-            return True
-        return False
+        # 未設定角色白名單時不必展開成員角色
+        if not s.whitelisted_roles:
+            return False
+        return not s.whitelisted_roles.isdisjoint(r.id for r in member.roles)
 
     # --- 核心偵測引擎 ---
 
@@ -197,86 +413,142 @@ class AntiSpamManager:
 
         回傳: [(detection_type, action, detail_text), ...]
         """
-        s = self.get_settings(guild_id)
-        if not s["enabled"]:
+        s = self.get_compiled(guild_id)
+        if not s.enabled:
             return []
 
         # 白名單跳過
         if member and self.is_whitelisted(guild_id, member, channel_id):
             return []
 
-        now = datetime.now(TZ_OFFSET).timestamp()
+        now = self._now()
         triggers = []
 
         # 1) 訊息洪水偵測
-        flood = self._check_flood(guild_id, user_id, now, s)
+        if s.rate_mode == RATE_MODE_EWMA:
+            flood = self._check_flood_ewma(guild_id, user_id, now, s)
+            self._maybe_prune_rates(now)
+        else:
+            flood = self._check_flood(guild_id, user_id, now, s)
         if flood:
             triggers.append(flood)
 
         # 2) 重複內容偵測
-        if s["duplicate_enabled"] and content:
+        if s.duplicate_enabled and content:
             dup = self._check_duplicate(guild_id, user_id, now, content, s)
             if dup:
                 triggers.append(dup)
 
         # 3) 提及轟炸偵測
-        if s["mention_enabled"] and content:
+        if s.mention_enabled and content:
             mention = self._check_mentions(content, s)
             if mention:
                 triggers.append(mention)
 
-        # 4) 連結/邀請轟炸偵測
-        if s["link_enabled"] and content:
-            link = self._check_links(guild_id, user_id, now, content, s)
+        # 4) 網域信譽 + 連結/邀請轟炸偵測
+        urls = URL_RE.findall(content) if content and (s.link_enabled or s.domain_enabled) else []
+        if urls and s.domain_enabled:
+            domain, urls = self._check_domains(guild_id, urls, s)
+            if domain:
+                triggers.append(domain)
+        if urls and s.link_enabled:
+            link = self._check_links(guild_id, user_id, now, content, urls, s)
             if link:
                 triggers.append(link)
 
         # 5) 表情轟炸偵測
-        if s["emoji_enabled"] and content:
+        if s.emoji_enabled and content:
             emoji = self._check_emoji(content, s)
             if emoji:
                 triggers.append(emoji)
 
         # 6) 換行轟炸偵測
-        if s["newline_enabled"] and content:
+        if s.newline_enabled and content:
             newline = self._check_newline(content, s)
             if newline:
                 triggers.append(newline)
 
+        # 7) 違禁詞彙過濾
+        if s.wordfilter_enabled and content:
+            word = self._check_wordfilter(guild_id, content, s)
+            if word:
+                triggers.append(word)
+
         # 記錄違規 + 自動升級
-        if triggers and s["auto_escalate"]:
+        if triggers and s.auto_escalate:
             triggers = self._apply_escalation(guild_id, user_id, now, triggers, s)
 
         return triggers
 
-    def check_member_join(self, guild_id: int) -> Optional[Tuple[str, str, str]]:
-        """檢查是否有加入突襲"""
-        s = self.get_settings(guild_id)
-        if not s["enabled"] or not s["raid_enabled"]:
+    def check_member_join(
+        self, guild_id: int, member: Optional[discord.Member] = None
+    ) -> Optional[Tuple[str, str, str]]:
+        """
+        檢查是否有加入突襲
+
+        每次加入依帳齡、預設頭像與名稱相似度計分 (正常帳號 = 1 分)，
+        視窗內滾動分數達到 raid_joins 時觸發；觸發後一個視窗內不重複觸發，
+        期間的加入者仍保留在紀錄中，可用 get_raid_cohort 取得並批次處理。
+        """
+        s = self.get_compiled(guild_id)
+        if not s.enabled or not s.raid_enabled:
             return None
 
-        now = datetime.now(TZ_OFFSET).timestamp()
-        window = s["raid_window"]
+        now = self._now()
+        window = s.raid_window
+        scorer = self.raid_scorer
+
+        if member is not None:
+            record = scorer.record_join(
+                guild_id,
+                now,
+                user_id=member.id,
+                name=member.name,
+                default_avatar=member.avatar is None,
+            )
+        else:
+            record = scorer.record_join(guild_id, now)
 
-        self.join_log[guild_id].append(now)
-        self.join_log[guild_id] = [
-            t for t in self.join_log[guild_id] if now - t < window
-        ]
+        use_ewma = s.rate_mode == RATE_MODE_EWMA
+        score = scorer.rolling_score(guild_id, now, window, record, use_ewma=use_ewma)
+        if score < s.raid_joins or scorer.in_cooldown(guild_id, now, window):
+            return None
 
-        count = len(self.join_log[guild_id])
-        if count >= s["raid_joins"]:
-            self.join_log[guild_id].clear()
-            return (
-                DETECT_RAID,
-                s["raid_action"],
-                f"{window} 秒內有 {count} 人加入",
-            )
-        return None
+        count = len(scorer.recent(guild_id, now, window))
+        flagged = len(scorer.cohort(guild_id, now, window))
+        scorer.mark_triggered(guild_id, now)
+        suffix = " (EWMA)" if use_ewma else ""
+        return (
+            DETECT_RAID,
+            s.raid_action,
+            f"{window} 秒內有 {count} 人加入，風險分數 {score:.1f}，可疑帳號 {flagged} 個{suffix}",
+        )
+
+    def get_raid_cohort(self, guild_id: int, include_all: bool = False) -> List[JoinRecord]:
+        """取得最近一次突襲 (或目前視窗) 內的可疑加入者"""
+        s = self.get_compiled(guild_id)
+        now = self._now()
+        return self.raid_scorer.cohort(guild_id, now, s.raid_window, include_all)
 
     def is_invite_link(self, content: str, guild_id: int) -> bool:
         """快速檢查是否含有邀請連結"""
-        s = self.get_settings(guild_id)
-        return bool(s["invite_auto_delete"] and INVITE_RE.search(content))
+        s = self.get_compiled(guild_id)
+        return bool(s.invite_auto_delete and INVITE_RE.search(content))
+
+    def find_invite_codes(self, content: str, guild_id: int) -> List[str]:
+        """取得需要檢查的邀請碼 (未啟用自動刪除時回傳空列表)"""
+        s = self.get_compiled(guild_id)
+        if not s.invite_auto_delete:
+            return []
+        return list(dict.fromkeys(m.group(2) for m in INVITE_RE.finditer(content)))
+
+    def is_invite_allowed(self, guild_id: int, target_guild_id: Optional[int]) -> bool:
+        """邀請目標是否為本伺服器或合作伺服器"""
+        if target_guild_id is None:
+            return False
+        if target_guild_id == guild_id:
+            return True
+        return target_guild_id in self.get_compiled(guild_id).invite_allowlist
 
     def is_lockdown(self, guild_id: int) -> bool:
         """是否處於封鎖模式"""
@@ -291,23 +563,26 @@ class AntiSpamManager:
         for log in (self.message_log, self.content_log, self.link_log):
             if guild_id in log and user_id in log[guild_id]:
                 log[guild_id][user_id] = []
+        for rates in (self.message_rates, self.link_rates):
+            if guild_id in rates:
+                rates[guild_id].pop(user_id, None)
 
     def get_user_strikes(self, guild_id: int, user_id: int) -> int:
         """取得用戶當前違規次數"""
-        s = self.get_settings(guild_id)
-        now = datetime.now(TZ_OFFSET).timestamp()
-        window = s["escalate_window"]
+        s = self.get_compiled(guild_id)
+        now = self._now()
+        window = s.escalate_window
         strikes = self.strike_log[guild_id][user_id]
         return len([t for t, _ in strikes if now - t < window])
 
     # --- 各偵測子模組 ---
 
     def _check_flood(
-        self, guild_id: int, user_id: int, now: float, s: dict
+        self, guild_id: int, user_id: int, now: float, s: CompiledSettings
     ) -> Optional[Tuple[str, str, str]]:
         """洪水偵測"""
-        window = s["flood_window"]
-        limit = s["flood_messages"]
+        window = s.flood_window
+        limit = s.flood_messages
 
         log = self.message_log[guild_id][user_id]
         log.append(now)
@@ -320,17 +595,60 @@ class AntiSpamManager:
         if count > limit:
             return (
                 DETECT_FLOOD,
-                s["flood_action"],
+                s.flood_action,
                 f"{window}s 內發送 {count}/{limit} 條訊息",
             )
         return None
 
+    def _rate_counter(
+        self, rates: Dict[int, Dict[int, EwmaCounter]], guild_id: int, user_id: int
+    ) -> EwmaCounter:
+        """取得 (或建立) 用戶的 EWMA 計數器"""
+        guild_rates = rates[guild_id]
+        counter = guild_rates.get(user_id)
+        if counter is None:
+            counter = guild_rates[user_id] = EwmaCounter()
+        return counter
+
+    def _check_flood_ewma(
+        self, guild_id: int, user_id: int, now: float, s: CompiledSettings
+    ) -> Optional[Tuple[str, str, str]]:
+        """洪水偵測 (EWMA 模式，門檻沿用 flood_messages / flood_window)"""
+        window = s.flood_window
+        limit = s.flood_messages
+        level = self._rate_counter(self.message_rates, guild_id, user_id).add(
+            now, window
+        )
+        if level > limit:
+            return (
+                DETECT_FLOOD,
+                s.flood_action,
+                f"{window}s 內約發送 {level:.1f}/{limit} 條訊息 (EWMA)",
+            )
+        return None
+
+    def _maybe_prune_rates(self, now: float):
+        """定期移除已閒置的 EWMA 計數器 (各伺服器依自己的時間窗判斷)"""
+        self._ewma_ops += 1
+        if self._ewma_ops < EWMA_PRUNE_INTERVAL:
+            return
+        self._ewma_ops = 0
+        for rates, window in (
+            (self.message_rates, "flood_window"),
+            (self.link_rates, "link_window"),
+        ):
+            for guild_id in list(rates):
+                tau = getattr(self.get_compiled(guild_id), window)
+                prune_idle(rates[guild_id], now, tau)
+                if not rates[guild_id]:
+                    del rates[guild_id]
+
     def _check_duplicate(
-        self, guild_id: int, user_id: int, now: float, content: str, s: dict
+        self, guild_id: int, user_id: int, now: float, content: str, s: CompiledSettings
     ) -> Optional[Tuple[str, str, str]]:
         """重複內容偵測"""
-        window = s["duplicate_window"]
-        limit = s["duplicate_count"]
+        window = s.duplicate_window
+        limit = s.duplicate_count
 
         log = self.content_log[guild_id][user_id]
         normalized = content.strip().lower()
@@ -350,36 +668,83 @@ class AntiSpamManager:
         if dup_count >= limit:
             return (
                 DETECT_DUPLICATE,
-                s["duplicate_action"],
+                s.duplicate_action,
                 f"{window}s 內重複相同內容 {dup_count} 次",
             )
         return None
 
     def _check_mentions(
-        self, content: str, s: dict
+        self, content: str, s: CompiledSettings
     ) -> Optional[Tuple[str, str, str]]:
         """提及轟炸偵測"""
-        limit = s["mention_limit"]
+        limit = s.mention_limit
         mention_count = content.count("<@") + content.count("@everyone") + content.count("@here")
 
         if mention_count >= limit:
             return (
                 DETECT_MENTION,
-                s["mention_action"],
+                s.mention_action,
                 f"單條訊息包含 {mention_count} 個提及",
             )
         return None
 
+    def _check_domains(
+        self, guild_id: int, urls: List[str], s: CompiledSettings
+    ) -> Tuple[Optional[Tuple[str, str, str]], List[str]]:
+        """
+        網域信譽偵測 — 封鎖網域立即觸發，不等待 link_limit
+
+        Returns:
+            (觸發結果, 扣除允許網域後仍需計入連結轟炸的網址)
+        """
+        allow, deny = self.get_domain_filters(guild_id)
+        denylist = self.global_denylist if s.domain_global_denylist else None
+        remaining = []
+        trigger = None
+        for url in urls:
+            host = extract_host(url)
+            if host is None:
+                remaining.append(url)
+                continue
+            if allow and allow.match(host):
+                continue
+            remaining.append(url)
+            if trigger is not None:
+                continue
+            rule = deny.match(host) if deny else None
+            if rule is None and denylist:
+                rule = denylist.match(host)
+            if rule is not None:
+                trigger = (
+                    DETECT_DOMAIN,
+                    s.domain_action,
+                    f"連結指向封鎖網域: {host} (規則 {rule})",
+                )
+        return trigger, remaining
+
     def _check_links(
-        self, guild_id: int, user_id: int, now: float, content: str, s: dict
+        self,
+        guild_id: int,
+        user_id: int,
+        now: float,
+        content: str,
+        urls: List[str],
+        s: CompiledSettings,
     ) -> Optional[Tuple[str, str, str]]:
         """連結轟炸偵測"""
-        urls = URL_RE.findall(content)
-        if not urls:
-            return None
+        window = s.link_window
+        limit = s.link_limit
 
-        window = s["link_window"]
-        limit = s["link_limit"]
+        if s.rate_mode == RATE_MODE_EWMA:
+            level = self._rate_counter(self.link_rates, guild_id, user_id).add(
+                now, window, weight=len(urls)
+            )
+            if level >= limit:
+                detail = f"{window}s 內約貼出 {level:.1f} 個連結 (EWMA)"
+                if INVITE_RE.search(content):
+                    detail += " (含邀請連結)"
+                return (DETECT_LINK, s.link_action, detail)
+            return None
 
         log = self.link_log[guild_id][user_id]
         for _ in urls:
@@ -395,39 +760,55 @@ class AntiSpamManager:
             detail = f"{window}s 內貼出 {count} 個連結"
             if has_invite:
                 detail += " (含邀請連結)"
-            return (DETECT_LINK, s["link_action"], detail)
+            return (DETECT_LINK, s.link_action, detail)
         return None
 
     def _check_emoji(
-        self, content: str, s: dict
+        self, content: str, s: CompiledSettings
     ) -> Optional[Tuple[str, str, str]]:
         """表情轟炸偵測"""
-        limit = s["emoji_limit"]
+        limit = s.emoji_limit
         count = len(EMOJI_RE.findall(content))
 
         if count >= limit:
             return (
                 DETECT_EMOJI,
-                s["emoji_action"],
+                s.emoji_action,
                 f"單條訊息包含 {count} 個表情",
             )
         return None
 
     def _check_newline(
-        self, content: str, s: dict
+        self, content: str, s: CompiledSettings
     ) -> Optional[Tuple[str, str, str]]:
         """換行轟炸偵測"""
-        limit = s["newline_limit"]
+        limit = s.newline_limit
         count = content.count("\n")
 
         if count >= limit:
             return (
                 DETECT_NEWLINE,
-                s["newline_action"],
+                s.newline_action,
                 f"單條訊息包含 {count} 個換行",
             )
         return None
 
+    def _check_wordfilter(
+        self, guild_id: int, content: str, s: CompiledSettings
+    ) -> Optional[Tuple[str, str, str]]:
+        """違禁詞彙偵測 (單次掃描比對所有詞彙)"""
+        hits = self.get_word_filter(guild_id).find_all(content)
+        if hits:
+            shown = ", ".join(hits[:5])
+            if len(hits) > 5:
+                shown += f" 等 {len(hits)} 個"
+            return (
+                DETECT_WORDFILTER,
+                s.wordfilter_action,
+                f"命中違禁詞: {shown}",
+            )
+        return None
+
     # --- 自動升級 ---
 
     def _apply_escalation(
@@ -436,11 +817,11 @@ class AntiSpamManager:
         user_id: int,
         now: float,
         triggers: List[Tuple[str, str, str]],
-        s: dict,
+        s: CompiledSettings,
     ) -> List[Tuple[str, str, str]]:
         """根據違規紀錄自動升級懲罰"""
-        window = s["escalate_window"]
-        threshold = s["escalate_strikes"]
+        window = s.escalate_window
+        threshold = s.escalate_strikes
 
         # 記錄本次違規
         for det_type, _, _ in triggers:
@@ -487,6 +868,8 @@ DETECT_NAMES = {
     DETECT_EMOJI: "表情轟炸",
     DETECT_NEWLINE: "換行轟炸",
     DETECT_RAID: "加入突襲",
+    DETECT_WORDFILTER: "違禁詞彙",
+    DETECT_DOMAIN: "封鎖網域",
 }
 
 ACTION_NAMES = {
@@ -506,6 +889,8 @@ DETECT_COLORS = {
     DETECT_EMOJI: discord.Color.from_rgb(100, 200, 255),
     DETECT_NEWLINE: discord.Color.from_rgb(150, 150, 150),
     DETECT_RAID: discord.Color.from_rgb(255, 0, 0),
+    DETECT_WORDFILTER: discord.Color.from_rgb(180, 60, 60),
+    DETECT_DOMAIN: discord.Color.from_rgb(200, 30, 90),
 }
 
 
@@ -556,27 +941,40 @@ def create_raid_alert_embed(
     join_count: int,
     window: int,
     action: str,
+    score: Optional[float] = None,
+    cohort: Optional[List[JoinRecord]] = None,
 ) -> discord.Embed:
     """建立突襲警報 Embed"""
     action_name = ACTION_NAMES.get(action, action)
 
+    description = (
+        f"偵測到可能的突襲行為\n"
+        f"{window} 秒內有 **{join_count}** 人加入伺服器"
+    )
+    if score is not None:
+        description += f"，風險分數 **{score:.1f}**"
+
     embed = discord.Embed(
         title="[防炸群] 突襲警報",
-        description=(
-            f"偵測到可能的突襲行為\n"
-            f"{window} 秒內有 **{join_count}** 人加入伺服器"
-        ),
+        description=description,
         color=discord.Color.from_rgb(255, 0, 0),
         timestamp=datetime.now(TZ_OFFSET),
     )
 
+    if cohort:
+        lines = [f"<@{r.user_id}> — {r.describe()}" for r in cohort[:10]]
+        if len(cohort) > 10:
+            lines.append(f"...等共 {len(cohort)} 人")
+        embed.add_field(name="可疑帳號", value="\n".join(lines), inline=False)
+
     embed.add_field(name="執行動作", value=action_name, inline=True)
     embed.add_field(
         name="建議",
         value=(
             "1. 檢查近期加入的成員\n"
             "2. 考慮啟用驗證等級\n"
-            "3. 使用 `/anti_spam lockdown_off` 解除封鎖"
+            "3. 使用 `/anti_spam lockdown_off` 解除封鎖\n"
+            "4. 使用 `/anti_spam raid_cohort` 批次處理可疑帳號"
         ),
         inline=False,
     )
@@ -5,6 +5,8 @@ from typing import Any, Dict, List, Optional
 import discord
 from discord.ext import commands
 
+from src.utils.cache_keys import NamespaceIndex
+
 
 class APIOptimizer:
     def __init__(self, bot: commands.Bot):
@@ -12,8 +14,10 @@ class APIOptimizer:
         self.request_queue: List[Dict] = []
         self.batch_size = 10
         self.batch_interval = 1.0
+        # 鍵為 "命名空間:..." (例如 "member:<guild>:<member>")
         self.cache: Dict[str, Any] = {}
         self.cache_ttl = 300
+        self._namespaces = NamespaceIndex()
         self.rate_limits: Dict[str, Dict] = {}
         self.last_request_time: Dict[str, float] = {}
 
@@ -46,11 +50,16 @@ class APIOptimizer:
             if time.time() - timestamp < self.cache_ttl:
                 return cached_data
             else:
-                del self.cache[cache_key]
+                self._remove(cache_key)
         return None
 
     def set_cache(self, cache_key: str, data: Any) -> None:
         self.cache[cache_key] = (data, time.time())
+        self._namespaces.add(cache_key)
+
+    def _remove(self, cache_key: str) -> None:
+        del self.cache[cache_key]
+        self._namespaces.discard(cache_key)
 
     async def check_rate_limit(self, endpoint: str) -> bool:
         current_time = time.time()
@@ -78,7 +87,7 @@ class APIOptimizer:
     async def optimized_get_channel(
         self, channel_id: int
     ) -> Optional[discord.TextChannel]:
-        cache_key = f"channel_{channel_id}"
+        cache_key = f"channel:{channel_id}"
         cached_channel = self.get_cached(cache_key)
 
         if cached_channel:
@@ -91,7 +100,7 @@ class APIOptimizer:
         return channel
 
     async def optimized_get_user(self, user_id: int) -> Optional[discord.User]:
-        cache_key = f"user_{user_id}"
+        cache_key = f"user:{user_id}"
         cached_user = self.get_cached(cache_key)
 
         if cached_user:
@@ -104,7 +113,7 @@ class APIOptimizer:
         return user
 
     async def optimized_get_guild(self, guild_id: int) -> Optional[discord.Guild]:
-        cache_key = f"guild_{guild_id}"
+        cache_key = f"guild:{guild_id}"
         cached_guild = self.get_cached(cache_key)
 
         if cached_guild:
@@ -124,7 +133,7 @@ class APIOptimizer:
 
         message = await channel.send(content, **kwargs)
 
-        cache_key = f"last_message_{channel.id}"
+        cache_key = f"last_message:{channel.id}"
         self.set_cache(cache_key, message)
 
         return message
@@ -135,7 +144,7 @@ class APIOptimizer:
         members = []
 
         for member_id in member_ids:
-            cache_key = f"member_{guild.id}_{member_id}"
+            cache_key = f"member:{guild.id}:{member_id}"
             cached_member = self.get_cached(cache_key)
 
             if cached_member:
@@ -164,13 +173,25 @@ class APIOptimizer:
 
         return members
 
-    def clear_cache(self, pattern: str = None) -> None:
-        if pattern:
+    def clear_cache(self, pattern: str = None, namespace: str = None) -> None:
+        """
+        清除快取
+
+        Args:
+            pattern: 清除鍵中包含此字串者 (需掃描全部鍵)
+            namespace: 清除命名空間 (例如 "user" 或 "member:<guild>")，只走訪符合的鍵
+            皆未指定時清除全部
+        """
+        if namespace:
+            for key in self._namespaces.keys(namespace):
+                self._remove(key)
+        elif pattern:
             keys_to_remove = [key for key in self.cache.keys() if pattern in key]
             for key in keys_to_remove:
-                del self.cache[key]
+                self._remove(key)
         else:
             self.cache.clear()
+            self._namespaces.clear()
 
     def get_cache_stats(self) -> Dict[str, Any]:
         current_time = time.time()
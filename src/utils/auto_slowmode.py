@@ -0,0 +1,218 @@
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from src.utils.rate_estimator import EwmaCounter
+
+# 預設級距: (每分鐘訊息數門檻, 慢速模式秒數)
+DEFAULT_SLOWMODE_LEVELS = [(30, 2), (60, 5), (120, 10), (240, 30)]
+
+# Discord 慢速模式上限 (6 小時)
+MAX_SLOWMODE_DELAY = 21600
+
+# 修改失敗 (例如缺少管理頻道權限) 後暫停調整的秒數，連續失敗時加倍
+EDIT_FAILURE_BACKOFF = 60.0
+MAX_EDIT_FAILURE_BACKOFF = 3600.0
+
+
+def parse_levels(text: str) -> List[Tuple[int, int]]:
+    """
+    解析級距設定字串
+
+    格式: "每分鐘訊息數:秒數,..." 例如 "30:2,60:5,120:10"
+
+    Raises:
+        ValueError: 格式錯誤或數值不合法
+    """
+    levels = []
+    for part in text.replace("，", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        rate_str, delay_str = part.split(":")
+        rate, delay = int(rate_str), int(delay_str)
+        if rate <= 0 or not 0 < delay <= MAX_SLOWMODE_DELAY:
+            raise ValueError(part)
+        levels.append((rate, delay))
+    if not levels:
+        raise ValueError(text)
+    levels.sort()
+    # 門檻與秒數都必須遞增
+    for (r1, d1), (r2, d2) in zip(levels, levels[1:]):
+        if r1 == r2 or d1 >= d2:
+            raise ValueError(text)
+    return levels
+
+
+class _ChannelState:
+    """單一頻道的慢速模式狀態"""
+
+    __slots__ = ("level", "previous_level", "changed_at", "original_delay")
+
+    def __init__(self, original_delay: int):
+        self.level = 0
+        self.previous_level = 0
+        self.changed_at = 0.0
+        self.original_delay = original_delay
+
+
+class SlowmodeController:
+    """自動慢速模式控制器 — 依頻道訊息速率逐級調整，帶遲滯避免來回切換"""
+
+    def __init__(
+        self,
+        tau: float = 30.0,
+        step_down_ratio: float = 0.6,
+        min_dwell: float = 60.0,
+        min_edit_interval: float = 15.0,
+    ):
+        """
+        初始化控制器
+
+        Args:
+            tau: 頻道速率估計的時間常數 (秒)
+            step_down_ratio: 速率低於目前級距門檻的此比例時才降級
+            min_dwell: 每個級距至少維持的秒數 (降級前)
+            min_edit_interval: 同一頻道兩次修改的最小間隔 (秒)
+        """
+        self.tau = tau
+        self.step_down_ratio = step_down_ratio
+        self.min_dwell = min_dwell
+        self.min_edit_interval = min_edit_interval
+        # {channel_id: EwmaCounter} — 頻道訊息速率
+        self._rates: Dict[int, EwmaCounter] = {}
+        # {channel_id: _ChannelState} — 已調整過慢速模式的頻道
+        self._states: Dict[int, _ChannelState] = {}
+        # {channel_id: (暫停到期時間, 連續失敗次數)} — 修改失敗的頻道
+        self._failures: Dict[int, Tuple[float, int]] = {}
+
+    def rate_per_minute(self, channel_id: int, now: float) -> float:
+        """頻道目前估計的每分鐘訊息數"""
+        counter = self._rates.get(channel_id)
+        if counter is None:
+            return 0.0
+        return counter.rate(now, self.tau) * 60
+
+    def observe(
+        self,
+        channel_id: int,
+        now: float,
+        levels: Sequence[Tuple[int, int]],
+        current_delay: int = 0,
+    ) -> Optional[int]:
+        """
+        記錄一則訊息並評估是否需要調整
+
+        Returns:
+            需要套用的慢速模式秒數；不需變更時回傳 None
+        """
+        counter = self._rates.get(channel_id)
+        if counter is None:
+            counter = self._rates[channel_id] = EwmaCounter()
+        counter.add(now, self.tau)
+        return self.evaluate(channel_id, now, levels, current_delay)
+
+    def evaluate(
+        self,
+        channel_id: int,
+        now: float,
+        levels: Sequence[Tuple[int, int]],
+        current_delay: int = 0,
+    ) -> Optional[int]:
+        """評估頻道目標級距 (不記錄訊息，供定期降級檢查使用)"""
+        failure = self._failures.get(channel_id)
+        if failure is not None and now < failure[0]:
+            return None
+        rate = self.rate_per_minute(channel_id, now)
+        state = self._states.get(channel_id)
+        level = state.level if state else 0
+
+        if not levels:
+            # 功能停用 (無級距) 時直接恢復原設定
+            target = 0
+        else:
+            # 級距設定縮短時，超出範圍的頻道視為位於新的最高級距
+            current = min(level, len(levels))
+            # 升級: 取速率達到的最高級距，可一次跳多級
+            target = current
+            for i, (threshold, _) in enumerate(levels, start=1):
+                if rate >= threshold and i > target:
+                    target = i
+            # 降級: 速率需低於門檻一定比例並已停留足夠時間，一次只降一級
+            if target == current and current > 0:
+                threshold = levels[current - 1][0]
+                if (
+                    rate < threshold * self.step_down_ratio
+                    and now - state.changed_at >= self.min_dwell
+                ):
+                    target = current - 1
+
+        if target == level:
+            return None
+        if state is not None and now - state.changed_at < self.min_edit_interval:
+            return None
+
+        if state is None:
+            state = self._states[channel_id] = _ChannelState(current_delay)
+        state.previous_level = state.level
+        state.level = target
+        state.changed_at = now
+
+        if target == 0:
+            # 狀態保留到修改成功 (edit_succeeded) 或閒置清理，失敗時才能退回
+            return state.original_delay
+        return max(state.original_delay, levels[target - 1][1])
+
+    def edit_succeeded(self, channel_id: int):
+        """修改成功，清除失敗紀錄 (已恢復原設定的頻道一併移除狀態)"""
+        self._failures.pop(channel_id, None)
+        state = self._states.get(channel_id)
+        if state is not None and state.level == 0:
+            del self._states[channel_id]
+
+    def edit_failed(self, channel_id: int, now: float) -> float:
+        """
+        修改失敗: 退回修改前的級距並暫停調整該頻道 (連續失敗時加倍)
+
+        保留速率與遲滯狀態，暫停結束後才會重新嘗試。
+
+        Returns:
+            暫停秒數
+        """
+        state = self._states.get(channel_id)
+        if state is not None:
+            state.level = state.previous_level
+        _, failures = self._failures.get(channel_id, (0.0, 0))
+        backoff = min(EDIT_FAILURE_BACKOFF * 2 ** failures, MAX_EDIT_FAILURE_BACKOFF)
+        self._failures[channel_id] = (now + backoff, failures + 1)
+        return backoff
+
+    def active_channels(self) -> List[int]:
+        """目前由控制器提高慢速模式的頻道"""
+        return [cid for cid, state in self._states.items() if state.level > 0]
+
+    def forget(self, channel_id: int):
+        """移除頻道狀態 (例如頻道已刪除或功能被停用)"""
+        self._states.pop(channel_id, None)
+        self._rates.pop(channel_id, None)
+        self._failures.pop(channel_id, None)
+
+    def prune_idle(self, now: float):
+        """移除已無流量且未調整的頻道計數器與已恢復的頻道狀態"""
+        for cid, (until, _) in list(self._failures.items()):
+            state = self._states.get(cid)
+            if now >= until and (state is None or state.level == 0):
+                del self._failures[cid]
+        for cid in [
+            cid for cid, state in self._states.items()
+            if state.level == 0 and cid not in self._failures
+        ]:
+            del self._states[cid]
+        idle = [
+            cid for cid, c in self._rates.items()
+            if cid not in self._states and c.peek(now, self.tau) < 0.05
+        ]
+        for cid in idle:
+            del self._rates[cid]
@@ -28,6 +28,10 @@ class BlacklistManager:
         if self.session:
             await self.session.close()
 
+    def peek(self, user_id: int):
+        """只查詢本地快取 (不發出 API 請求)，未快取時回傳 None"""
+        return self._blacklist_cache.get(user_id)
+
     async def check(self, user_id: int):
         now = asyncio.get_event_loop().time()
         if user_id in self._blacklist_cache:
@@ -0,0 +1,67 @@
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+
+# 命名空間分隔字元: "osu:user:name" 屬於 "osu" 與 "osu:user"
+SEPARATOR = ":"
+
+
+def namespace_of(key: str) -> Optional[str]:
+    """鍵的頂層命名空間 (第一個分隔字元之前)，沒有分隔字元時回傳 None"""
+    head, sep, _ = key.partition(SEPARATOR)
+    return head if sep else None
+
+
+def namespaces_of(key: str) -> List[str]:
+    """鍵所屬的所有命名空間，由外而內 ("a:b:c" -> ["a", "a:b"])"""
+    parts = key.split(SEPARATOR)[:-1]
+    return [SEPARATOR.join(parts[: i + 1]) for i in range(len(parts))]
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """
+    前綴範圍查詢的上界: 所有以 prefix 開頭的字串 s 都滿足 prefix <= s < 上界
+
+    讓 SQLite 以主鍵 B-tree 做範圍掃描 (LIKE 'x%' 預設不分大小寫，無法使用索引)。
+    前綴為空或全為最大字元時沒有上界，回傳 None。
+    """
+    stripped = prefix.rstrip(chr(0x10FFFF))
+    if not stripped:
+        return None
+    return stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+
+class NamespaceIndex:
+    """
+    記憶體快取的命名空間索引 — 命名空間 → 鍵集合
+
+    清除整個命名空間時只走訪符合的鍵，不掃描整個快取。
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, Set[str]] = {}
+
+    def add(self, key: str):
+        """索引鍵 (加入鍵所屬的每一層命名空間)"""
+        for namespace in namespaces_of(key):
+            self._keys.setdefault(namespace, set()).add(key)
+
+    def discard(self, key: str):
+        """移除鍵的索引"""
+        for namespace in namespaces_of(key):
+            keys = self._keys.get(namespace)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys[namespace]
+
+    def keys(self, namespace: str) -> Set[str]:
+        """命名空間中的鍵 (副本)"""
+        return set(self._keys.get(namespace, ()))
+
+    def clear(self):
+        self._keys.clear()
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+from typing import Iterable
+from typing import Optional
+
+import discord
+from discord import app_commands
+
+# 已同步指令樹的雜湊紀錄
+DEFAULT_STATE_FILE = "data/storage/command_tree_hash.json"
+# 全域指令的紀錄鍵
+GLOBAL_SCOPE = "global"
+
+
+def parse_guild_ids(value: Optional[str]) -> list:
+    """解析以逗號分隔的伺服器 ID (例如 DEV_GUILD_IDS)"""
+    if not value:
+        return []
+    return [int(part) for part in value.replace(" ", "").split(",") if part.isdigit()]
+
+
+def tree_payload(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> list:
+    """指令樹中某範圍 (全域或單一伺服器) 的序列化內容，與同步時送出的一致"""
+    commands = tree.get_commands(guild=guild)
+    payload = [command.to_dict() for command in commands]
+    # 以類型與名稱排序，使雜湊不受 Cog 載入順序影響
+    payload.sort(key=lambda item: (item.get("type", 1), item["name"]))
+    return payload
+
+
+def tree_hash(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """指令樹內容的穩定雜湊"""
+    encoded = json.dumps(
+        tree_payload(tree, guild), sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CommandSyncCache:
+    """
+    指令同步快取 — 指令樹未變更時略過同步
+
+    每個範圍 (全域或伺服器) 記錄最後一次成功同步的雜湊，並以應用程式 ID
+    區分，切換機器人帳號時會重新同步。
+    """
+
+    def __init__(self, state_file: str = DEFAULT_STATE_FILE):
+        self.state_file = state_file
+        self.state = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        with open(self.state_file, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+
+    def _scopes(self, application_id: Optional[int]) -> dict:
+        return self.state.setdefault(str(application_id), {})
+
+    def is_current(self, application_id: Optional[int], scope: str, digest: str) -> bool:
+        """該範圍是否已以相同雜湊同步過"""
+        return self.state.get(str(application_id), {}).get(scope) == digest
+
+    def mark_synced(self, application_id: Optional[int], scope: str, digest: str):
+        """記錄同步成功"""
+        self._scopes(application_id)[scope] = digest
+        self._save()
+
+    async def sync(
+        self,
+        tree: app_commands.CommandTree,
+        guild_ids: Iterable[int] = (),
+        force: bool = False,
+    ) -> dict:
+        """
+        依需要同步指令樹
+
+        Args:
+            tree: 指令樹
+            guild_ids: 開發用伺服器；指定時將全域指令複製到這些伺服器並只同步它們
+                (伺服器指令即時生效，且不動到全域指令)
+            force: 忽略快取強制同步
+
+        Returns:
+            {範圍: "synced" | "skipped"}
+        """
+        application_id = tree.client.application_id
+        guild_ids = list(guild_ids)
+        if guild_ids:
+            targets = []
+            for guild_id in guild_ids:
+                guild = discord.Object(id=guild_id)
+                tree.copy_global_to(guild=guild)
+                targets.append((str(guild_id), guild))
+        else:
+            targets = [(GLOBAL_SCOPE, None)]
+
+        results = {}
+        for scope, guild in targets:
+            digest = tree_hash(tree, guild)
+            if not force and self.is_current(application_id, scope, digest):
+                results[scope] = "skipped"
+                continue
+            await tree.sync(guild=guild)
+            self.mark_synced(application_id, scope, digest)
+            results[scope] = "synced"
+        return results
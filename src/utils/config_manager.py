@@ -7,6 +7,8 @@ import os
 import time
 from typing import Optional
 
+from src.utils.json_store import get_json_store
+
 CONFIG_FILE = "data/config/bot.json"
 MESSAGES_LOG_FILE = "data/logs/messages/訊息.json"
 DATA_DIR = "data"
@@ -15,19 +17,11 @@ DATA_DIR = "data"
 TZ_OFFSET = timezone(timedelta(hours=8))
 
 # ───────────── 記憶體快取層 ─────────────
-_config_cache: Optional[dict] = None
-_config_cache_time: float = 0
-_CONFIG_CACHE_TTL: float = 30.0  # 30 秒 TTL
+# 記憶體副本為事實來源，修改後延遲寫回磁碟
+_config_store = get_json_store(CONFIG_FILE, default=lambda: {"guilds": {}})
 _config_lock = asyncio.Lock()
 
 
-def _invalidate_config_cache():
-    """主動使快取失效"""
-    global _config_cache, _config_cache_time
-    _config_cache = None
-    _config_cache_time = 0
-
-
 def ensure_data_dir():
     """確保數據目錄存在"""
     directories = ["data", "data/config", "data/storage", "data/logs/messages"]
@@ -37,29 +31,13 @@ def ensure_data_dir():
 
 
 def load_config():
-    """載入配置檔案 (帶記憶體快取)"""
-    global _config_cache, _config_cache_time
-
-    now = time.monotonic()
-    if _config_cache is not None and (now - _config_cache_time) < _CONFIG_CACHE_TTL:
-        return _config_cache
-
-    if not os.path.exists(CONFIG_FILE):
-        save_config({"guilds": {}})
-
-    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-        _config_cache = json.load(f)
-    _config_cache_time = now
-    return _config_cache
+    """載入配置檔案 (記憶體副本)"""
+    return _config_store.data
 
 
 def save_config(config):
-    """儲存配置檔案並更新快取"""
-    global _config_cache, _config_cache_time
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
-    _config_cache = config
-    _config_cache_time = time.monotonic()
+    """儲存配置檔案 (延遲寫入磁碟)"""
+    _config_store.set(config)
 
 
 def get_guild_log_channel(guild_id: int) -> Optional[int]:
@@ -8,6 +8,8 @@ import time
 from typing import Any, Callable, Dict, Optional, Union
 import weakref
 
+from src.utils.cache_keys import NamespaceIndex
+
 
 class ConfigFileWatcher:
     def __init__(self, file_path: str, callback: Callable):
@@ -53,6 +55,7 @@ class ConfigCache:
         self._cache: Dict[str, Dict] = {}
         self._ttl = ttl
         self._lock = threading.RLock()
+        self._namespaces = NamespaceIndex()
 
     def get(self, key: str) -> Optional[Any]:
         with self._lock:
@@ -61,21 +64,31 @@ class ConfigCache:
                 if time.time() - timestamp < self._ttl:
                     return data
                 else:
-                    del self._cache[key]
+                    self._remove(key)
             return None
 
     def set(self, key: str, value: Any) -> None:
         with self._lock:
             self._cache[key] = (value, time.time())
+            self._namespaces.add(key)
+
+    def _remove(self, key: str) -> None:
+        del self._cache[key]
+        self._namespaces.discard(key)
 
-    def clear(self, pattern: str = None) -> None:
+    def clear(self, pattern: str = None, namespace: str = None) -> None:
+        """清除快取: namespace 只走訪索引中的鍵；pattern 為子字串比對 (掃描全部)"""
         with self._lock:
-            if pattern:
+            if namespace:
+                for k in self._namespaces.keys(namespace):
+                    self._remove(k)
+            elif pattern:
                 keys_to_remove = [k for k in self._cache.keys() if pattern in k]
                 for k in keys_to_remove:
-                    del self._cache[k]
+                    self._remove(k)
             else:
                 self._cache.clear()
+                self._namespaces.clear()
 
     def size(self) -> int:
         with self._lock:
@@ -1,206 +1,642 @@
 import asyncio
+from collections import deque
 import contextlib
 from datetime import datetime
 from datetime import timezone
 import json
+import os
 from pathlib import Path
 import sqlite3
-import threading
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from src.utils.cache_keys import namespace_of
+from src.utils.cache_keys import prefix_upper_bound
+from src.utils.db_migrations import apply_migrations
+from src.utils.metric_rollup import aggregate
+from src.utils.metric_rollup import choose_resolution
+from src.utils.metric_rollup import DEFAULT_RETENTION
+from src.utils.metric_rollup import QuantileSketch
+from src.utils.metric_rollup import RESOLUTIONS
+from src.utils.sqlite_executor import SQLiteExecutor
+
+
+# 連線設定: WAL 讓讀取不阻擋寫入；WAL 下 synchronous=NORMAL 仍維持一致性，
+# 只有斷電時可能遺失最後幾筆已提交的交易
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # 負值以 KiB 計 (64MB)
+    "temp_store": "MEMORY",
+    "busy_timeout": 30000,
+}
+
+
+# record() 緩衝: 達到批次大小或每隔一段時間寫入一次
+FLUSH_BATCH_SIZE = 500
+FLUSH_INTERVAL = 5.0
+MAX_BUFFERED_ROWS = 50000
+
+
+class PoolTimeoutError(TimeoutError):
+    """等待資料庫連線逾時"""
+
+
+class _Slot:
+    """同一種連線 (寫入或讀取) 的閒置連線與等待者"""
+
+    __slots__ = ("capacity", "idle", "waiters", "created", "in_use")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.idle: Deque[sqlite3.Connection] = deque()
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.created = 0
+        self.in_use = 0
 
 
 class DatabaseConnectionPool:
-    def __init__(self, db_path: str, max_connections: int = 10):
+    """
+    asyncio 原生連線池 — 一條寫入連線與 N 條唯讀連線
+
+    連線只在事件迴圈執行緒上使用 (不跨執行緒共用)，取用時不持有任何執行緒鎖。
+    連線不足時依先來後到排隊: 歸還的連線直接交給最早的等待者，
+    後到的呼叫者不會插隊；等待超過 timeout 時拋出 PoolTimeoutError。
+    閒置超過 health_check_interval 的連線在交出前先以 SELECT 1 檢查，失效時重建。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        readers: int = 2,
+        pragmas: Optional[Dict[str, Any]] = None,
+        timeout: float = 30.0,
+        health_check_interval: float = 60.0,
+    ):
+        """
+        初始化連線池
+
+        Args:
+            db_path: 資料庫路徑
+            readers: 唯讀連線上限 (0 表示讀取也使用寫入連線；":memory:" 固定為 0)
+            pragmas: 連線 PRAGMA 設定 (預設 DEFAULT_PRAGMAS)
+            timeout: 預設的取用等待秒數
+            health_check_interval: 閒置多久後於取用時檢查連線
+        """
         self.db_path = db_path
-        self.max_connections = max_connections
-        self._pool = asyncio.Queue(maxsize=max_connections)
-        self._lock = threading.Lock()
-        self._created_connections = 0
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.memory = db_path == ":memory:"
+        self._slots = {
+            "write": _Slot(1),
+            "read": _Slot(0 if self.memory else readers),
+        }
+        self._last_used: Dict[int, float] = {}
+        self._closed = False
+        self.stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "replaced": 0,
+            "wait_time": 0.0,
+            "max_wait": 0.0,
+        }
+
+        if not self.memory:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._initialize_database()
 
-        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-        self._initialize_database()
+    def configure(self, conn: sqlite3.Connection):
+        """套用連線設定 (journal_mode=WAL 會保存在資料庫檔案中)"""
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
 
     def _initialize_database(self):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS cache_entries (
-                    key TEXT PRIMARY KEY,
-                    value TEXT,
-                    timestamp REAL,
-                    ttl REAL
-                )
-            """)
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    metric_name TEXT,
-                    value REAL,
-                    timestamp REAL,
-                    metadata TEXT
-                )
-            """)
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS audit_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    action TEXT,
-                    user_id TEXT,
-                    guild_id TEXT,
-                    timestamp REAL,
-                    details TEXT
-                )
-            """)
+        with contextlib.closing(sqlite3.connect(self.db_path)) as conn:
+            self.configure(conn)
+            self.create_schema(conn)
 
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_cache_timestamp ON cache_entries(timestamp)
-            """)
+    def create_schema(self, conn: sqlite3.Connection):
+        """建立或升級資料表與索引 (見 db_migrations)"""
+        apply_migrations(conn)
 
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics(timestamp)
-            """)
+    # --- 連線 ---
 
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_logs(timestamp)
-            """)
+    def _connect(self, kind: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        self.configure(conn)
+        if kind == "read":
+            conn.execute("PRAGMA query_only=ON")
+        elif self.memory:
+            # 記憶體資料庫只存在於這條連線
+            self.create_schema(conn)
+        return conn
 
-            conn.commit()
+    def _healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _replace(self, kind: str, conn: sqlite3.Connection) -> sqlite3.Connection:
+        self._discard(conn)
+        self.stats["replaced"] += 1
+        return self._connect(kind)
+
+    def _discard(self, conn: sqlite3.Connection):
+        self._last_used.pop(id(conn), None)
+        with contextlib.suppress(sqlite3.Error):
+            conn.close()
+
+    def _kind(self, write: bool) -> str:
+        # 沒有唯讀連線時讀取改用寫入連線
+        if write or not self._slots["read"].capacity:
+            return "write"
+        return "read"
 
-    async def get_connection(self) -> sqlite3.Connection:
+    async def acquire(self, write: bool = False, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """
+        取用連線 (需以 release 歸還；建議使用 connection())
+
+        Raises:
+            PoolTimeoutError: 等待超過 timeout 秒 (預設 self.timeout)
+        """
+        if self._closed:
+            raise RuntimeError("連線池已關閉")
+        kind = self._kind(write)
+        slot = self._slots[kind]
+        started = time.monotonic()
+        if slot.idle and not slot.waiters:
+            conn = slot.idle.pop()
+        elif slot.created < slot.capacity:
+            conn = self._connect(kind)
+            slot.created += 1
+        else:
+            conn = await self._wait(slot, self.timeout if timeout is None else timeout)
+
+        idle_since = self._last_used.get(id(conn))
+        if idle_since is not None and time.monotonic() - idle_since > self.health_check_interval:
+            if not self._healthy(conn):
+                conn = self._replace(kind, conn)
+        slot.in_use += 1
+        waited = time.monotonic() - started
+        self.stats["checkouts"] += 1
+        self.stats["wait_time"] += waited
+        self.stats["max_wait"] = max(self.stats["max_wait"], waited)
+        return conn
+
+    async def _wait(self, slot: _Slot, timeout: float) -> sqlite3.Connection:
+        waiter = asyncio.get_running_loop().create_future()
+        slot.waiters.append(waiter)
         try:
-            conn = self._pool.get_nowait()
-            return conn
-        except asyncio.QueueEmpty:
-            with self._lock:
-                if self._created_connections < self.max_connections:
-                    self._created_connections += 1
-                    conn = sqlite3.connect(self.db_path, check_same_thread=False)
-                    conn.row_factory = sqlite3.Row
-                    return conn
-                else:
-                    conn = await self._pool.get()
-                    return conn
-
-    async def return_connection(self, conn: sqlite3.Connection):
+            done, _ = await asyncio.wait({waiter}, timeout=timeout)
+        except BaseException:
+            # 呼叫者被取消: 已經拿到的連線要還回去
+            if waiter.done() and not waiter.cancelled():
+                self._hand_off(slot, waiter.result())
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            with contextlib.suppress(ValueError):
+                slot.waiters.remove(waiter)
+        if not done:
+            waiter.cancel()
+            self.stats["timeouts"] += 1
+            raise PoolTimeoutError(f"等待資料庫連線超過 {timeout} 秒")
+        return waiter.result()
+
+    def _hand_off(self, slot: _Slot, conn: sqlite3.Connection):
+        while slot.waiters:
+            waiter = slot.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(conn)
+                return
+        slot.idle.append(conn)
+
+    def release(self, conn: sqlite3.Connection, write: bool = False):
+        """歸還連線"""
+        kind = self._kind(write)
+        slot = self._slots[kind]
+        slot.in_use -= 1
+        if self._closed:
+            slot.created -= 1
+            self._discard(conn)
+            return
+        if conn.in_transaction:
+            # 呼叫者未結束的交易不可留給下一位
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                conn = self._replace(kind, conn)
+        self._last_used[id(conn)] = time.monotonic()
+        self._hand_off(slot, conn)
+
+    @contextlib.asynccontextmanager
+    async def connection(self, write: bool = False, timeout: Optional[float] = None):
+        """取用連線的 async context manager"""
+        conn = await self.acquire(write, timeout)
         try:
-            self._pool.put_nowait(conn)
-        except asyncio.QueueFull:
-            conn.close()
-            with self._lock:
-                self._created_connections -= 1
+            yield conn
+        finally:
+            self.release(conn, write)
+
+    async def health_check(self) -> Dict[str, int]:
+        """檢查所有閒置連線，重建失效者"""
+        checked = replaced = 0
+        for kind, slot in self._slots.items():
+            for index, conn in enumerate(list(slot.idle)):
+                checked += 1
+                if not self._healthy(conn):
+                    slot.idle[index] = self._replace(kind, conn)
+                    replaced += 1
+                await asyncio.sleep(0)
+        return {"checked": checked, "replaced": replaced}
+
+    def close(self):
+        """關閉閒置連線；使用中的連線在歸還時關閉"""
+        self._closed = True
+        for slot in self._slots.values():
+            while slot.idle:
+                self._discard(slot.idle.pop())
+                slot.created -= 1
+            while slot.waiters:
+                slot.waiters.popleft().cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """連線池統計: 建立數、使用中、閒置、等待中與等待時間"""
+        stats = {
+            "checkouts": self.stats["checkouts"],
+            "timeouts": self.stats["timeouts"],
+            "replaced": self.stats["replaced"],
+            "avg_wait_ms": (
+                self.stats["wait_time"] / self.stats["checkouts"] * 1000
+                if self.stats["checkouts"]
+                else 0.0
+            ),
+            "max_wait_ms": self.stats["max_wait"] * 1000,
+        }
+        for kind, slot in self._slots.items():
+            stats[kind] = {
+                "capacity": slot.capacity,
+                "created": slot.created,
+                "in_use": slot.in_use,
+                "idle": len(slot.idle),
+                "waiting": len(slot.waiters),
+            }
+        return stats
 
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "data/storage/bot_database.db"):
-        self.pool = DatabaseConnectionPool(db_path)
+    def __init__(
+        self,
+        db_path: str = "data/storage/bot_database.db",
+        threaded: Optional[bool] = None,
+        readers: Optional[int] = None,
+        pragmas: Optional[Dict[str, Any]] = None,
+        commit_window: float = 0.002,
+        metric_retention: Optional[Dict[str, float]] = None,
+    ):
+        """
+        初始化資料庫管理器
+
+        Args:
+            db_path: 資料庫路徑
+            threaded: 是否以專用執行緒執行所有 SQLite 工作；未指定時讀取
+                DATABASE_EXECUTOR ("thread" 預設 / "inline" 直接在事件迴圈執行)
+            readers: 讀取執行緒 (行內模式為唯讀連線) 數量；未指定時讀取
+                DATABASE_READERS (預設 1)
+            pragmas: 連線 PRAGMA 設定 (預設 DEFAULT_PRAGMAS)
+            commit_window: 群組提交等待後續寫入的秒數 (僅執行緒模式)
+            metric_retention: 各解析度 ("raw"、"1m"、"1h") 的保存秒數，
+                未指定的項目使用 DEFAULT_RETENTION
+        """
         self._cleanup_task = None
+        self.metric_retention = {**DEFAULT_RETENTION, **(metric_retention or {})}
+        # record() / record_audit() 的記憶體緩衝，批次寫入
+        self._metric_buffer: List[tuple] = []
+        self._audit_buffer: List[tuple] = []
+        self._flush_task = None
+        self._flushing = None
+        self.buffer_stats = {"buffered": 0, "flushed": 0, "dropped": 0, "requeued": 0}
+        if threaded is None:
+            threaded = os.getenv("DATABASE_EXECUTOR", "thread").lower() != "inline"
+        if readers is None:
+            readers = int(os.getenv("DATABASE_READERS", "1"))
+        # 行內模式的連線池 (執行緒模式只用來建立資料表與提供連線設定)
+        self.pool = DatabaseConnectionPool(db_path, readers=readers, pragmas=pragmas)
+        configure = self.pool.configure
+        if db_path == ":memory:":
+            # 記憶體資料庫的每條連線各自獨立: 不使用讀取執行緒，
+            # 並在寫入執行緒的連線上建立資料表
+            readers = 0
+
+            def configure(conn: sqlite3.Connection):
+                self.pool.configure(conn)
+                self.pool.create_schema(conn)
+
+        self.executor = None
+        if threaded:
+            self.executor = SQLiteExecutor(
+                db_path,
+                readers=readers,
+                configure=configure,
+                commit_window=commit_window,
+            )
 
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
         if self._cleanup_task:
             self._cleanup_task.cancel()
+            self._cleanup_task = None
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        if self.executor is not None:
+            await self.executor.close()
+        self.pool.close()
 
-    @contextlib.asynccontextmanager
-    async def get_connection(self):
-        conn = await self.pool.get_connection()
-        try:
-            yield conn
-        finally:
-            await self.pool.return_connection(conn)
+    def get_connection(self, write: bool = True):
+        """取用行內模式的連線 (async context manager)"""
+        return self.pool.connection(write)
 
-    async def cache_set(self, key: str, value: Any, ttl: int = 300) -> bool:
-        try:
-            async with self.get_connection() as conn:
-                timestamp = time.time()
-                value_json = json.dumps(value, default=str)
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """資料庫連線統計 (執行緒模式為執行器佇列，行內模式為連線池)"""
+        if self.executor is not None:
+            return {"mode": "thread", **self.executor.get_stats()}
+        return {"mode": "inline", **self.pool.get_stats()}
 
-                conn.execute(
-                    """
-                    INSERT OR REPLACE INTO cache_entries (key, value, timestamp, ttl)
-                    VALUES (?, ?, ?, ?)
+    async def _write(self, func, *args):
+        """執行會修改資料的工作 func(conn, *args) (由此處負責提交)"""
+        if self.executor is not None:
+            return await self.executor.write(func, *args)
+        async with self.get_connection(write=True) as conn:
+            try:
+                result = func(conn, *args)
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
+            return result
+
+    async def _read(self, func, *args):
+        """執行唯讀工作 func(conn, *args)"""
+        if self.executor is not None:
+            return await self.executor.read(func, *args)
+        async with self.get_connection(write=False) as conn:
+            return func(conn, *args)
+
+    # --- SQL 工作 (在資料庫執行緒中執行；不自行提交，見 _write) ---
+
+    @staticmethod
+    def _cache_set(
+        conn: sqlite3.Connection, key: str, value_json: str, ttl: int, namespace: Optional[str]
+    ) -> bool:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO cache_entries (key, value, timestamp, ttl, namespace)
+            VALUES (?, ?, ?, ?, ?)
+        """,
+            (key, value_json, time.time(), ttl, namespace),
+        )
+        return True
+
+    @staticmethod
+    def _cache_get(conn: sqlite3.Connection, key: str) -> Optional[sqlite3.Row]:
+        cursor = conn.execute(
+            """
+            SELECT value, timestamp, ttl FROM cache_entries
+            WHERE key = ?
+        """,
+            (key,),
+        )
+        return cursor.fetchone()
+
+    @staticmethod
+    def _delete_where(conn: sqlite3.Connection, sql: str, params: tuple) -> int:
+        return conn.execute(sql, params).rowcount
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, sql: str, params: tuple) -> bool:
+        conn.execute(sql, params)
+        return True
+
+    @staticmethod
+    def _insert_many(conn: sqlite3.Connection, sql: str, rows: List[tuple]) -> int:
+        conn.executemany(sql, rows)
+        return len(rows)
+
+    @staticmethod
+    def _fetch_all(conn: sqlite3.Connection, sql: str, params: tuple) -> List[Dict]:
+        return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _rollup_batch(conn: sqlite3.Connection, limit: int) -> int:
+        """將尚未彙總的原始指標併入各解析度的彙總表，回傳處理筆數"""
+        row = conn.execute(
+            "SELECT last_id FROM metric_rollup_state WHERE name = 'metrics'"
+        ).fetchone()
+        last_id = row[0] if row else 0
+        rows = conn.execute(
+            """
+            SELECT id, metric_name, value, timestamp FROM metrics
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        """,
+            (last_id, limit),
+        ).fetchall()
+        if not rows:
+            return 0
+        samples = [(r[1], r[2], r[3]) for r in rows]
+        for resolution, step in RESOLUTIONS.items():
+            table = f"metrics_{resolution}"
+            merged = []
+            for (name, start), bucket in aggregate(samples, step).items():
+                # 晚到的資料併入已存在的時間桶
+                existing = conn.execute(
+                    f"""
+                    SELECT count, sum, min, max, sketch FROM {table}
+                    WHERE metric_name = ? AND bucket = ?
                 """,
-                    (key, value_json, timestamp, ttl),
+                    (name, start),
+                ).fetchone()
+                if existing:
+                    bucket.merge_row(*existing)
+                merged.append(
+                    (
+                        name,
+                        start,
+                        bucket.count,
+                        bucket.total,
+                        bucket.minimum,
+                        bucket.maximum,
+                        bucket.sketch.to_json(),
+                    )
                 )
+            conn.executemany(
+                f"""
+                INSERT OR REPLACE INTO {table}
+                (metric_name, bucket, count, sum, min, max, sketch)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                merged,
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO metric_rollup_state (name, last_id) VALUES ('metrics', ?)",
+            (rows[-1][0],),
+        )
+        return len(rows)
+
+    @staticmethod
+    def _apply_retention(
+        conn: sqlite3.Connection, now: float, retention: Dict[str, float]
+    ) -> Dict[str, int]:
+        """刪除超過保存期限的指標 (原始資料只刪除已彙總的部分)"""
+        row = conn.execute(
+            "SELECT last_id FROM metric_rollup_state WHERE name = 'metrics'"
+        ).fetchone()
+        deleted = {
+            "raw": conn.execute(
+                "DELETE FROM metrics WHERE timestamp < ? AND id <= ?",
+                (now - retention["raw"], row[0] if row else 0),
+            ).rowcount
+        }
+        for resolution, step in RESOLUTIONS.items():
+            # 只刪除整個時間桶都已過期的列
+            deleted[resolution] = conn.execute(
+                f"DELETE FROM metrics_{resolution} WHERE bucket + ? < ?",
+                (step, now - retention[resolution]),
+            ).rowcount
+        return deleted
+
+    @staticmethod
+    def _cache_counts(conn: sqlite3.Connection, now: float) -> Dict[str, int]:
+        total = conn.execute("SELECT COUNT(*) as total FROM cache_entries").fetchone()["total"]
+        expired = conn.execute(
+            """
+            SELECT COUNT(*) as expired FROM cache_entries
+            WHERE timestamp + ttl < ?
+        """,
+            (now,),
+        ).fetchone()["expired"]
+        return {
+            "total_entries": total,
+            "expired_entries": expired,
+            "valid_entries": total - expired,
+        }
+
+    # --- 公開 API ---
 
-                conn.commit()
-                return True
+    async def cache_set(
+        self, key: str, value: Any, ttl: int = 300, namespace: Optional[str] = None
+    ) -> bool:
+        """
+        寫入快取
+
+        Args:
+            key: 快取鍵 (建議以 "命名空間:..." 命名)
+            value: 可序列化為 JSON 的值
+            ttl: 存活秒數
+            namespace: 命名空間；未指定時取鍵中第一個 ":" 之前的部分
+        """
+        try:
+            value_json = json.dumps(value, default=str)
+            if namespace is None:
+                namespace = namespace_of(key)
+            return await self._write(self._cache_set, key, value_json, ttl, namespace)
         except Exception as e:
             print(f"[Database] Cache set error: {e}")
             return False
 
     async def cache_get(self, key: str) -> Optional[Any]:
-        try:
-            async with self.get_connection() as conn:
-                cursor = conn.execute(
-                    """
-                    SELECT value, timestamp, ttl FROM cache_entries
-                    WHERE key = ?
-                """,
-                    (key,),
-                )
+        entry = await self.cache_get_entry(key)
+        return entry[0] if entry else None
 
-                row = cursor.fetchone()
-                if not row:
-                    return None
+    async def cache_get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """取得快取值與到期時間戳 (time.time())，不存在或已過期時回傳 None"""
+        try:
+            row = await self._read(self._cache_get, key)
+            if not row:
+                return None
 
-                current_time = time.time()
-                if current_time - row["timestamp"] > row["ttl"]:
-                    conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
-                    conn.commit()
-                    return None
+            current_time = time.time()
+            if current_time - row["timestamp"] > row["ttl"]:
+                await self._write(
+                    self._delete_where, "DELETE FROM cache_entries WHERE key = ?", (key,)
+                )
+                return None
 
-                return json.loads(row["value"])
+            return json.loads(row["value"]), row["timestamp"] + row["ttl"]
         except Exception as e:
             print(f"[Database] Cache get error: {e}")
             return None
 
     async def cache_delete(self, key: str) -> bool:
         try:
-            async with self.get_connection() as conn:
-                conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
-                conn.commit()
-                return True
+            await self._write(
+                self._delete_where, "DELETE FROM cache_entries WHERE key = ?", (key,)
+            )
+            return True
         except Exception as e:
             print(f"[Database] Cache delete error: {e}")
             return False
 
-    async def cache_clear_pattern(self, pattern: str) -> int:
+    async def cache_clear_namespace(self, namespace: str) -> int:
+        """刪除命名空間中的所有快取 (使用 namespace 索引)，回傳刪除筆數"""
         try:
-            async with self.get_connection() as conn:
-                cursor = conn.execute(
-                    """
-                    DELETE FROM cache_entries WHERE key LIKE ?
-                """,
-                    (f"%{pattern}%",),
-                )
+            return await self._write(
+                self._delete_where,
+                "DELETE FROM cache_entries WHERE namespace = ?",
+                (namespace,),
+            )
+        except Exception as e:
+            print(f"[Database] Cache clear namespace error: {e}")
+            return 0
 
-                conn.commit()
-                return cursor.rowcount
+    async def cache_clear_prefix(self, prefix: str) -> int:
+        """刪除鍵以 prefix 開頭的快取 (主鍵範圍掃描，大小寫有別)，回傳刪除筆數"""
+        upper = prefix_upper_bound(prefix)
+        try:
+            if upper is None:
+                return await self._write(
+                    self._delete_where, "DELETE FROM cache_entries WHERE key >= ?", (prefix,)
+                )
+            return await self._write(
+                self._delete_where,
+                "DELETE FROM cache_entries WHERE key >= ? AND key < ?",
+                (prefix, upper),
+            )
         except Exception as e:
-            print(f"[Database] Cache clear pattern error: {e}")
+            print(f"[Database] Cache clear prefix error: {e}")
             return 0
 
+    async def cache_clear_pattern(self, pattern: str) -> int:
+        """刪除鍵以 pattern 開頭的快取 (只支援前綴比對，見 cache_clear_prefix)"""
+        return await self.cache_clear_prefix(pattern)
+
     async def store_metric(
         self, metric_name: str, value: float, metadata: Dict = None
     ) -> bool:
         try:
-            async with self.get_connection() as conn:
-                timestamp = time.time()
-                metadata_json = json.dumps(metadata or {})
-
-                conn.execute(
-                    """
-                    INSERT INTO metrics (metric_name, value, timestamp, metadata)
-                    VALUES (?, ?, ?, ?)
-                """,
-                    (metric_name, value, timestamp, metadata_json),
-                )
-
-                conn.commit()
-                return True
+            metadata_json = json.dumps(metadata or {})
+            return await self._write(
+                self._insert,
+                """
+                INSERT INTO metrics (metric_name, value, timestamp, metadata)
+                VALUES (?, ?, ?, ?)
+            """,
+                (metric_name, value, time.time(), metadata_json),
+            )
         except Exception as e:
             print(f"[Database] Store metric error: {e}")
             return False
@@ -209,28 +645,26 @@ class DatabaseManager:
         self, metric_name: str = None, limit: int = 100
     ) -> List[Dict]:
         try:
-            async with self.get_connection() as conn:
-                if metric_name:
-                    cursor = conn.execute(
-                        """
-                        SELECT * FROM metrics
-                        WHERE metric_name = ?
-                        ORDER BY timestamp DESC
-                        LIMIT ?
-                    """,
-                        (metric_name, limit),
-                    )
-                else:
-                    cursor = conn.execute(
-                        """
-                        SELECT * FROM metrics
-                        ORDER BY timestamp DESC
-                        LIMIT ?
-                    """,
-                        (limit,),
-                    )
-
-                return [dict(row) for row in cursor.fetchall()]
+            if metric_name:
+                return await self._read(
+                    self._fetch_all,
+                    """
+                    SELECT * FROM metrics
+                    WHERE metric_name = ?
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                """,
+                    (metric_name, limit),
+                )
+            return await self._read(
+                self._fetch_all,
+                """
+                SELECT * FROM metrics
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """,
+                (limit,),
+            )
         except Exception as e:
             print(f"[Database] Get metrics error: {e}")
             return []
@@ -243,67 +677,382 @@ class DatabaseManager:
         details: Dict = None,
     ) -> bool:
         try:
-            async with self.get_connection() as conn:
-                timestamp = time.time()
-                details_json = json.dumps(details or {})
+            details_json = json.dumps(details or {})
+            return await self._write(
+                self._insert,
+                """
+                INSERT INTO audit_logs (action, user_id, guild_id, timestamp, details)
+                VALUES (?, ?, ?, ?, ?)
+            """,
+                (action, user_id, guild_id, time.time(), details_json),
+            )
+        except Exception as e:
+            print(f"[Database] Audit log error: {e}")
+            return False
 
-                conn.execute(
-                    """
-                    INSERT INTO audit_logs (action, user_id, guild_id, timestamp, details)
-                    VALUES (?, ?, ?, ?, ?)
-                """,
-                    (action, user_id, guild_id, timestamp, details_json),
+    async def search_audit(
+        self,
+        guild_id: str,
+        user_id: str = None,
+        action: str = None,
+        since: float = None,
+        until: float = None,
+        after: Optional[Tuple[float, int]] = None,
+        limit: int = 10,
+    ) -> Tuple[List[Dict], Optional[Tuple[float, int]]]:
+        """
+        查詢伺服器的審計紀錄 (新到舊，鍵集分頁)
+
+        以 (timestamp, id) 作為游標，每頁都從索引上的游標位置開始讀取，
+        不使用 OFFSET，頁數再深也只讀取 limit 筆。
+
+        Args:
+            guild_id: 伺服器 ID
+            user_id: 只查詢此用戶
+            action: 只查詢此動作
+            since: 起始時間戳 (含)
+            until: 結束時間戳 (不含)
+            after: 上一頁回傳的游標 (None 表示第一頁)
+            limit: 每頁筆數
+
+        Returns:
+            (紀錄列表, 下一頁游標；沒有下一頁時為 None)
+        """
+        clauses = ["guild_id = ?"]
+        params: List[Any] = [str(guild_id)]
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(str(user_id))
+        if action is not None:
+            clauses.append("action = ?")
+            params.append(action)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if after is not None:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(after)
+        params.append(limit + 1)
+        try:
+            rows = await self._read(
+                self._fetch_all,
+                f"""
+                SELECT id, action, user_id, guild_id, timestamp, details FROM audit_logs
+                WHERE {" AND ".join(clauses)}
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            """,
+                tuple(params),
+            )
+        except Exception as e:
+            print(f"[Database] Audit search error: {e}")
+            return [], None
+        for row in rows:
+            row["details"] = json.loads(row["details"]) if row["details"] else {}
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, (rows[-1]["timestamp"], rows[-1]["id"])
+        return rows, None
+
+    async def store_metrics_batch(self, metrics: Iterable[tuple]) -> int:
+        """
+        批次寫入指標 (單一 executemany 與交易)
+
+        Args:
+            metrics: (metric_name, value[, metadata[, timestamp]]) 的序列
+
+        Returns:
+            寫入的筆數 (失敗時為 0)
+        """
+        now = time.time()
+        try:
+            rows = []
+            for metric in metrics:
+                name, value = metric[0], metric[1]
+                metadata = metric[2] if len(metric) > 2 else None
+                timestamp = metric[3] if len(metric) > 3 else now
+                rows.append((name, value, timestamp, json.dumps(metadata or {})))
+            if not rows:
+                return 0
+            return await self._write(
+                self._insert_many,
+                """
+                INSERT INTO metrics (metric_name, value, timestamp, metadata)
+                VALUES (?, ?, ?, ?)
+            """,
+                rows,
+            )
+        except Exception as e:
+            print(f"[Database] Store metrics batch error: {e}")
+            return 0
+
+    async def log_audit_batch(self, entries: Iterable[Dict]) -> int:
+        """
+        批次寫入審計紀錄 (單一 executemany 與交易)
+
+        Args:
+            entries: 含 action 與選填 user_id、guild_id、details、timestamp 的字典
+
+        Returns:
+            寫入的筆數 (失敗時為 0)
+        """
+        now = time.time()
+        try:
+            rows = [
+                (
+                    entry["action"],
+                    entry.get("user_id"),
+                    entry.get("guild_id"),
+                    entry.get("timestamp", now),
+                    json.dumps(entry.get("details") or {}),
                 )
+                for entry in entries
+            ]
+            if not rows:
+                return 0
+            return await self._write(
+                self._insert_many,
+                """
+                INSERT INTO audit_logs (action, user_id, guild_id, timestamp, details)
+                VALUES (?, ?, ?, ?, ?)
+            """,
+                rows,
+            )
+        except Exception as e:
+            print(f"[Database] Audit log batch error: {e}")
+            return 0
+
+    # --- 緩衝寫入 (高頻率來源) ---
+
+    def record(self, metric_name: str, value: float, metadata: Dict = None):
+        """記錄指標到記憶體緩衝 (不等待 I/O)，由背景批次寫入"""
+        self._buffer(self._metric_buffer, (metric_name, value, metadata, time.time()))
 
-                conn.commit()
-                return True
+    def record_audit(
+        self,
+        action: str,
+        user_id: str = None,
+        guild_id: str = None,
+        details: Dict = None,
+    ):
+        """記錄審計事件到記憶體緩衝 (不等待 I/O)，由背景批次寫入"""
+        self._buffer(
+            self._audit_buffer,
+            {
+                "action": action,
+                "user_id": user_id,
+                "guild_id": guild_id,
+                "details": details,
+                "timestamp": time.time(),
+            },
+        )
+
+    def _buffer(self, buffer: list, row):
+        if len(buffer) >= MAX_BUFFERED_ROWS:
+            # 寫入持續失敗時保護記憶體
+            self.buffer_stats["dropped"] += 1
+            return
+        buffer.append(row)
+        self.buffer_stats["buffered"] += 1
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # 無事件迴圈時等待 flush() 或 close()
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush_loop())
+        if len(buffer) >= FLUSH_BATCH_SIZE and self._flushing is None:
+            self._flushing = asyncio.ensure_future(self._threshold_flush())
+
+    async def _threshold_flush(self):
+        # 只有由門檻觸發的這個任務會清除 _flushing
+        try:
+            await self.flush()
+        finally:
+            self._flushing = None
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[Database] Buffer flush error: {e}")
+
+    async def flush(self) -> int:
+        """
+        立即寫入緩衝中的指標與審計紀錄，回傳寫入筆數
+
+        寫入失敗的資料放回緩衝前端，下次 flush 重試 (總數仍受 MAX_BUFFERED_ROWS 限制)。
+        """
+        metrics, self._metric_buffer = self._metric_buffer, []
+        audits, self._audit_buffer = self._audit_buffer, []
+        written = 0
+        if metrics:
+            count = await self.store_metrics_batch(metrics)
+            if count:
+                written += count
+            else:
+                self._metric_buffer = self._requeue(metrics, self._metric_buffer)
+        if audits:
+            count = await self.log_audit_batch(audits)
+            if count:
+                written += count
+            else:
+                self._audit_buffer = self._requeue(audits, self._audit_buffer)
+        self.buffer_stats["flushed"] += written
+        return written
+
+    def _requeue(self, failed: list, buffer: list) -> list:
+        """將寫入失敗的資料放回緩衝前端，超過上限時捨棄最舊的資料"""
+        merged = failed + buffer
+        overflow = len(merged) - MAX_BUFFERED_ROWS
+        if overflow > 0:
+            del merged[:overflow]
+            self.buffer_stats["dropped"] += overflow
+        self.buffer_stats["requeued"] += max(0, len(failed) - max(overflow, 0))
+        return merged
+
+    # --- 指標降採樣 ---
+
+    async def rollup_metrics(self, batch_size: int = 10000) -> int:
+        """
+        將新的原始指標彙總到 1m / 1h 資料表
+
+        每批在寫入執行緒上一個交易完成，批次之間讓出給其他寫入。
+
+        Returns:
+            彙總的原始資料筆數
+        """
+        total = 0
+        try:
+            while True:
+                processed = await self._write(self._rollup_batch, batch_size)
+                total += processed
+                if processed < batch_size:
+                    return total
         except Exception as e:
-            print(f"[Database] Audit log error: {e}")
-            return False
+            print(f"[Database] Metric rollup error: {e}")
+            return total
 
-    async def cleanup_expired_cache(self) -> int:
+    async def apply_metric_retention(self) -> Dict[str, int]:
+        """依 metric_retention 刪除過期的原始與彙總指標，回傳各解析度刪除筆數"""
+        try:
+            return await self._write(
+                self._apply_retention, time.time(), self.metric_retention
+            )
+        except Exception as e:
+            print(f"[Database] Metric retention error: {e}")
+            return {}
+
+    async def query_metrics(
+        self,
+        metric_name: str,
+        start: float,
+        end: float = None,
+        resolution: str = None,
+        max_points: int = 500,
+        quantiles: Iterable[float] = (0.5, 0.95, 0.99),
+    ) -> Dict[str, Any]:
+        """
+        查詢時間範圍內的指標，自動選擇最便宜的解析度
+
+        Args:
+            metric_name: 指標名稱
+            start: 起始時間戳
+            end: 結束時間戳 (預設現在)
+            resolution: 指定解析度 ("raw"、"1m"、"1h")；未指定時依範圍與保存期選擇
+            max_points: 自動選擇時每個查詢的最大資料點數
+            quantiles: 每個資料點要估計的分位數
+
+        Returns:
+            {"resolution": 解析度, "points": [{bucket, count, sum, min, max, avg, p50...}]}
+            原始資料的每一筆視為 count 為 1 的資料點
+        """
+        now = time.time()
+        end = now if end is None else end
+        if resolution is None:
+            resolution = choose_resolution(
+                start, end, now, self.metric_retention, max_points
+            )
+        if resolution != "raw" and resolution not in RESOLUTIONS:
+            raise ValueError(f"未知的解析度: {resolution}")
+        quantiles = tuple(quantiles)
         try:
-            async with self.get_connection() as conn:
-                current_time = time.time()
-                cursor = conn.execute(
+            if resolution == "raw":
+                rows = await self._read(
+                    self._fetch_all,
                     """
-                    DELETE FROM cache_entries
-                    WHERE timestamp + ttl < ?
+                    SELECT value, timestamp FROM metrics
+                    WHERE metric_name = ? AND timestamp >= ? AND timestamp < ?
+                    ORDER BY timestamp
                 """,
-                    (current_time,),
+                    (metric_name, start, end),
                 )
+                points = []
+                for row in rows:
+                    value = row["value"]
+                    point = {
+                        "bucket": row["timestamp"],
+                        "count": 1,
+                        "sum": value,
+                        "min": value,
+                        "max": value,
+                        "avg": value,
+                    }
+                    point.update({f"p{round(q * 100):g}": value for q in quantiles})
+                    points.append(point)
+                return {"resolution": resolution, "points": points}
+
+            step = RESOLUTIONS[resolution]
+            rows = await self._read(
+                self._fetch_all,
+                f"""
+                SELECT bucket, count, sum, min, max, sketch FROM metrics_{resolution}
+                WHERE metric_name = ? AND bucket > ? AND bucket < ?
+                ORDER BY bucket
+            """,
+                (metric_name, start - step, end),
+            )
+            points = []
+            for row in rows:
+                sketch = QuantileSketch.from_json(row.pop("sketch"))
+                row["avg"] = row["sum"] / row["count"] if row["count"] else None
+                row.update({f"p{round(q * 100):g}": sketch.quantile(q) for q in quantiles})
+                points.append(row)
+            return {"resolution": resolution, "points": points}
+        except Exception as e:
+            print(f"[Database] Query metrics error: {e}")
+            return {"resolution": resolution, "points": []}
 
-                conn.commit()
-                return cursor.rowcount
+    async def cleanup_expired_cache(self) -> int:
+        try:
+            return await self._write(
+                self._delete_where,
+                """
+                DELETE FROM cache_entries
+                WHERE timestamp + ttl < ?
+            """,
+                (time.time(),),
+            )
         except Exception as e:
             print(f"[Database] Cleanup expired cache error: {e}")
             return 0
 
     async def get_cache_stats(self) -> Dict[str, int]:
         try:
-            async with self.get_connection() as conn:
-                cursor = conn.execute("SELECT COUNT(*) as total FROM cache_entries")
-                total = cursor.fetchone()["total"]
-
-                cursor = conn.execute(
-                    """
-                    SELECT COUNT(*) as expired FROM cache_entries
-                    WHERE timestamp + ttl < ?
-                """,
-                    (time.time(),),
-                )
-                expired = cursor.fetchone()["expired"]
-
-                return {
-                    "total_entries": total,
-                    "expired_entries": expired,
-                    "valid_entries": total - expired,
-                }
+            return await self._read(self._cache_counts, time.time())
         except Exception as e:
             print(f"[Database] Get cache stats error: {e}")
             return {"total_entries": 0, "expired_entries": 0, "valid_entries": 0}
 
     async def start_cleanup_task(self, interval: int = 300):
+        # 重新連線 (READY 再次觸發) 時不重複啟動
+        if self._cleanup_task is not None and not self._cleanup_task.done():
+            return
+
         async def cleanup_loop():
             while True:
                 await asyncio.sleep(interval)
@@ -311,6 +1060,8 @@ class DatabaseManager:
                     cleaned = await self.cleanup_expired_cache()
                     if cleaned > 0:
                         print(f"[Database] Cleaned {cleaned} expired cache entries")
+                    await self.rollup_metrics()
+                    await self.apply_metric_retention()
                 except Exception as e:
                     print(f"[Database] Cleanup task error: {e}")
 
@@ -320,9 +1071,12 @@ class DatabaseManager:
 database_manager = None
 
 
-def init_database_manager():
+def init_database_manager() -> DatabaseManager:
+    """建立全域資料庫管理器 (已建立時直接回傳，避免留下仍在執行的執行緒與任務)"""
     global database_manager
-    database_manager = DatabaseManager()
+    if database_manager is None:
+        database_manager = DatabaseManager()
+    return database_manager
 
 
 def get_database_manager() -> DatabaseManager:
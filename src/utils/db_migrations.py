@@ -0,0 +1,238 @@
+import sqlite3
+import time
+from typing import Callable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+from src.utils.metric_rollup import RESOLUTIONS
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+# 依版本排序的遷移清單 (只能新增，不可修改已發布的遷移)
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """註冊資料庫遷移 (版本號需遞增)"""
+
+    def decorator(func: Callable[[sqlite3.Connection], None]):
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"遷移版本需遞增: {version}")
+        MIGRATIONS.append(Migration(version, description, func))
+        return func
+
+    return decorator
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+# --- 遷移 ---
+# 早期版本沒有 schema_version 資料表，因此前幾個遷移都以 IF NOT EXISTS 撰寫，
+# 在既有資料庫上重新執行也不會失敗
+
+
+@migration(1, "基本資料表: 快取、指標、審計紀錄")
+def _baseline(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            timestamp REAL,
+            ttl REAL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            metric_name TEXT,
+            value REAL,
+            timestamp REAL,
+            metadata TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            action TEXT,
+            user_id TEXT,
+            guild_id TEXT,
+            timestamp REAL,
+            details TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_timestamp ON cache_entries(timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics(timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_logs(timestamp)")
+
+
+@migration(2, "指標降採樣資料表")
+def _metric_rollups(conn: sqlite3.Connection):
+    # 每個解析度一張彙總表，sketch 為分位數草圖 (JSON)
+    for resolution in RESOLUTIONS:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS metrics_{resolution} (
+                metric_name TEXT,
+                bucket REAL,
+                count INTEGER,
+                sum REAL,
+                min REAL,
+                max REAL,
+                sketch TEXT,
+                PRIMARY KEY (metric_name, bucket)
+            )
+        """)
+    # 已彙總到的原始 metrics id
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS metric_rollup_state (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER
+        )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_metrics_name_timestamp ON metrics(metric_name, timestamp)"
+    )
+
+
+@migration(3, "快取命名空間欄位")
+def _cache_namespaces(conn: sqlite3.Connection):
+    if "namespace" not in _columns(conn, "cache_entries"):
+        conn.execute("ALTER TABLE cache_entries ADD COLUMN namespace TEXT")
+        # 由鍵的前綴回填
+        conn.execute("""
+            UPDATE cache_entries
+            SET namespace = substr(key, 1, instr(key, ':') - 1)
+            WHERE instr(key, ':') > 0
+        """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_namespace ON cache_entries(namespace)")
+
+
+@migration(4, "JSON 儲存檔匯入資料表")
+def _json_storage(conn: sqlite3.Connection):
+    # 一般設定檔: 每個頂層鍵一列
+    conn.execute("""
+        CREATE TABLE documents (
+            source TEXT,
+            doc_key TEXT,
+            data TEXT,
+            updated_at REAL,
+            PRIMARY KEY (source, doc_key)
+        )
+    """)
+    # 訊息日誌 (檔案可能達數百 MB，需要依伺服器與時間查詢)
+    conn.execute("""
+        CREATE TABLE message_logs (
+            guild_id INTEGER,
+            message_id INTEGER,
+            channel_id INTEGER,
+            author_id INTEGER,
+            original_content TEXT,
+            edit_history TEXT,
+            deleted INTEGER,
+            attachments TEXT,
+            created_at TEXT,
+            last_edited_at TEXT,
+            PRIMARY KEY (guild_id, message_id)
+        )
+    """)
+    conn.execute(
+        "CREATE INDEX idx_message_logs_guild_created ON message_logs(guild_id, created_at)"
+    )
+    conn.execute("CREATE INDEX idx_message_logs_author ON message_logs(author_id)")
+    # 匯入進度 (offset 為已提交項目後的檔案位元組位置，用於續傳)
+    conn.execute("""
+        CREATE TABLE import_progress (
+            source TEXT PRIMARY KEY,
+            path TEXT,
+            file_size INTEGER,
+            file_mtime REAL,
+            offset INTEGER,
+            rows INTEGER,
+            completed INTEGER,
+            updated_at REAL
+        )
+    """)
+
+
+@migration(5, "審計紀錄依伺服器與用戶查詢的索引")
+def _audit_indexes(conn: sqlite3.Connection):
+    # rowid (id) 隱含在索引末端，(timestamp, id) 的鍵集分頁可直接沿索引掃描
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_audit_guild_timestamp ON audit_logs(guild_id, timestamp)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_audit_user_timestamp ON audit_logs(user_id, timestamp)"
+    )
+
+
+# --- 執行 ---
+
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at REAL
+        )
+    """)
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """資料庫目前的結構版本 (尚未遷移時為 0)"""
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn: sqlite3.Connection, target: Optional[int] = None) -> List[int]:
+    """
+    依序套用尚未執行的遷移
+
+    每個遷移與其版本紀錄在同一個交易中提交，失敗時回滾該遷移並拋出例外，
+    之前已完成的遷移保留。
+
+    Args:
+        conn: 資料庫連線
+        target: 遷移到的版本 (預設最新)
+
+    Returns:
+        本次套用的版本號
+    """
+    applied = []
+    version = current_version(conn)
+    if conn.in_transaction:
+        conn.commit()
+    for step in MIGRATIONS:
+        if step.version <= version or (target is not None and step.version > target):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 其他連線可能在取得寫入鎖前已完成遷移
+            if current_version(conn) >= step.version:
+                conn.execute("ROLLBACK")
+                continue
+            step.apply(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (step.version, step.description, time.time()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        applied.append(step.version)
+    return applied
+
+
+def latest_version() -> int:
+    """程式碼中最新的結構版本"""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
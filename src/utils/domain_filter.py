@@ -0,0 +1,238 @@
+from array import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from urllib.parse import urlsplit
+
+# 全域封鎖清單來源 (每行一個網域，可用環境變數覆寫)
+DEFAULT_DENYLIST_FILE = "data/storage/phishing_domains.txt"
+DENYLIST_ENV = "ANTI_SPAM_DENYLIST"
+
+# 字典樹節點中的規則標記 (網域標籤不可能是這兩個字元)
+_EXACT = "$"
+_WILDCARD = "*"
+
+
+def _to_ascii(host: str) -> Optional[str]:
+    """小寫化並轉換國際化網域為 punycode"""
+    host = host.strip().strip(".").lower()
+    if not host:
+        return None
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host if host.isascii() else None
+
+
+def extract_host(url: str) -> Optional[str]:
+    """由網址取得主機名稱 (已正規化)"""
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    return _to_ascii(host) if host else None
+
+
+def normalize_rule(rule: str) -> Optional[str]:
+    """
+    正規化網域規則
+
+    接受 "example.com"、"*.example.com"、".example.com" 或完整網址；
+    以 "*." 開頭的規則同時匹配該網域及所有子網域，其餘為精確匹配。
+    """
+    rule = rule.strip().lower()
+    if "://" in rule:
+        rule = urlsplit(rule).hostname or ""
+    rule = rule.split("/", 1)[0]
+    wildcard = rule.startswith(("*.", "."))
+    host = _to_ascii(rule.lstrip("*."))
+    if not host:
+        return None
+    return f"*.{host}" if wildcard else host
+
+
+class DomainTrie:
+    """反轉標籤字典樹 — 以 O(標籤數) 比對精確與萬用字元網域規則"""
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, rules: Iterable[str] = ()):
+        self._root: Dict[str, dict] = {}
+        self._size = 0
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: str) -> bool:
+        """新增規則，回傳是否為新規則"""
+        rule = normalize_rule(rule)
+        if rule is None:
+            return False
+        wildcard = rule.startswith("*.")
+        labels = (rule[2:] if wildcard else rule).split(".")
+        node = self._root
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        marker = _WILDCARD if wildcard else _EXACT
+        if marker in node:
+            return False
+        node[marker] = rule
+        self._size += 1
+        return True
+
+    def match(self, host: str) -> Optional[str]:
+        """回傳匹配的規則 (精確規則優先於萬用字元)；無匹配時回傳 None"""
+        node = self._root
+        matched = None
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                return matched
+            # 萬用字元規則涵蓋自身與所有子網域，越接近完整主機名稱越優先
+            matched = node.get(_WILDCARD, matched)
+        return node.get(_EXACT) or matched
+
+    def __len__(self) -> int:
+        return self._size
+
+
+def domain_hash(domain: str) -> int:
+    """64 位元網域雜湊 (0 保留為空槽)"""
+    digest = hashlib.blake2b(domain.encode("ascii"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class GlobalDenylist:
+    """
+    全域惡意網域清單 — 記憶體映射的開放定址雜湊表
+
+    來源文字檔首次載入時建立 .idx 索引檔 (來源較新時重建)，
+    之後以 mmap 讀取，不論清單大小每個網址只需 O(標籤數) 次探測，
+    且表格由作業系統分頁快取共享，不佔用 Python 物件記憶體。
+    """
+
+    MAGIC = b"ASDENY01"
+    HEADER = struct.Struct("<8sQQ")  # magic, capacity, count
+    SLOT = struct.Struct("<Q")
+
+    def __init__(self, index_path: Optional[str] = None):
+        self._file = None
+        self._mm: Optional[mmap.mmap] = None
+        self.capacity = 0
+        self.count = 0
+        if index_path:
+            self._open(index_path)
+
+    @classmethod
+    def from_source(cls, source: Optional[str] = None) -> "GlobalDenylist":
+        """由來源文字檔載入 (必要時重建索引)；檔案不存在時回傳空清單"""
+        source = source or os.environ.get(DENYLIST_ENV) or DEFAULT_DENYLIST_FILE
+        index_path = source + ".idx"
+        try:
+            if os.path.exists(source) and (
+                not os.path.exists(index_path)
+                or os.path.getmtime(index_path) < os.path.getmtime(source)
+            ):
+                cls.build(source, index_path)
+            if os.path.exists(index_path):
+                return cls(index_path)
+        except (OSError, ValueError) as e:
+            print(f"[防炸群] 無法載入全域網域封鎖清單: {e}")
+        return cls()
+
+    @staticmethod
+    def read_domains(source: str) -> List[str]:
+        """讀取來源檔 (支援 # 註解與 hosts 格式 "0.0.0.0 domain")"""
+        domains = []
+        with open(source, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.split("#", 1)[0].split()
+                if not line:
+                    continue
+                rule = normalize_rule(line[-1])
+                if rule:
+                    domains.append(rule.lstrip("*."))
+        return domains
+
+    @classmethod
+    def build(cls, source: str, index_path: str) -> int:
+        """由來源檔建立索引檔，回傳網域數量"""
+        hashes = {domain_hash(d) for d in cls.read_domains(source)}
+        capacity = 16
+        while capacity < len(hashes) * 2:
+            capacity <<= 1
+        mask = capacity - 1
+        table = array("Q", bytes(capacity * 8))
+        for h in hashes:
+            slot = h & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = h
+        if sys.byteorder != "little":
+            table.byteswap()
+
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, capacity, len(hashes)))
+            table.tofile(f)
+        os.replace(tmp_path, index_path)
+        return len(hashes)
+
+    def _open(self, index_path: str):
+        self._file = open(index_path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, capacity, count = self.HEADER.unpack_from(self._mm, 0)
+        if magic != self.MAGIC or len(self._mm) < self.HEADER.size + capacity * 8:
+            self.close()
+            raise ValueError(f"索引檔格式錯誤: {index_path}")
+        self.capacity = capacity
+        self.count = count
+
+    def contains(self, domain: str) -> bool:
+        """網域 (精確) 是否在清單中"""
+        if not self.count:
+            return False
+        h = domain_hash(domain)
+        mask = self.capacity - 1
+        slot = h & mask
+        base = self.HEADER.size
+        unpack = self.SLOT.unpack_from
+        mm = self._mm
+        while True:
+            value = unpack(mm, base + slot * 8)[0]
+            if value == h:
+                return True
+            if not value:
+                return False
+            slot = (slot + 1) & mask
+
+    def match(self, host: str) -> Optional[str]:
+        """主機名稱或其任一上層網域在清單中時回傳該網域"""
+        if not self.count:
+            return None
+        labels = host.split(".")
+        # 不比對單獨的頂級網域
+        for i in range(len(labels) - 1):
+            candidate = ".".join(labels[i:])
+            if self.contains(candidate):
+                return candidate
+        return None
+
+    def close(self):
+        """釋放映射"""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.capacity = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
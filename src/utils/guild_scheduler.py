@@ -0,0 +1,229 @@
+import asyncio
+from collections import defaultdict
+from collections import deque
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Optional
+
+JobFunc = Callable[[], Awaitable[None]]
+
+
+class _Job:
+    """排程中的工作"""
+
+    __slots__ = ("func", "cost", "kind", "force")
+
+    def __init__(self, func: JobFunc, cost: float, kind: str, force: bool = False):
+        self.func = func
+        self.cost = cost
+        self.kind = kind
+        self.force = force
+
+
+class _GuildStats:
+    """單一伺服器的佇列統計"""
+
+    __slots__ = ("processed", "shed", "max_depth", "unreported")
+
+    def __init__(self):
+        self.processed = 0
+        self.shed = 0
+        self.max_depth = 0
+        # {kind: 數量} — 尚未回報的丟棄數
+        self.unreported: Dict[str, int] = defaultdict(int)
+
+
+class GuildScheduler:
+    """
+    每伺服器公平排程器 — 有上限的佇列 + 赤字輪詢 (Deficit Round Robin)
+
+    每個伺服器擁有獨立佇列；工作者依序造訪有工作的伺服器，
+    每次造訪補充 quantum 額度，額度足夠才執行，因此單一伺服器
+    湧入大量工作時只會拉長自己的佇列，不會餓死其他伺服器。
+    佇列滿時丟棄新工作並計數，由呼叫端彙總回報。
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 200, quantum: float = 1.0):
+        """
+        初始化排程器
+
+        Args:
+            workers: 同時執行工作的協程數
+            max_queue: 每伺服器佇列上限 (超過時丟棄)
+            quantum: 每次造訪補充的額度 (以工作成本計)
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self.quantum = quantum
+        self._queues: Dict[int, Deque[_Job]] = {}
+        self._deficit: Dict[int, float] = defaultdict(float)
+        # 有待處理工作的伺服器 (輪詢順序)
+        self._active: Deque[int] = deque()
+        self._stats: Dict[int, _GuildStats] = defaultdict(_GuildStats)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks = []
+
+    # --- 生命週期 ---
+
+    def start(self):
+        """啟動工作者 (需在事件迴圈中呼叫)"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        """停止工作者 (佇列中 force 的工作依序執行完畢，其餘捨棄)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        forced = [job for queue in self._queues.values() for job in queue if job.force]
+        self._queues.clear()
+        self._active.clear()
+        self._deficit.clear()
+        for job in forced:
+            await self._run(job)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    # --- 提交 ---
+
+    def submit(
+        self,
+        guild_id: int,
+        func: JobFunc,
+        kind: str = "",
+        cost: float = 1.0,
+        force: bool = False,
+    ) -> bool:
+        """
+        排入工作
+
+        Args:
+            force: 佇列已滿時仍排入 (不可丟棄的工作，例如使用者輸入的指令)
+
+        Returns:
+            True 表示已排入；False 表示佇列已滿而被丟棄
+        """
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = deque()
+        stats = self._stats[guild_id]
+        if len(queue) >= self.max_queue and not force:
+            stats.shed += 1
+            stats.unreported[kind] += 1
+            return False
+        if not queue:
+            self._active.append(guild_id)
+        queue.append(_Job(func, cost, kind, force))
+        if len(queue) > stats.max_depth:
+            stats.max_depth = len(queue)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def drain_shed(self, guild_id: int, kind: str) -> int:
+        """取得並清除尚未回報的丟棄數 (供呼叫端彙總通知)"""
+        stats = self._stats.get(guild_id)
+        if stats is None:
+            return 0
+        return stats.unreported.pop(kind, 0)
+
+    # --- 排程 ---
+
+    def _next_job(self) -> Optional[_Job]:
+        """以赤字輪詢選出下一個工作"""
+        active = self._active
+        while active:
+            guild_id = active[0]
+            queue = self._queues.get(guild_id)
+            if not queue:
+                active.popleft()
+                self._deficit.pop(guild_id, None)
+                self._queues.pop(guild_id, None)
+                continue
+            job = queue[0]
+            if self._deficit[guild_id] >= job.cost:
+                queue.popleft()
+                self._deficit[guild_id] -= job.cost
+                if not queue:
+                    active.popleft()
+                    self._deficit.pop(guild_id, None)
+                    self._queues.pop(guild_id, None)
+                self._stats[guild_id].processed += 1
+                return job
+            # 新一輪造訪: 補充額度後移到隊尾
+            self._deficit[guild_id] += self.quantum
+            active.rotate(-1)
+        return None
+
+    async def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await self._run(job)
+
+    @staticmethod
+    async def _run(job: _Job):
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[排程] 工作執行失敗 ({job.kind}): {e}")
+
+    # --- 統計 ---
+
+    def depth(self, guild_id: int) -> int:
+        """伺服器目前的佇列長度"""
+        queue = self._queues.get(guild_id)
+        return len(queue) if queue else 0
+
+    def get_stats(self) -> dict:
+        """整體與各伺服器的佇列統計"""
+        guilds = {
+            guild_id: {
+                "depth": self.depth(guild_id),
+                "max_depth": stats.max_depth,
+                "processed": stats.processed,
+                "shed": stats.shed,
+            }
+            for guild_id, stats in self._stats.items()
+        }
+        return {
+            "queued": sum(len(q) for q in self._queues.values()),
+            "active_guilds": len(self._active),
+            "shed": sum(s.shed for s in self._stats.values()),
+            "guilds": guilds,
+        }
+
+
+async def run_fair(
+    bot,
+    guild_id: Optional[int],
+    func: JobFunc,
+    kind: str = "",
+    cost: float = 1.0,
+    force: bool = False,
+) -> bool:
+    """
+    經由機器人的公平排程器執行工作
+
+    私訊 (無伺服器) 或排程器未啟動時直接執行；force 的工作不會因佇列已滿被丟棄。
+
+    Returns:
+        False 表示佇列已滿而被丟棄
+    """
+    scheduler: Optional[GuildScheduler] = getattr(bot, "guild_scheduler", None)
+    if guild_id is None or scheduler is None or not scheduler.running:
+        await func()
+        return True
+    return scheduler.submit(guild_id, func, kind, cost, force)
@@ -0,0 +1,139 @@
+import asyncio
+import os
+from typing import Optional
+
+import discord
+from discord.interactions import InteractionResponse
+
+# 預設自動延遲回應的秒數 (Discord 要求 3 秒內首次回應)
+DEFAULT_AUTO_DEFER_SECONDS = 2.0
+
+
+class AutoDeferResponse(InteractionResponse):
+    """
+    可被自動延遲的互動回應
+
+    看門狗代為 defer 後，處理函式之後呼叫的 send_message / edit_message
+    會改由 followup / edit_original_response 送出，defer 則直接略過。
+    注意: 自動 defer 為公開的「思考中」狀態，之後的 ephemeral 訊息
+    會以公開訊息呈現 (Discord 以首次回應決定可見性)。
+    """
+
+    __slots__ = ("_auto_deferred", "_lock")
+
+    def __init__(self, parent: discord.Interaction):
+        super().__init__(parent)
+        self._auto_deferred = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def auto_deferred(self) -> bool:
+        """是否已由看門狗自動延遲"""
+        return self._auto_deferred
+
+    async def auto_defer(self) -> bool:
+        """尚未回應時自動 defer，回傳是否實際執行"""
+        async with self._lock:
+            if self.is_done():
+                return False
+            self._auto_deferred = True
+            if self._parent.type is discord.InteractionType.component:
+                await super().defer()
+            else:
+                await super().defer(thinking=True)
+            return True
+
+    async def defer(self, *, ephemeral: bool = False, thinking: bool = False) -> None:
+        async with self._lock:
+            if self._auto_deferred:
+                return
+            await super().defer(ephemeral=ephemeral, thinking=thinking)
+
+    async def send_message(self, content=None, **kwargs) -> None:
+        async with self._lock:
+            if not self._auto_deferred:
+                return await super().send_message(content, **kwargs)
+        delete_after = kwargs.pop("delete_after", None)
+        message = await self._parent.followup.send(
+            content, wait=delete_after is not None, **kwargs
+        )
+        if delete_after is not None:
+            await message.delete(delay=delete_after)
+
+    async def edit_message(self, **kwargs) -> None:
+        async with self._lock:
+            if not self._auto_deferred:
+                return await super().edit_message(**kwargs)
+        delete_after = kwargs.pop("delete_after", None)
+        message = await self._parent.edit_original_response(**kwargs)
+        if delete_after is not None:
+            await message.delete(delay=delete_after)
+
+
+class InteractionWatchdog:
+    """互動看門狗 — 處理函式逾時未回應時自動 defer，避免 Unknown interaction"""
+
+    def __init__(self, delay: Optional[float] = None):
+        """
+        初始化看門狗
+
+        Args:
+            delay: 自動 defer 前等待的秒數 (0 表示停用)；
+                未指定時讀取 INTERACTION_AUTO_DEFER_SECONDS
+        """
+        if delay is None:
+            delay = float(
+                os.getenv("INTERACTION_AUTO_DEFER_SECONDS", DEFAULT_AUTO_DEFER_SECONDS)
+            )
+        self.delay = delay
+        self.stats = {
+            "interactions": 0,
+            "auto_deferred": 0,  # 處理函式未在時限內回應 (已代為 defer)
+            "expired": 0,        # 代為 defer 時互動已過期 (仍錯過期限)
+        }
+        # {command_name: 次數} — 需要自動 defer 的指令
+        self.slow_commands = {}
+
+    def attach(self, interaction: discord.Interaction) -> Optional[asyncio.Task]:
+        """為互動安裝可自動延遲的回應並啟動計時器"""
+        if self.delay <= 0 or interaction.type is not discord.InteractionType.application_command:
+            return None
+        if hasattr(interaction, "_cs_response"):
+            return None  # 回應物件已建立，無法替換
+        response = AutoDeferResponse(interaction)
+        interaction._cs_response = response
+        self.stats["interactions"] += 1
+        return asyncio.ensure_future(self._timer(interaction, response))
+
+    def detach(self, task: Optional[asyncio.Task], interaction: discord.Interaction):
+        """處理函式結束後停止計時器 (已在 defer 中則讓其完成)"""
+        if task is None or task.done():
+            return
+        response = interaction.response
+        if not getattr(response, "auto_deferred", False):
+            task.cancel()
+
+    async def _timer(self, interaction: discord.Interaction, response: AutoDeferResponse):
+        await asyncio.sleep(self.delay)
+        try:
+            deferred = await response.auto_defer()
+        except discord.NotFound:
+            self.stats["expired"] += 1
+            return
+        except discord.HTTPException as e:
+            print(f"[互動] 自動延遲回應失敗: {e}")
+            return
+        if deferred:
+            self.stats["auto_deferred"] += 1
+            name = interaction.command.qualified_name if interaction.command else "unknown"
+            self.slow_commands[name] = self.slow_commands.get(name, 0) + 1
+
+    @property
+    def deadline_misses(self) -> int:
+        """未在時限內由處理函式回應的次數"""
+        return self.stats["auto_deferred"] + self.stats["expired"]
+
+    def get_stats(self) -> dict:
+        """統計與最常逾時的指令"""
+        slowest = sorted(self.slow_commands.items(), key=lambda kv: kv[1], reverse=True)
+        return {**self.stats, "deadline_misses": self.deadline_misses, "slow_commands": slowest[:10]}
@@ -0,0 +1,135 @@
+import asyncio
+from collections import OrderedDict
+import time
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+# 解析函式: 邀請碼 -> 目標伺服器 ID (邀請無效時回傳 None)
+InviteFetcher = Callable[[str], Awaitable[Optional[int]]]
+
+# 快取未命中標記
+_MISS = object()
+
+
+def _consume_exception(task: asyncio.Future):
+    # 所有等待者都已取消時避免 "exception was never retrieved" 警告
+    if not task.cancelled():
+        task.exception()
+
+
+class InviteResolver:
+    """
+    邀請碼解析快取 — 邀請碼 → 目標伺服器 ID
+
+    有上限的 LRU + TTL 快取；無效邀請也會短暫快取 (負向快取)，
+    同一邀請碼同時只會發出一次 API 查詢 (single-flight)。
+    """
+
+    def __init__(
+        self,
+        fetch: InviteFetcher,
+        ttl: float = 3600.0,
+        negative_ttl: float = 300.0,
+        max_entries: int = 4096,
+    ):
+        """
+        初始化解析器
+
+        Args:
+            fetch: 實際查詢邀請目標的協程函式
+            ttl: 有效邀請的快取秒數
+            negative_ttl: 無效邀請的快取秒數
+            max_entries: 快取上限 (超過時淘汰最久未使用者)
+        """
+        self._fetch = fetch
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # {code: (guild_id or None, expires_at)}
+        self._cache: "OrderedDict[str, Tuple[Optional[int], float]]" = OrderedDict()
+        # {code: Task} — 進行中的查詢
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "lookups": 0, "errors": 0}
+
+    @staticmethod
+    def _key(code: str) -> str:
+        # 邀請碼大小寫有別，但自訂邀請 (vanity) 不分大小寫；保留原樣作為鍵
+        return code.strip()
+
+    def peek(self, code: str, now: Optional[float] = None):
+        """
+        查詢快取 (不發出 API 請求)
+
+        Returns:
+            快取的伺服器 ID (無效邀請為 None)；未快取時回傳 _MISS
+        """
+        key = self._key(code)
+        entry = self._cache.get(key)
+        if entry is None:
+            return _MISS
+        guild_id, expires_at = entry
+        if (now if now is not None else time.monotonic()) >= expires_at:
+            del self._cache[key]
+            return _MISS
+        self._cache.move_to_end(key)
+        return guild_id
+
+    def is_cached(self, code: str) -> bool:
+        """邀請碼是否已有未過期的快取"""
+        return self.peek(code) is not _MISS
+
+    def store(self, code: str, guild_id: Optional[int], now: Optional[float] = None):
+        """寫入快取"""
+        now = now if now is not None else time.monotonic()
+        ttl = self.ttl if guild_id is not None else self.negative_ttl
+        key = self._key(code)
+        self._cache[key] = (guild_id, now + ttl)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def resolve(self, code: str) -> Optional[int]:
+        """
+        解析邀請碼的目標伺服器 ID
+
+        查詢在獨立的工作中執行，發起者被取消時其他等待者仍會取得結果。
+
+        Raises:
+            查詢函式的例外 (例如速率限制) 會傳遞給所有等待者，且不會被快取
+        """
+        cached = self.peek(code)
+        if cached is not _MISS:
+            self.stats["hits"] += 1
+            return cached
+        self.stats["misses"] += 1
+
+        key = self._key(code)
+        task = self._pending.get(key)
+        if task is None:
+            self.stats["lookups"] += 1
+            task = asyncio.ensure_future(self._lookup(key))
+            task.add_done_callback(_consume_exception)
+            self._pending[key] = task
+        return await asyncio.shield(task)
+
+    async def _lookup(self, key: str) -> Optional[int]:
+        try:
+            guild_id = await self._fetch(key)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        else:
+            self.store(key, guild_id)
+            return guild_id
+        finally:
+            self._pending.pop(key, None)
+
+    def invalidate(self, code: str):
+        """移除單一邀請碼的快取"""
+        self._cache.pop(self._key(code), None)
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -0,0 +1,391 @@
+import codecs
+import json
+import os
+import sqlite3
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+# 每次讀取的位元組數
+CHUNK_SIZE = 1024 * 1024
+# 每個交易匯入的項目數
+BATCH_SIZE = 500
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonStreamError(ValueError):
+    """JSON 檔案格式錯誤 (附帶位元組位置)"""
+
+
+class _StreamReader:
+    """
+    以 raw_decode 逐項解析頂層 JSON 物件或陣列
+
+    只保留尚未解析的文字，並記錄每個項目結束時的檔案位元組位置。
+    """
+
+    def __init__(self, f, offset: int, chunk_size: int):
+        self._file = f
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        # buf[_anchor] 對應的檔案位元組位置 (只編碼新解析的部分，避免重複計算)
+        self._anchor = 0
+        self._anchor_offset = offset
+
+    def offset(self) -> int:
+        """目前 pos 的檔案位元組位置"""
+        self._anchor_offset += len(self.buf[self._anchor : self.pos].encode("utf-8"))
+        self._anchor = self.pos
+        return self._anchor_offset
+
+    def fill(self) -> bool:
+        """讀取更多資料 (捨棄已解析的部分)，檔案結束時回傳 False"""
+        if self.eof:
+            return False
+        self.offset()
+        self.buf = self.buf[self.pos :]
+        self.pos = self._anchor = 0
+        # 單一大型項目跨越多個區塊時加倍讀取量，避免重複解析
+        data = self._file.read(max(self.chunk_size, len(self.buf)))
+        if not data:
+            self.eof = True
+        self.buf += self._decoder.decode(data, final=self.eof)
+        return not self.eof or bool(self.buf)
+
+    def peek(self) -> Optional[str]:
+        """略過空白後的下一個字元 (檔案結束時為 None)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof or not self.fill():
+                return None
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if char is None or char not in chars:
+            raise JsonStreamError(f"位置 {self.offset()} 預期 {chars!r}，實際為 {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """解析目前位置的一個 JSON 值"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise JsonStreamError(f"位置 {self.offset()} 的 JSON 無效: {e.msg}") from e
+                self.fill()
+                continue
+            # 數字可能被區塊邊界截斷 ("12" | "3")，需確認後面還有字元
+            if end == len(self.buf) and not self.eof:
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def container_type(path: str) -> str:
+    """檔案頂層容器的開頭字元 ("{" 或 "[")"""
+    with open(path, "rb") as f:
+        reader = _StreamReader(f, 0, 4096)
+        return reader.expect("{[")
+
+
+def iter_items(
+    path: str,
+    offset: int = 0,
+    start_index: int = 0,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Tuple[str, Any, int]]:
+    """
+    逐項讀取頂層為物件或陣列的 JSON 檔案
+
+    Args:
+        path: 檔案路徑
+        offset: 續傳位置 (先前回傳的位元組位置；0 表示從頭開始)
+        start_index: 陣列續傳時第一個項目的索引
+        chunk_size: 每次讀取的位元組數
+
+    Yields:
+        (鍵 (陣列為索引字串), 值, 該項目結束後的位元組位置)
+    """
+    closing = "}" if container_type(path) == "{" else "]"
+    with open(path, "rb") as f:
+        f.seek(offset)
+        reader = _StreamReader(f, offset, chunk_size)
+        if offset == 0:
+            reader.expect("{[")
+            if reader.peek() == closing:
+                return
+        else:
+            # 續傳: 位於上一個項目之後
+            if reader.expect("," + closing) == closing:
+                return
+        index = start_index
+        while True:
+            if closing == "}":
+                key = reader.value()
+                if not isinstance(key, str):
+                    raise JsonStreamError(f"位置 {reader.offset()} 的物件鍵必須是字串")
+                reader.expect(":")
+            else:
+                key = str(index)
+            value = reader.value()
+            index += 1
+            yield key, value, reader.offset()
+            if reader.expect("," + closing) == closing:
+                return
+
+
+def count_items(path: str) -> int:
+    """檔案中的頂層項目數 (串流解析，不載入整個檔案)"""
+    return sum(1 for _ in iter_items(path))
+
+
+# --- 匯入 ---
+
+# 將 (鍵, 值) 轉為資料表列
+RowMapper = Callable[[str, str, Any], tuple]
+
+
+class JsonSource(NamedTuple):
+    name: str
+    path: str
+    table: str
+    mapper: RowMapper
+
+
+def _document_row(source: str, key: str, value: Any) -> tuple:
+    return (source, key, json.dumps(value, ensure_ascii=False), time.time())
+
+
+def _message_log_row(source: str, key: str, record: Any) -> tuple:
+    # 鍵為 "<guild_id>_<message_id>"
+    guild_id, _, message_id = key.partition("_")
+    return (
+        int(record.get("guild_id") or guild_id),
+        int(record.get("message_id") or message_id),
+        record.get("channel_id"),
+        record.get("author_id"),
+        record.get("original_content"),
+        json.dumps(record.get("edit_history") or [], ensure_ascii=False),
+        int(bool(record.get("deleted"))),
+        json.dumps(record.get("attachments") or [], ensure_ascii=False),
+        record.get("created_at"),
+        record.get("last_edited_at"),
+    )
+
+
+INSERT_SQL = {
+    "documents": """
+        INSERT OR REPLACE INTO documents (source, doc_key, data, updated_at)
+        VALUES (?, ?, ?, ?)
+    """,
+    "message_logs": """
+        INSERT OR REPLACE INTO message_logs (
+            guild_id, message_id, channel_id, author_id, original_content,
+            edit_history, deleted, attachments, created_at, last_edited_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+}
+
+
+def _storage(name: str) -> str:
+    return os.path.join("data", "storage", f"{name}.json")
+
+
+# 機器人的 JSON 儲存檔
+DEFAULT_SOURCES = [
+    JsonSource("achievements", _storage("achievements"), "documents", _document_row),
+    JsonSource("giveaways", _storage("giveaways"), "documents", _document_row),
+    JsonSource("tickets", _storage("tickets"), "documents", _document_row),
+    JsonSource("osu_links", _storage("osu_links"), "documents", _document_row),
+    JsonSource("github_watch", _storage("github_watch"), "documents", _document_row),
+    JsonSource("management", _storage("management"), "documents", _document_row),
+    JsonSource("anti_spam_settings", _storage("anti_spam_settings"), "documents", _document_row),
+    JsonSource("log_channels", _storage("log_channels"), "documents", _document_row),
+    JsonSource("appeals", _storage("appeals"), "documents", _document_row),
+    JsonSource("lockdown_snapshots", _storage("lockdown_snapshots"), "documents", _document_row),
+    JsonSource(
+        "message_log",
+        os.path.join("data", "logs", "messages", "message_log.json"),
+        "message_logs",
+        _message_log_row,
+    ),
+]
+
+
+class JsonImporter:
+    """
+    JSON 儲存檔匯入器 — 串流解析、分批提交、可續傳
+
+    每批資料與匯入進度在同一個交易中提交，中斷後從最後提交的位置繼續；
+    寫入使用 INSERT OR REPLACE，重新匯入同一筆資料不會重複。
+    檔案大小或修改時間改變時從頭匯入。
+    """
+
+    def __init__(self, conn: sqlite3.Connection, batch_size: int = BATCH_SIZE):
+        self.conn = conn
+        self.batch_size = batch_size
+
+    def _progress(self, source: str) -> Optional[sqlite3.Row]:
+        cursor = self.conn.execute(
+            "SELECT path, file_size, file_mtime, offset, rows, completed "
+            "FROM import_progress WHERE source = ?",
+            (source,),
+        )
+        return cursor.fetchone()
+
+    def _save_progress(self, source: JsonSource, stat, offset: int, rows: int, completed: bool):
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO import_progress
+            (source, path, file_size, file_mtime, offset, rows, completed, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            (
+                source.name,
+                source.path,
+                stat.st_size,
+                stat.st_mtime,
+                offset,
+                rows,
+                int(completed),
+                time.time(),
+            ),
+        )
+
+    def _clear_source(self, source: JsonSource):
+        if source.table == "documents":
+            self.conn.execute("DELETE FROM documents WHERE source = ?", (source.name,))
+        else:
+            self.conn.execute(f"DELETE FROM {source.table}")
+        self.conn.execute("DELETE FROM import_progress WHERE source = ?", (source.name,))
+
+    def table_rows(self, source: JsonSource) -> int:
+        """資料表中屬於該來源的列數"""
+        if source.table == "documents":
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE source = ?", (source.name,)
+            ).fetchone()[0]
+        return self.conn.execute(f"SELECT COUNT(*) FROM {source.table}").fetchone()[0]
+
+    def import_source(
+        self,
+        source: JsonSource,
+        resume: bool = True,
+        fresh: bool = False,
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        匯入單一 JSON 檔案
+
+        Args:
+            source: 來源設定
+            resume: 從上次中斷的位置繼續
+            fresh: 先刪除該來源已匯入的資料
+            progress: 每批提交後呼叫 progress(來源名稱, 累計筆數)
+
+        Returns:
+            {"source", "status": "missing" | "up_to_date" | "imported", "rows", "resumed_from"}
+        """
+        if not os.path.exists(source.path):
+            return {"source": source.name, "status": "missing", "rows": 0, "resumed_from": 0}
+        stat = os.stat(source.path)
+
+        if fresh:
+            self._clear_source(source)
+            self.conn.commit()
+
+        offset, rows = 0, 0
+        state = self._progress(source.name)
+        unchanged = (
+            state is not None
+            and state[0] == source.path
+            and state[1] == stat.st_size
+            and state[2] == stat.st_mtime
+        )
+        if unchanged and state[5]:
+            return {
+                "source": source.name,
+                "status": "up_to_date",
+                "rows": state[4],
+                "resumed_from": state[3],
+            }
+        if unchanged and resume:
+            offset, rows = state[3], state[4]
+        resumed_from = offset
+
+        sql = INSERT_SQL[source.table]
+        batch: List[tuple] = []
+        end = offset
+        for key, value, end in iter_items(source.path, offset, start_index=rows):
+            batch.append(source.mapper(source.name, key, value))
+            if len(batch) >= self.batch_size:
+                rows += len(batch)
+                self._commit_batch(source, sql, batch, stat, end, rows, completed=False)
+                batch = []
+                if progress is not None:
+                    progress(source.name, rows)
+        rows += len(batch)
+        self._commit_batch(source, sql, batch, stat, end, rows, completed=True)
+        if progress is not None:
+            progress(source.name, rows)
+        return {
+            "source": source.name,
+            "status": "imported",
+            "rows": rows,
+            "resumed_from": resumed_from,
+        }
+
+    def _commit_batch(
+        self,
+        source: JsonSource,
+        sql: str,
+        batch: List[tuple],
+        stat,
+        offset: int,
+        rows: int,
+        completed: bool,
+    ):
+        try:
+            if batch:
+                self.conn.executemany(sql, batch)
+            self._save_progress(source, stat, offset, rows, completed)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+    def verify(self, source: JsonSource) -> Dict[str, Any]:
+        """
+        比對檔案項目數與資料表列數
+
+        Returns:
+            {"source", "file_items", "table_rows", "ok"}
+        """
+        if not os.path.exists(source.path):
+            return {"source": source.name, "file_items": 0, "table_rows": 0, "ok": True}
+        file_items = count_items(source.path)
+        table_rows = self.table_rows(source)
+        return {
+            "source": source.name,
+            "file_items": file_items,
+            "table_rows": table_rows,
+            "ok": file_items == table_rows,
+        }
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import shutil
+import threading
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+# 最後一次修改後延遲寫入的秒數
+DEFAULT_DELAY = 2.0
+
+
+class JsonStore:
+    """
+    JSON 檔案的記憶體副本 — 標記修改、延遲寫回、原子替換
+
+    記憶體中的資料為唯一的事實來源，修改後呼叫 mark_dirty() (或 set())，
+    短時間內的多次修改只寫入一次。序列化在事件迴圈上進行 (取得一致的快照，
+    避免其他協程同時修改)，寫檔、fsync 與 rename 在工作執行緒中完成，
+    先寫入暫存檔再 os.replace，中途當機不會留下寫了一半的檔案。
+    沒有執行中的事件迴圈時 (腳本、測試) 直接同步寫入。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        default: Callable[[], Any] = dict,
+        delay: float = DEFAULT_DELAY,
+        backup: bool = False,
+    ):
+        """
+        初始化儲存
+
+        Args:
+            path: JSON 檔案路徑
+            default: 檔案不存在或無法解析時的初始值
+            delay: 最後一次修改後延遲寫入的秒數
+            backup: 寫入前將舊檔複製為 <path>.backup
+        """
+        self.path = path
+        self.default = default
+        self.delay = delay
+        self.backup = backup
+        self._data: Any = None
+        self._loaded = False
+        self._dirty = False
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        # 快照與寫入依序進行，避免較舊的快照覆蓋較新的
+        self._flush_lock = asyncio.Lock()
+        # 同一時間只有一個寫入 (執行緒與同步寫入共用)
+        self._write_lock = threading.Lock()
+        self.stats = {"writes": 0, "coalesced": 0, "errors": 0}
+
+    # --- 讀取 ---
+
+    @property
+    def data(self) -> Any:
+        """記憶體中的資料 (第一次存取時讀取檔案)"""
+        if not self._loaded:
+            self._data = self._read_file()
+            self._loaded = True
+        return self._data
+
+    def _read_file(self) -> Any:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"[JsonStore] 無法載入 {self.path}: {e}")
+        return self.default()
+
+    # --- 修改 ---
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def set(self, data: Any):
+        """取代整份資料並排程寫入"""
+        self._data = data
+        self._loaded = True
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        """標記資料已修改，延遲 delay 秒後寫入"""
+        if self._dirty:
+            self.stats["coalesced"] += 1
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+        if self._handle is None and (self._task is None or self._task.done()):
+            self._handle = loop.call_later(self.delay, self._start_flush)
+
+    def _start_flush(self):
+        self._handle = None
+        self._task = asyncio.ensure_future(self._flush_scheduled())
+
+    async def _flush_scheduled(self):
+        await self.flush()
+        # 寫入期間又有修改時重新排程
+        if self._dirty and self._handle is None:
+            self._handle = asyncio.get_running_loop().call_later(self.delay, self._start_flush)
+
+    # --- 寫入 ---
+
+    def _snapshot(self) -> Optional[str]:
+        if not self._dirty:
+            return None
+        self._dirty = False
+        return json.dumps(self._data, ensure_ascii=False, indent=2)
+
+    def _write_file(self, text: str) -> bool:
+        tmp_path = f"{self.path}.tmp"
+        with self._write_lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if self.backup and os.path.exists(self.path):
+                    shutil.copy2(self.path, f"{self.path}.backup")
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"[JsonStore] 無法寫入 {self.path}: {e}")
+                self.stats["errors"] += 1
+                return False
+            self.stats["writes"] += 1
+            return True
+
+    async def flush(self) -> bool:
+        """立即寫入尚未儲存的修改，回傳是否寫入"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        async with self._flush_lock:
+            try:
+                text = self._snapshot()
+            except (TypeError, ValueError) as e:
+                print(f"[JsonStore] 無法序列化 {self.path}: {e}")
+                self.stats["errors"] += 1
+                return False
+            if text is None:
+                return False
+            if not await asyncio.to_thread(self._write_file, text):
+                # 保留修改，下次 flush 重試
+                self._dirty = True
+                return False
+            return True
+
+    def flush_sync(self) -> bool:
+        """同步寫入 (沒有事件迴圈時使用)"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        text = self._snapshot()
+        if text is None:
+            return False
+        if not self._write_file(text):
+            self._dirty = True
+            return False
+        return True
+
+
+# 每個檔案路徑共用一個儲存，確保同一檔案只有一份記憶體副本
+_stores: Dict[str, JsonStore] = {}
+
+
+def get_json_store(path: str, **kwargs) -> JsonStore:
+    """取得 (或建立) 路徑對應的儲存，參數只在第一次建立時使用"""
+    key = os.path.abspath(path)
+    store = _stores.get(key)
+    if store is None:
+        store = _stores[key] = JsonStore(path, **kwargs)
+    return store
+
+
+async def flush_all() -> int:
+    """寫入所有儲存中尚未儲存的修改 (關機時呼叫)，回傳寫入的檔案數"""
+    written = 0
+    for store in list(_stores.values()):
+        if await store.flush():
+            written += 1
+    return written
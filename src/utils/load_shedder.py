@@ -0,0 +1,165 @@
+import asyncio
+import time
+from typing import Awaitable
+from typing import Callable
+from typing import List
+from typing import Optional
+
+# --- 負載等級 ---
+LEVEL_NORMAL = 0            # 全功能
+LEVEL_SHED_COSMETIC = 1     # 略過裝飾性功能 (成就、GitHub 輪詢)
+LEVEL_MODERATION_ONLY = 2   # 僅保留管理功能 (防炸群、黑名單)
+
+LEVEL_NAMES = {
+    LEVEL_NORMAL: "正常",
+    LEVEL_SHED_COSMETIC: "略過裝飾性功能",
+    LEVEL_MODERATION_ONLY: "僅保留管理功能",
+}
+
+LEVEL_EFFECTS = {
+    LEVEL_NORMAL: "所有功能正常運作",
+    LEVEL_SHED_COSMETIC: "成就觸發與 GitHub 輪詢暫停",
+    LEVEL_MODERATION_ONLY: "僅防炸群與黑名單照常運作，編刪日誌與審計日誌暫停",
+}
+
+# --- 功能優先度 (負載等級達到此值時略過) ---
+PRIORITY_COSMETIC = LEVEL_SHED_COSMETIC    # 成就、GitHub 輪詢等
+PRIORITY_STANDARD = LEVEL_MODERATION_ONLY  # 編刪日誌、審計日誌 Embed 等
+
+LevelListener = Callable[[int, int, float], Awaitable[None]]
+
+
+class LoadShedder:
+    """
+    降級控制器 — 量測事件迴圈延遲並切換負載等級
+
+    定期 sleep 固定時間並量測實際喚醒的延遲 (EWMA 平滑)。延遲超過
+    門檻時立即升級；降級需延遲低於門檻的一定比例並維持一段時間，
+    避免在門檻附近來回切換。各功能以 feature_allowed() 檢查，
+    只是一次整數比較。
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        thresholds=(0.25, 1.0),
+        recover_ratio: float = 0.5,
+        min_dwell: float = 30.0,
+        alpha: float = 0.3,
+    ):
+        """
+        初始化控制器
+
+        Args:
+            interval: 量測間隔 (秒)
+            thresholds: 進入各降級等級的迴圈延遲門檻 (秒，遞增)
+            recover_ratio: 延遲低於門檻的此比例時才允許降級
+            min_dwell: 每個等級至少維持的秒數 (降級前)
+            alpha: 延遲 EWMA 平滑係數
+        """
+        self.interval = interval
+        self.thresholds = tuple(thresholds)
+        self.recover_ratio = recover_ratio
+        self.min_dwell = min_dwell
+        self.alpha = alpha
+        self.level = LEVEL_NORMAL
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.changed_at = time.monotonic()
+        self.transitions = 0
+        self._listeners: List[LevelListener] = []
+        self._task: Optional[asyncio.Task] = None
+
+    # --- 生命週期 ---
+
+    def start(self):
+        """啟動量測 (需在事件迴圈中呼叫)"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self):
+        """停止量測並恢復正常等級"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.level = LEVEL_NORMAL
+
+    def add_listener(self, callback: LevelListener):
+        """註冊等級變更通知 callback(舊等級, 新等級, 延遲秒數)"""
+        self._listeners.append(callback)
+
+    # --- 量測 ---
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            await self.observe(lag, time.monotonic())
+
+    async def observe(self, lag: float, now: float):
+        """記錄一次延遲量測並在需要時切換等級"""
+        self.lag = self.alpha * lag + (1 - self.alpha) * self.lag
+        self.max_lag = max(self.max_lag, lag)
+        target = self.evaluate(now)
+        if target == self.level:
+            return
+        old = self.level
+        self.level = target
+        self.changed_at = now
+        self.transitions += 1
+        print(f"[負載] 等級 {LEVEL_NAMES[old]} -> {LEVEL_NAMES[target]} (迴圈延遲 {self.lag * 1000:.0f}ms)")
+        for callback in self._listeners:
+            try:
+                await callback(old, target, self.lag)
+            except Exception as e:
+                print(f"[負載] 等級變更通知失敗: {e}")
+
+    def evaluate(self, now: float) -> int:
+        """依目前平滑延遲計算目標等級"""
+        lag = self.lag
+        target = LEVEL_NORMAL
+        for level, threshold in enumerate(self.thresholds, start=1):
+            if lag >= threshold:
+                target = level
+        if target >= self.level:
+            return target
+        # 降級: 一次一級，需低於門檻一定比例並停留足夠時間
+        threshold = self.thresholds[self.level - 1]
+        if lag < threshold * self.recover_ratio and now - self.changed_at >= self.min_dwell:
+            return self.level - 1
+        return self.level
+
+    def allows(self, priority: int) -> bool:
+        """功能在目前等級是否應執行"""
+        return self.level < priority
+
+    def get_stats(self) -> dict:
+        """目前狀態"""
+        return {
+            "level": self.level,
+            "level_name": LEVEL_NAMES[self.level],
+            "lag_ms": round(self.lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "transitions": self.transitions,
+        }
+
+
+load_shedder = None
+
+
+def init_load_shedder(**kwargs) -> LoadShedder:
+    global load_shedder
+    load_shedder = LoadShedder(**kwargs)
+    return load_shedder
+
+
+def get_load_shedder() -> Optional[LoadShedder]:
+    return load_shedder
+
+
+def feature_allowed(priority: int) -> bool:
+    """功能在目前負載等級是否應執行 (未啟用控制器時一律允許)"""
+    return load_shedder is None or load_shedder.level < priority
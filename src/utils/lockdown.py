@@ -0,0 +1,247 @@
+import asyncio
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+import json
+import os
+import time
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import discord
+
+# UTC+8 時區
+TZ_OFFSET = timezone(timedelta(hours=8))
+
+LOCKDOWN_MODE_CHANNELS = "channels"  # 逐頻道覆寫 (精確，可還原既有覆寫)
+LOCKDOWN_MODE_ROLE = "role"          # 僅切換 @everyone 角色權限 (單次 API 呼叫)
+
+VALID_LOCKDOWN_MODES = [LOCKDOWN_MODE_CHANNELS, LOCKDOWN_MODE_ROLE]
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+class LockdownEngine:
+    """封鎖引擎 — 並行鎖定頻道，並保存原始權限快照以便精確還原"""
+
+    SNAPSHOT_FILE = "data/storage/lockdown_snapshots.json"
+
+    def __init__(self, concurrency: int = 5, progress_interval: float = 1.5):
+        """
+        初始化封鎖引擎
+
+        Args:
+            concurrency: 同時進行的權限修改請求數 (低於 Discord 全域速率限制)
+            progress_interval: 進度回報的最小間隔 (秒)
+        """
+        self.concurrency = concurrency
+        self.progress_interval = progress_interval
+        # {guild_id: snapshot} — 封鎖前的權限快照
+        self.snapshots: Dict[int, dict] = self._load_snapshots()
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    # --- 快照持久化 ---
+
+    def _load_snapshots(self) -> Dict[int, dict]:
+        """從檔案載入封鎖快照"""
+        if not os.path.exists(self.SNAPSHOT_FILE):
+            return {}
+        try:
+            with open(self.SNAPSHOT_FILE, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            return {int(k): v for k, v in raw.items()}
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"[封鎖] 無法載入快照: {e}")
+            return {}
+
+    def _save_snapshots(self):
+        """儲存封鎖快照到檔案"""
+        os.makedirs(os.path.dirname(self.SNAPSHOT_FILE), exist_ok=True)
+        try:
+            with open(self.SNAPSHOT_FILE, "w", encoding="utf-8") as f:
+                json.dump(
+                    {str(k): v for k, v in self.snapshots.items()},
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+        except OSError as e:
+            print(f"[封鎖] 無法儲存快照: {e}")
+
+    def is_active(self, guild_id: int) -> bool:
+        """伺服器是否有尚未還原的封鎖快照"""
+        return guild_id in self.snapshots
+
+    def _guild_lock(self, guild_id: int) -> asyncio.Lock:
+        lock = self._locks.get(guild_id)
+        if lock is None:
+            lock = self._locks[guild_id] = asyncio.Lock()
+        return lock
+
+    # --- 封鎖 / 解除 ---
+
+    async def lock(
+        self,
+        guild: discord.Guild,
+        reason: str,
+        mode: str = LOCKDOWN_MODE_CHANNELS,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, int]:
+        """
+        啟用封鎖
+
+        Returns:
+            {"total": 需修改數, "done": 成功數, "failed": 失敗數}
+        """
+        async with self._guild_lock(guild.id):
+            if self.is_active(guild.id):
+                return {"total": 0, "done": 0, "failed": 0}
+
+            role = guild.default_role
+            if mode == LOCKDOWN_MODE_ROLE:
+                return await self._lock_role(guild, role, reason)
+
+            # 先記錄快照再修改，中途中斷也能還原已修改的頻道
+            targets: List[discord.abc.GuildChannel] = []
+            channels: Dict[str, dict] = {}
+            for channel in guild.text_channels:
+                overwrite = channel.overwrites_for(role)
+                if overwrite.send_messages is False:
+                    continue  # 原本就禁止發言，不需修改也不需還原
+                channels[str(channel.id)] = {
+                    "existed": role in channel.overwrites,
+                    "send_messages": overwrite.send_messages,
+                }
+                targets.append(channel)
+
+            self.snapshots[guild.id] = {
+                "mode": LOCKDOWN_MODE_CHANNELS,
+                "created_at": datetime.now(TZ_OFFSET).isoformat(),
+                "channels": channels,
+            }
+            self._save_snapshots()
+
+            async def apply(channel: discord.abc.GuildChannel) -> bool:
+                overwrite = channel.overwrites_for(role)
+                overwrite.send_messages = False
+                await channel.set_permissions(role, overwrite=overwrite, reason=reason)
+                return True
+
+            return await self._fan_out(targets, apply, on_progress)
+
+    async def unlock(
+        self,
+        guild: discord.Guild,
+        reason: str,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, int]:
+        """解除封鎖並依快照還原每個頻道原本的權限覆寫"""
+        async with self._guild_lock(guild.id):
+            snapshot = self.snapshots.get(guild.id)
+            if snapshot is None:
+                return {"total": 0, "done": 0, "failed": 0}
+
+            role = guild.default_role
+            if snapshot.get("mode") == LOCKDOWN_MODE_ROLE:
+                result = await self._unlock_role(guild, role, snapshot, reason)
+            else:
+                targets = []
+                for channel_id, previous in snapshot.get("channels", {}).items():
+                    channel = guild.get_channel(int(channel_id))
+                    if channel is not None:
+                        targets.append((channel, previous))
+
+                async def restore(item) -> bool:
+                    channel, previous = item
+                    overwrite = channel.overwrites_for(role)
+                    if overwrite.send_messages is not False:
+                        return True  # 封鎖期間已被手動調整，保留現狀
+                    overwrite.send_messages = previous["send_messages"]
+                    if not previous["existed"] and overwrite.is_empty():
+                        await channel.set_permissions(role, overwrite=None, reason=reason)
+                    else:
+                        await channel.set_permissions(role, overwrite=overwrite, reason=reason)
+                    return True
+
+                result = await self._fan_out(targets, restore, on_progress)
+
+            if result["failed"] == 0:
+                self.snapshots.pop(guild.id, None)
+                self._save_snapshots()
+            return result
+
+    async def _lock_role(
+        self, guild: discord.Guild, role: discord.Role, reason: str
+    ) -> Dict[str, int]:
+        """快速路徑: 單次修改 @everyone 角色權限"""
+        self.snapshots[guild.id] = {
+            "mode": LOCKDOWN_MODE_ROLE,
+            "created_at": datetime.now(TZ_OFFSET).isoformat(),
+            "role_send_messages": role.permissions.send_messages,
+        }
+        self._save_snapshots()
+
+        permissions = role.permissions
+        permissions.update(send_messages=False)
+        try:
+            await role.edit(permissions=permissions, reason=reason)
+        except discord.HTTPException as e:
+            print(f"[封鎖] 無法修改 @everyone 權限: {e}")
+            self.snapshots.pop(guild.id, None)
+            self._save_snapshots()
+            return {"total": 1, "done": 0, "failed": 1}
+        return {"total": 1, "done": 1, "failed": 0}
+
+    async def _unlock_role(
+        self, guild: discord.Guild, role: discord.Role, snapshot: dict, reason: str
+    ) -> Dict[str, int]:
+        """還原 @everyone 角色權限"""
+        permissions = role.permissions
+        permissions.update(send_messages=snapshot.get("role_send_messages", True))
+        try:
+            await role.edit(permissions=permissions, reason=reason)
+        except discord.HTTPException as e:
+            print(f"[封鎖] 無法還原 @everyone 權限: {e}")
+            return {"total": 1, "done": 0, "failed": 1}
+        return {"total": 1, "done": 1, "failed": 0}
+
+    async def _fan_out(
+        self,
+        items: list,
+        func: Callable[..., Awaitable[bool]],
+        on_progress: Optional[ProgressCallback],
+    ) -> Dict[str, int]:
+        """以有限並行度執行權限修改 (速率限制由 discord.py 依路由處理)"""
+        total = len(items)
+        result = {"total": total, "done": 0, "failed": 0}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        last_report = time.monotonic()
+
+        async def run(item):
+            nonlocal last_report
+            async with semaphore:
+                try:
+                    await func(item)
+                    result["done"] += 1
+                except discord.HTTPException:
+                    result["failed"] += 1
+            if on_progress is None:
+                return
+            now = time.monotonic()
+            if now - last_report >= self.progress_interval:
+                last_report = now
+                try:
+                    await on_progress(result["done"] + result["failed"], total)
+                except Exception:
+                    pass
+
+        await asyncio.gather(*(run(item) for item in items))
+        if on_progress is not None:
+            try:
+                await on_progress(total, total)
+            except Exception:
+                pass
+        return result
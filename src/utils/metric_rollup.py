@@ -0,0 +1,178 @@
+import json
+import math
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+
+# 彙總解析度 (名稱: 秒)
+RESOLUTIONS = {"1m": 60, "1h": 3600}
+
+# 各解析度的預設保存秒數 ("raw" 為原始 metrics 資料表)
+DEFAULT_RETENTION = {
+    "raw": 24 * 3600,
+    "1m": 7 * 86400,
+    "1h": 90 * 86400,
+}
+
+# 分位數草圖的相對誤差
+SKETCH_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """
+    對數分桶分位數草圖 — 可合併，相對誤差固定
+
+    正值落在 gamma^(k-1) < v <= gamma^k 的桶 k，負值以相同方式記錄絕對值，
+    零另外計數。兩份草圖相加即為合併，因此每分鐘的草圖可以直接合併成每小時。
+    """
+
+    __slots__ = ("positive", "negative", "zero")
+
+    _gamma = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+    _log_gamma = math.log(_gamma)
+
+    def __init__(self):
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+
+    @property
+    def count(self) -> int:
+        return self.zero + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # 桶中點，相對誤差不超過 SKETCH_ACCURACY
+        return 2 * self._gamma**key / (self._gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        """記錄數值"""
+        if value > 0:
+            key = self._key(value)
+            self.positive[key] = self.positive.get(key, 0) + count
+        elif value < 0:
+            key = self._key(-value)
+            self.negative[key] = self.negative.get(key, 0) + count
+        else:
+            self.zero += count
+
+    def merge(self, other: "QuantileSketch"):
+        """合併另一份草圖"""
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero += other.zero
+
+    def quantile(self, q: float) -> Optional[float]:
+        """估計分位數 (0 <= q <= 1)，沒有資料時回傳 None"""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        # 由小到大: 負值 (絕對值大者在前)、零、正值
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "p": {str(k): c for k, c in self.positive.items()},
+                "n": {str(k): c for k, c in self.negative.items()},
+                "z": self.zero,
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, data: Optional[str]) -> "QuantileSketch":
+        sketch = cls()
+        if data:
+            raw = json.loads(data)
+            sketch.positive = {int(k): c for k, c in raw.get("p", {}).items()}
+            sketch.negative = {int(k): c for k, c in raw.get("n", {}).items()}
+            sketch.zero = raw.get("z", 0)
+        return sketch
+
+
+class Bucket:
+    """單一時間桶的彙總 (count/sum/min/max 與分位數草圖)"""
+
+    __slots__ = ("count", "total", "minimum", "maximum", "sketch")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.sketch = QuantileSketch()
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.sketch.add(value)
+
+    def merge_row(self, count: int, total: float, minimum: float, maximum: float, sketch: str):
+        """合併資料庫中已存在的彙總列"""
+        self.count += count
+        self.total += total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+        self.sketch.merge(QuantileSketch.from_json(sketch))
+
+
+def bucket_start(timestamp: float, step: int) -> float:
+    """時間戳所在時間桶的起點"""
+    return math.floor(timestamp / step) * step
+
+
+def aggregate(rows: Iterable[tuple], step: int) -> Dict[tuple, Bucket]:
+    """將 (metric_name, value, timestamp) 依 (名稱, 時間桶) 彙總"""
+    buckets: Dict[tuple, Bucket] = {}
+    for name, value, timestamp in rows:
+        if value is None:
+            continue
+        key = (name, bucket_start(timestamp, step))
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = Bucket()
+        bucket.add(float(value))
+    return buckets
+
+
+def choose_resolution(
+    start: float,
+    end: float,
+    now: float,
+    retention: Dict[str, float],
+    max_points: int,
+) -> str:
+    """
+    選擇查詢時間範圍最便宜的解析度
+
+    依序考慮原始資料、1m、1h，取第一個保存期涵蓋起點且資料點數
+    不超過 max_points 的解析度 (原始資料以每秒一筆估計)；都不符合時使用最粗的解析度。
+    """
+    span = max(0.0, end - start)
+    candidates = [("raw", 1)] + list(RESOLUTIONS.items())
+    for name, step in candidates:
+        if start < now - retention.get(name, 0):
+            continue
+        if span / step <= max_points:
+            return name
+    return candidates[-1][0]
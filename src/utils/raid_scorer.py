@@ -0,0 +1,241 @@
+from collections import deque
+from typing import Deque
+from typing import Dict
+from typing import FrozenSet
+from typing import List
+from typing import Optional
+import unicodedata
+
+from src.utils.rate_estimator import EwmaCounter
+
+# Discord snowflake 起始時間 (毫秒)
+DISCORD_EPOCH_MS = 1420070400000
+
+# --- 特徵權重 ---
+# 正常帳號 = 1 分，與舊版人數門檻 (raid_joins) 相容；特徵加分合計最多使
+# 單次加入計為 SCORE_MAX 分，因此預設門檻 10 至少需要 5 個高度可疑帳號
+SCORE_BASE = 1.0           # 每次加入的基本分
+SCORE_AGE_DAY = 0.5        # 帳號未滿 1 天
+SCORE_AGE_WEEK = 0.25      # 帳號未滿 7 天
+SCORE_AGE_MONTH = 0.1      # 帳號未滿 30 天
+SCORE_DEFAULT_AVATAR = 0.2 # 使用預設頭像
+SCORE_SIMILAR_NAME = 0.3   # 名稱與近期加入者相似
+SCORE_MAX = 2.0            # 單次加入的分數上限
+
+# 分數達此值視為可疑 (例如未滿 1 天的帳號，或多項較弱特徵同時出現)
+SUSPICIOUS_SCORE = 1.4
+
+# 名稱相似度門檻 (字元二元組 Jaccard)
+NAME_SIMILARITY = 0.7
+
+
+def snowflake_timestamp(snowflake: int) -> float:
+    """由 snowflake ID 取得建立時間 (Unix 秒)"""
+    return ((snowflake >> 22) + DISCORD_EPOCH_MS) / 1000
+
+
+def _name_key(name: str) -> str:
+    """名稱骨架: 全形轉半形、小寫化、只保留字母 (去除數字與符號)"""
+    name = unicodedata.normalize("NFKC", name or "").casefold()
+    return "".join(ch for ch in name if ch.isalpha())
+
+
+def _bigrams(key: str) -> FrozenSet[str]:
+    """字元二元組集合"""
+    if len(key) < 2:
+        return frozenset((key,)) if key else frozenset()
+    return frozenset(key[i : i + 2] for i in range(len(key) - 1))
+
+
+class JoinRecord:
+    """單次加入紀錄與其特徵分數"""
+
+    __slots__ = (
+        "timestamp", "user_id", "account_age", "default_avatar",
+        "name_key", "bigrams", "similar", "score",
+    )
+
+    def __init__(
+        self,
+        timestamp: float,
+        user_id: int,
+        account_age: Optional[float],
+        default_avatar: bool,
+        name_key: str,
+    ):
+        self.timestamp = timestamp
+        self.user_id = user_id
+        self.account_age = account_age
+        self.default_avatar = default_avatar
+        self.name_key = name_key
+        self.bigrams = _bigrams(name_key)
+        self.similar = False
+        self.score = SCORE_BASE
+
+    @property
+    def suspicious(self) -> bool:
+        return self.score >= SUSPICIOUS_SCORE
+
+    def describe(self) -> str:
+        """可疑特徵的文字說明"""
+        parts = []
+        if self.account_age is not None:
+            parts.append(f"帳齡 {self.account_age / 86400:.1f} 天")
+        if self.default_avatar:
+            parts.append("預設頭像")
+        if self.similar:
+            parts.append("名稱相似")
+        return ", ".join(parts) or "無特徵"
+
+
+class RaidScorer:
+    """突襲評分器 — 每伺服器保存有上限的加入紀錄，以特徵分數取代單純人數"""
+
+    def __init__(self, buffer_size: int = 500, name_lookback: int = 10):
+        """
+        初始化評分器
+
+        Args:
+            buffer_size: 每伺服器保留的最近加入紀錄數
+            name_lookback: 名稱相似度比對的最近加入人數
+        """
+        self.buffer_size = buffer_size
+        self.name_lookback = name_lookback
+        # {guild_id: deque[JoinRecord]} — 最近加入紀錄
+        self._buffers: Dict[int, Deque[JoinRecord]] = {}
+        # {guild_id: EwmaCounter} — EWMA 模式的滾動分數
+        self._rates: Dict[int, EwmaCounter] = {}
+        # {guild_id: timestamp} — 上次觸發時間
+        self._triggered_at: Dict[int, float] = {}
+
+    def _buffer(self, guild_id: int) -> Deque[JoinRecord]:
+        buf = self._buffers.get(guild_id)
+        if buf is None:
+            buf = self._buffers[guild_id] = deque(maxlen=self.buffer_size)
+        return buf
+
+    def record_join(
+        self,
+        guild_id: int,
+        now: float,
+        user_id: Optional[int] = None,
+        name: str = "",
+        default_avatar: bool = False,
+    ) -> JoinRecord:
+        """記錄一次加入並計算特徵分數"""
+        account_age = None
+        if user_id:
+            account_age = max(0.0, now - snowflake_timestamp(user_id))
+        record = JoinRecord(now, user_id or 0, account_age, default_avatar, _name_key(name))
+
+        score = SCORE_BASE
+        if account_age is not None:
+            if account_age < 86400:
+                score += SCORE_AGE_DAY
+            elif account_age < 7 * 86400:
+                score += SCORE_AGE_WEEK
+            elif account_age < 30 * 86400:
+                score += SCORE_AGE_MONTH
+        if default_avatar:
+            score += SCORE_DEFAULT_AVATAR
+
+        buf = self._buffer(guild_id)
+        if len(record.name_key) >= 3:
+            for i, other in enumerate(reversed(buf)):
+                if i >= self.name_lookback:
+                    break
+                if self._similar(record, other):
+                    record.similar = True
+                    break
+        if record.similar:
+            score += SCORE_SIMILAR_NAME
+
+        record.score = min(score, SCORE_MAX)
+        buf.append(record)
+        return record
+
+    @staticmethod
+    def _similar(a: JoinRecord, b: JoinRecord) -> bool:
+        """兩個名稱骨架是否相似"""
+        if not b.name_key:
+            return False
+        if a.name_key == b.name_key:
+            return True
+        union = len(a.bigrams | b.bigrams)
+        return bool(union) and len(a.bigrams & b.bigrams) / union >= NAME_SIMILARITY
+
+    def recent(self, guild_id: int, now: float, window: float) -> List[JoinRecord]:
+        """時間視窗內的加入紀錄 (由舊到新)"""
+        buf = self._buffers.get(guild_id)
+        if not buf:
+            return []
+        result = []
+        for record in reversed(buf):
+            if now - record.timestamp >= window:
+                break
+            result.append(record)
+        result.reverse()
+        return result
+
+    def rolling_score(
+        self,
+        guild_id: int,
+        now: float,
+        window: float,
+        record: Optional[JoinRecord] = None,
+        use_ewma: bool = False,
+    ) -> float:
+        """
+        滾動分數
+
+        視窗模式為視窗內分數總和；EWMA 模式以 window 為時間常數累加
+        (傳入 record 時將其分數計入)。
+        """
+        if use_ewma:
+            counter = self._rates.get(guild_id)
+            if counter is None:
+                counter = self._rates[guild_id] = EwmaCounter()
+            if record is not None:
+                return counter.add(now, window, weight=record.score)
+            return counter.peek(now, window)
+        return sum(r.score for r in self.recent(guild_id, now, window))
+
+    def in_cooldown(self, guild_id: int, now: float, window: float) -> bool:
+        """觸發後一個視窗內不重複觸發"""
+        last = self._triggered_at.get(guild_id)
+        return last is not None and now - last < window
+
+    def mark_triggered(self, guild_id: int, now: float):
+        """記錄觸發時間 (EWMA 分數歸零，視窗紀錄保留供批次處理)"""
+        self._triggered_at[guild_id] = now
+        counter = self._rates.get(guild_id)
+        if counter is not None:
+            counter.reset()
+
+    def cohort(
+        self, guild_id: int, now: float, window: float, include_all: bool = False
+    ) -> List[JoinRecord]:
+        """
+        取得需要處理的加入者
+
+        範圍為目前視窗與最近一次觸發後的所有加入；預設只回傳可疑者。
+        """
+        start = now - window
+        last = self._triggered_at.get(guild_id)
+        if last is not None:
+            start = min(start, last - window)
+        buf = self._buffers.get(guild_id) or ()
+        return [
+            r for r in buf
+            if r.timestamp > start and r.user_id and (include_all or r.suspicious)
+        ]
+
+    def discard(self, guild_id: int, user_ids):
+        """將已處理的用戶移出緩衝區"""
+        buf = self._buffers.get(guild_id)
+        if not buf:
+            return
+        ids = set(user_ids)
+        kept = [r for r in buf if r.user_id not in ids]
+        buf.clear()
+        buf.extend(kept)
@@ -0,0 +1,53 @@
+import math
+from typing import Dict
+from typing import Hashable
+
+
+class EwmaCounter:
+    """
+    指數加權事件計數器 — 每個追蹤實體只保存兩個浮點數
+
+    以時間常數 tau 衰減的事件計數。持續以 r 次/秒 發生時，
+    穩態值約為 r * tau，因此 tau 取原本的時間視窗秒數時，
+    可直接沿用「視窗內 N 次」的門檻。
+    """
+
+    __slots__ = ("value", "updated")
+
+    def __init__(self):
+        self.value = 0.0
+        self.updated = 0.0
+
+    def peek(self, now: float, tau: float) -> float:
+        """取得衰減到 now 的目前值 (不修改狀態)"""
+        if not self.value:
+            return 0.0
+        elapsed = now - self.updated
+        if elapsed <= 0:
+            return self.value
+        return self.value * math.exp(-elapsed / tau)
+
+    def add(self, now: float, tau: float, weight: float = 1.0) -> float:
+        """記錄一次事件並回傳更新後的值"""
+        self.value = self.peek(now, tau) + weight
+        self.updated = now
+        return self.value
+
+    def rate(self, now: float, tau: float) -> float:
+        """估計的事件速率 (次/秒)"""
+        return self.peek(now, tau) / tau
+
+    def reset(self):
+        """清除計數"""
+        self.value = 0.0
+        self.updated = 0.0
+
+
+def prune_idle(
+    counters: Dict[Hashable, EwmaCounter], now: float, tau: float, floor: float = 0.05
+) -> int:
+    """移除已衰減到可忽略的計數器，回傳移除數量"""
+    idle = [k for k, c in counters.items() if c.peek(now, tau) < floor]
+    for key in idle:
+        del counters[key]
+    return len(idle)
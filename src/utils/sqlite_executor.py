@@ -0,0 +1,274 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+
+# 資料庫工作: func(conn, *args) -> 結果 (在資料庫執行緒中執行；寫入工作不應自行 commit)
+DbJob = Callable[..., Any]
+
+# 連線設定 (PRAGMA 等)
+ConnectionHook = Callable[[sqlite3.Connection], None]
+
+# 停止執行緒的標記
+_STOP = object()
+
+
+def _resolve(future: asyncio.Future, result: Any, error: BaseException):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class SQLiteExecutor:
+    """
+    SQLite 專用執行緒 — 事件迴圈完全不接觸磁碟 I/O
+
+    所有寫入由單一寫入執行緒依序執行 (SQLite 同時只允許一個寫入者)，
+    讀取可分派到數個讀取執行緒；未設定讀取執行緒時讀取也交給寫入執行緒。
+    每個執行緒持有自己的連線，呼叫端以 await 等待結果。
+    讀取執行緒需使用檔案資料庫 (":memory:" 每條連線各自獨立)。
+
+    群組提交: 寫入執行緒在 commit_window 內陸續到達的工作共用同一個交易，
+    每個工作包在 SAVEPOINT 中 (失敗只回滾自己)，交易提交後才通知呼叫端。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        readers: int = 0,
+        timeout: float = 30.0,
+        configure: Optional[ConnectionHook] = None,
+        commit_window: float = 0.002,
+        max_batch: int = 256,
+    ):
+        """
+        初始化執行器
+
+        Args:
+            db_path: 資料庫路徑
+            readers: 讀取執行緒數量 (0 表示讀寫共用寫入執行緒)
+            timeout: 連線等待鎖定的秒數
+            configure: 連線建立後的設定函式 (例如 PRAGMA)
+            commit_window: 群組提交等待後續寫入的秒數 (0 表示只合併已排隊的工作)
+            max_batch: 單一交易最多合併的工作數
+        """
+        self.db_path = db_path
+        self.readers = readers
+        self.timeout = timeout
+        self.configure = configure
+        self.commit_window = commit_window
+        self.max_batch = max_batch
+        self._write_jobs = queue.SimpleQueue()
+        self._read_jobs = queue.SimpleQueue() if readers else self._write_jobs
+        self._threads: List[threading.Thread] = []
+        self.stats = {"writes": 0, "reads": 0, "errors": 0, "commits": 0}
+
+    # --- 生命週期 ---
+
+    def start(self):
+        """啟動資料庫執行緒"""
+        if self._threads:
+            return
+        self._threads.append(
+            threading.Thread(target=self._run_writer, name="sqlite-writer", daemon=True)
+        )
+        for index in range(self.readers):
+            self._threads.append(
+                threading.Thread(
+                    target=self._run_reader,
+                    name=f"sqlite-reader-{index}",
+                    daemon=True,
+                )
+            )
+        for thread in self._threads:
+            thread.start()
+
+    async def close(self):
+        """處理完已排入的工作後停止執行緒"""
+        if not self._threads:
+            return
+        self._write_jobs.put(_STOP)
+        if self._read_jobs is not self._write_jobs:
+            for _ in range(self.readers):
+                self._read_jobs.put(_STOP)
+        threads, self._threads = self._threads, []
+        await asyncio.to_thread(lambda: [thread.join() for thread in threads])
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def connect(self, autocommit: bool = False) -> sqlite3.Connection:
+        """建立資料庫執行緒使用的連線 (寫入連線自行管理交易)"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        if autocommit:
+            conn.isolation_level = None
+        conn.row_factory = sqlite3.Row
+        if self.configure is not None:
+            self.configure(conn)
+        return conn
+
+    @staticmethod
+    def _notify(done: list):
+        for future, loop, result, error in done:
+            try:
+                loop.call_soon_threadsafe(_resolve, future, result, error)
+            except RuntimeError:
+                pass  # 事件迴圈已關閉
+
+    def _run_reader(self):
+        conn = self.connect()
+        jobs = self._read_jobs
+        try:
+            while True:
+                job = jobs.get()
+                if job is _STOP:
+                    break
+                func, args, future, loop = job
+                result, error = None, None
+                try:
+                    result = func(conn, *args)
+                except BaseException as e:
+                    error = e
+                    self.stats["errors"] += 1
+                self._notify([(future, loop, result, error)])
+        finally:
+            conn.close()
+
+    def _run_writer(self):
+        conn = self.connect(autocommit=True)
+        jobs = self._write_jobs
+        try:
+            stopping = False
+            while not stopping:
+                job = jobs.get()
+                if job is _STOP:
+                    break
+                done = []
+                try:
+                    stopping = self._run_batch(conn, job, jobs, done)
+                except BaseException as e:
+                    # 不可讓寫入執行緒結束，否則之後的工作會永遠等待
+                    self.stats["errors"] += 1
+                    self._rollback(conn)
+                    done[:] = [
+                        (future, loop, None, error or e) for future, loop, _, error in done
+                    ]
+                    if not any(entry[0] is job[2] for entry in done):
+                        done.append((job[2], job[3], None, e))
+                self._notify(done)
+        finally:
+            conn.close()
+
+    def _run_batch(
+        self, conn: sqlite3.Connection, job: tuple, jobs: queue.SimpleQueue, done: list
+    ) -> bool:
+        """在單一交易中執行一批工作，回傳是否收到停止標記"""
+        self._apply(conn, job, done)
+        stopping = False
+        deadline = time.monotonic() + self.commit_window
+        while len(done) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = jobs.get(timeout=remaining) if remaining > 0 else jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                stopping = True
+                break
+            self._apply(conn, job, done)
+        self._commit(conn, done)
+        return stopping
+
+    def _apply(self, conn: sqlite3.Connection, job: tuple, done: list):
+        """
+        在交易中以 SAVEPOINT 執行單一工作
+
+        工作若自行提交或結束交易，已執行的內容即已寫入；下一個工作會開啟新交易。
+        """
+        func, args, future, loop = job
+        try:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            conn.execute("SAVEPOINT job")
+        except sqlite3.Error as e:
+            self.stats["errors"] += 1
+            done.append((future, loop, None, e))
+            return
+        try:
+            result = func(conn, *args)
+        except BaseException as e:
+            self.stats["errors"] += 1
+            if conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                except sqlite3.Error:
+                    pass  # 工作已結束原本的交易，保存點不存在
+            done.append((future, loop, None, e))
+            return
+        if conn.in_transaction:
+            try:
+                conn.execute("RELEASE job")
+            except sqlite3.Error:
+                pass  # 工作自行開啟了新交易，保存點已不存在
+        done.append((future, loop, result, None))
+
+    @staticmethod
+    def _rollback(conn: sqlite3.Connection):
+        if conn.in_transaction:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+
+    def _commit(self, conn: sqlite3.Connection, done: list):
+        if not conn.in_transaction:
+            return  # 最後一個工作已自行提交
+        try:
+            conn.execute("COMMIT")
+            self.stats["commits"] += 1
+        except sqlite3.Error as e:
+            # 提交失敗時整批視為失敗
+            self._rollback(conn)
+            self.stats["errors"] += 1
+            done[:] = [
+                (future, loop, None, error or e) for future, loop, _, error in done
+            ]
+
+    # --- 提交 ---
+
+    def _submit(self, jobs: queue.SimpleQueue, func: DbJob, args: tuple) -> asyncio.Future:
+        if not self._threads:
+            self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        jobs.put((func, args, future, loop))
+        return future
+
+    async def write(self, func: DbJob, *args) -> Any:
+        """在寫入執行緒執行 func(conn, *args) (於群組交易提交後回傳)"""
+        self.stats["writes"] += 1
+        return await self._submit(self._write_jobs, func, args)
+
+    async def read(self, func: DbJob, *args) -> Any:
+        """在讀取執行緒執行 func(conn, *args) (不應修改資料)"""
+        self.stats["reads"] += 1
+        return await self._submit(self._read_jobs, func, args)
+
+    def get_stats(self) -> dict:
+        """執行統計與佇列長度"""
+        return {
+            **self.stats,
+            "readers": self.readers,
+            "write_queue": self._write_jobs.qsize(),
+            "read_queue": self._read_jobs.qsize() if self.readers else 0,
+        }
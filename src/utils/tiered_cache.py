@@ -0,0 +1,236 @@
+import asyncio
+from collections import OrderedDict
+import json
+import sys
+import time
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from src.utils.cache_keys import NamespaceIndex
+from src.utils.cache_keys import SEPARATOR
+from src.utils.database_manager import DatabaseManager
+from src.utils.database_manager import get_database_manager
+
+# 載入函式: 快取未命中時呼叫 (回傳 None 時不快取)
+Loader = Callable[[], Awaitable[Any]]
+
+# 快取未命中標記
+_MISS = object()
+
+
+def _consume_exception(task: asyncio.Future):
+    # 所有等待者都已取消時避免 "exception was never retrieved" 警告
+    if not task.cancelled():
+        task.exception()
+
+
+def _estimate_size(value: Any) -> int:
+    """估計值占用的位元組數 (以 JSON 長度近似)"""
+    try:
+        return len(json.dumps(value, default=str, ensure_ascii=False).encode("utf-8"))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class TieredCache:
+    """
+    兩層快取 — 記憶體 LRU 在前，SQLite cache_entries 在後
+
+    讀取先查記憶體，未命中再查資料庫並回填記憶體；寫入同時寫入兩層。
+    記憶體層同時受項目數與位元組數限制，超過時淘汰最久未使用者。
+    鍵以 "命名空間:..." 命名時可用 clear_namespace 一次清除 (兩層都使用索引)。
+    get_or_load 對同一個鍵同時只執行一次載入 (single-flight)，
+    其餘呼叫者等待同一個結果，避免快取失效瞬間的大量重複請求。
+    """
+
+    def __init__(
+        self,
+        db: Optional[DatabaseManager] = None,
+        max_entries: int = 2048,
+        max_bytes: int = 16 * 1024 * 1024,
+        default_ttl: float = 300.0,
+    ):
+        """
+        初始化快取
+
+        Args:
+            db: 第二層使用的資料庫管理器 (None 表示只使用記憶體)
+            max_entries: 記憶體層項目上限
+            max_bytes: 記憶體層估計位元組上限
+            default_ttl: 未指定 ttl 時的存活秒數
+        """
+        self.db = db
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # {key: (value, expires_at, size)}
+        self._memory: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._namespaces = NamespaceIndex()
+        # {key: Task} — 進行中的載入
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "coalesced": 0,
+            "evictions": 0,
+        }
+
+    # --- 記憶體層 ---
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        self._forget(key)
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return  # 單一項目超過上限時只寫入資料庫
+        self._memory[key] = (value, expires_at, size)
+        self._bytes += size
+        self._namespaces.add(key)
+        while len(self._memory) > self.max_entries or self._bytes > self.max_bytes:
+            evicted, (_, _, evicted_size) = self._memory.popitem(last=False)
+            self._bytes -= evicted_size
+            self._namespaces.discard(evicted)
+            self.stats["evictions"] += 1
+
+    def _forget(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+            self._namespaces.discard(key)
+
+    def peek(self, key: str, now: Optional[float] = None):
+        """只查詢記憶體層，未命中時回傳 _MISS"""
+        entry = self._memory.get(key)
+        if entry is None:
+            return _MISS
+        if (now if now is not None else time.time()) >= entry[1]:
+            self._forget(key)
+            return _MISS
+        self._memory.move_to_end(key)
+        return entry[0]
+
+    # --- 讀寫 ---
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """讀取快取 (記憶體 → 資料庫)"""
+        value = self.peek(key)
+        if value is not _MISS:
+            self.stats["memory_hits"] += 1
+            return value
+        if self.db is not None:
+            entry = await self.db.cache_get_entry(key)
+            if entry is not None:
+                self.stats["db_hits"] += 1
+                value, expires_at = entry
+                self._remember(key, value, expires_at)
+                return value
+        self.stats["misses"] += 1
+        return default
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, persist: bool = True):
+        """
+        寫入快取
+
+        Args:
+            key: 快取鍵
+            value: 快取值 (persist 時需可序列化為 JSON)
+            ttl: 存活秒數 (預設 default_ttl)
+            persist: 是否同時寫入資料庫 (不可序列化的物件應設為 False)
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        self._remember(key, value, time.time() + ttl)
+        if persist and self.db is not None:
+            await self.db.cache_set(key, value, ttl=ttl)
+
+    async def delete(self, key: str):
+        """刪除兩層中的快取"""
+        self._forget(key)
+        if self.db is not None:
+            await self.db.cache_delete(key)
+
+    async def clear_namespace(self, namespace: str) -> int:
+        """
+        清除命名空間 ("osu" 或 "osu:user") 中的所有快取
+
+        Returns:
+            記憶體層清除的項目數
+        """
+        keys = self._namespaces.keys(namespace)
+        for key in keys:
+            self._forget(key)
+        if self.db is not None:
+            if SEPARATOR in namespace:
+                await self.db.cache_clear_prefix(namespace + SEPARATOR)
+            else:
+                await self.db.cache_clear_namespace(namespace)
+        return len(keys)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Loader,
+        ttl: Optional[float] = None,
+        persist: bool = True,
+    ) -> Any:
+        """
+        讀取快取，未命中時呼叫 loader 並寫入快取
+
+        同一個鍵的並行呼叫共用一次載入；載入在獨立的工作中執行，
+        發起者被取消時其他等待者仍會取得結果。
+
+        Raises:
+            loader 的例外會傳遞給所有等待者，且不會被快取
+        """
+        value = await self.get(key, _MISS)
+        if value is not _MISS:
+            return value
+
+        task = self._pending.get(key)
+        if task is None:
+            self.stats["loads"] += 1
+            task = asyncio.ensure_future(self._load(key, loader, ttl, persist))
+            task.add_done_callback(_consume_exception)
+            self._pending[key] = task
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Loader, ttl: Optional[float], persist: bool) -> Any:
+        try:
+            value = await loader()
+            if value is not None:
+                await self.set(key, value, ttl=ttl, persist=persist)
+            return value
+        finally:
+            self._pending.pop(key, None)
+
+    def get_stats(self) -> dict:
+        """命中統計與記憶體層用量"""
+        return {**self.stats, "entries": len(self._memory), "bytes": self._bytes}
+
+
+tiered_cache = None
+
+
+def init_tiered_cache(**kwargs) -> TieredCache:
+    """建立全域快取 (已建立時直接回傳，並補上先前尚未建立的資料庫層)"""
+    global tiered_cache
+    if tiered_cache is None:
+        tiered_cache = TieredCache(get_database_manager(), **kwargs)
+    elif tiered_cache.db is None:
+        tiered_cache.db = get_database_manager()
+    return tiered_cache
+
+
+def get_tiered_cache() -> TieredCache:
+    global tiered_cache
+    if tiered_cache is None:
+        # 於 Cog 載入時尚未初始化則以目前的資料庫管理器建立
+        init_tiered_cache()
+    return tiered_cache
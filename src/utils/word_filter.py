@@ -0,0 +1,126 @@
+from collections import deque
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+import unicodedata
+
+# 易混淆字元對照 (數字/符號替代、西里爾/希臘相似字母)
+CONFUSABLES = {
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b",
+    "@": "a", "$": "s",
+    # 西里爾字母
+    "а": "a", "в": "b", "е": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+    "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ј": "j",
+    "ѕ": "s", "ԁ": "d", "ɡ": "g",
+    # 希臘字母
+    "α": "a", "β": "b", "ε": "e", "ι": "i", "κ": "k", "ν": "v", "ο": "o",
+    "ρ": "p", "τ": "t", "υ": "u", "χ": "x",
+}
+
+# 零寬字元 (常用於繞過過濾)
+ZERO_WIDTH = {"\u200b", "\u200c", "\u200d", "\u2060", "\ufeff", "\u00ad"}
+
+_TRANSLATE_TABLE = str.maketrans(
+    {**CONFUSABLES, **{ch: None for ch in ZERO_WIDTH}}
+)
+
+
+def normalize_text(text: str) -> str:
+    """正規化文字: 全形轉半形、去除組合符號與零寬字元、小寫化、替換易混淆字元"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.casefold().translate(_TRANSLATE_TABLE)
+
+
+def _is_word_char(ch: str) -> bool:
+    """是否為 ASCII 單字字元 (英數)"""
+    return ch.isascii() and ch.isalnum()
+
+
+class AhoCorasick:
+    """Aho-Corasick 多模式比對自動機 — 單次掃描找出所有詞彙"""
+
+    __slots__ = ("patterns", "_goto", "_fail", "_out", "_bounded")
+
+    def __init__(self, patterns: Iterable[str]):
+        # 正規化並去重 (保留原始詞彙供顯示)
+        seen: Dict[str, str] = {}
+        for raw in patterns:
+            norm = normalize_text(raw.strip())
+            if norm and norm not in seen:
+                seen[norm] = raw.strip()
+        self.patterns: List[str] = list(seen.values())
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        # 英數開頭/結尾的詞需要單字邊界 (避免 "class" 命中 "ass")
+        self._bounded: List[Tuple[bool, bool, int]] = []
+
+        for idx, norm in enumerate(seen.keys()):
+            self._bounded.append(
+                (_is_word_char(norm[0]), _is_word_char(norm[-1]), len(norm))
+            )
+            node = 0
+            for ch in norm:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(idx)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        """BFS 建立失敗連結並合併輸出"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _boundary_ok(self, text: str, end: int, idx: int) -> bool:
+        """檢查命中位置是否符合單字邊界要求"""
+        need_start, need_end, length = self._bounded[idx]
+        start = end - length + 1
+        if need_start and start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if need_end and end + 1 < len(text) and _is_word_char(text[end + 1]):
+            return False
+        return True
+
+    def find_all(self, content: str) -> List[str]:
+        """回傳內容中命中的所有詞彙 (原始形式，不重複)"""
+        if not self.patterns or not content:
+            return []
+
+        text = normalize_text(content)
+        goto, fail, out = self._goto, self._fail, self._out
+        hits: Dict[int, None] = {}
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for idx in out[node]:
+                if idx not in hits and self._boundary_ok(text, pos, idx):
+                    hits[idx] = None
+        return [self.patterns[i] for i in hits]
+
+    def search(self, content: str) -> bool:
+        """內容是否命中任一詞彙"""
+        return bool(self.find_all(content))
@@ -5,6 +5,10 @@ or network connection. They verify that the core bot class and all cogs can
 be imported and loaded without raising unexpected exceptions.
 """
 
+import os
+import subprocess
+import sys
+
 from src.bot import Bot
 
 
@@ -20,3 +24,45 @@ async def test_cogs_can_be_loaded_without_running() -> None:
     bot = Bot()
     await bot.load_cogs()
 
+    # Import and setup are timed separately for every extension.
+    assert set(bot.startup_report) == set(bot.extensions)
+    for timings in bot.startup_report.values():
+        assert set(timings) == {"import", "setup"}
+
+
+
+# Cold start (interpreter start + imports + cog loading) must stay under this
+# budget; override with COLD_START_TARGET_SECONDS on slow CI runners.
+COLD_START_TARGET_SECONDS = float(os.getenv("COLD_START_TARGET_SECONDS", "5.0"))
+
+_COLD_START_SCRIPT = """
+import asyncio
+import sys
+import time
+
+started = time.perf_counter()
+from src.bot import Bot
+
+async def main():
+    bot = Bot()
+    await bot.load_cogs()
+
+asyncio.run(main())
+heavy = [name for name in ("deep_translator", "ossapi", "psutil") if name in sys.modules]
+print(f"{time.perf_counter() - started}|{','.join(heavy)}")
+"""
+
+
+def test_cold_start_within_target() -> None:
+    """Track cold-start time and keep heavy optional imports off the startup path."""
+    result = subprocess.run(
+        [sys.executable, "-c", _COLD_START_SCRIPT],
+        capture_output=True,
+        text=True,
+        timeout=120,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert result.returncode == 0, result.stderr
+    elapsed, heavy = result.stdout.strip().splitlines()[-1].split("|")
+    assert float(elapsed) < COLD_START_TARGET_SECONDS
+    assert heavy == ""
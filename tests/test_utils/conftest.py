@@ -0,0 +1,25 @@
+"""Shared fixtures for the utility tests."""
+
+import pytest
+
+from src.utils.anti_spam import AntiSpamManager
+
+
+@pytest.fixture
+def make_anti_spam_manager(tmp_path):
+    """Build AntiSpamManagers with scratch settings and a manually advanced clock."""
+
+    class ManualClockManager(AntiSpamManager):
+        SETTINGS_FILE = str(tmp_path / "anti_spam_settings.json")
+        clock = 1_700_000_000.0
+
+        def _now(self) -> float:
+            return self.clock
+
+    def make(guilds: int, rate_mode: str = "window") -> AntiSpamManager:
+        manager = ManualClockManager()
+        for guild_id in range(1, guilds + 1):
+            manager.settings[guild_id] = {"enabled": True, "rate_mode": rate_mode}
+        return manager
+
+    return make
@@ -0,0 +1,75 @@
+"""Tests for the coalescing anti-spam moderation executor."""
+
+import asyncio
+from types import SimpleNamespace
+
+from src.utils.action_executor import ModerationExecutor
+
+
+class FakeChannel:
+    """Minimal channel recording bulk delete calls."""
+
+    def __init__(self, channel_id: int) -> None:
+        self.id = channel_id
+        self.bulk_calls = []
+
+    async def delete_messages(self, messages, reason=None) -> None:
+        self.bulk_calls.append([m.id for m in messages])
+
+
+async def test_concurrent_actions_for_same_user_run_once() -> None:
+    """Overlapping identical actions should be deduplicated while in flight."""
+    executor = ModerationExecutor()
+    calls = []
+
+    async def mute() -> None:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    results = await asyncio.gather(
+        *(executor.execute(1, 2, "mute", mute) for _ in range(5))
+    )
+    assert calls == [1]
+    assert results.count(True) == 1
+    assert executor.stats["deduped"] == 4
+
+
+async def test_purges_are_merged_into_one_bulk_delete() -> None:
+    """Tracked messages and ad-hoc deletes in a channel share one API call."""
+    executor = ModerationExecutor(purge_delay=0.01, track_per_user=15)
+    channel = FakeChannel(10)
+    guild = SimpleNamespace(id=1)
+    author = SimpleNamespace(id=2)
+    for message_id in range(100, 120):
+        executor.track_message(
+            SimpleNamespace(guild=guild, author=author, channel=channel, id=message_id)
+        )
+
+    executor.purge_user(1, 2)
+    executor.queue_delete(channel, [999])
+    await asyncio.sleep(0.05)
+
+    assert len(channel.bulk_calls) == 1
+    assert channel.bulk_calls[0] == list(range(105, 120)) + [999]
+
+
+async def test_idle_channels_are_evicted() -> None:
+    """Channels without tracked messages or pending deletes are dropped."""
+    executor = ModerationExecutor(purge_delay=0.01, track_per_user=5)
+    first, second = FakeChannel(10), FakeChannel(20)
+    guild = SimpleNamespace(id=1)
+    author = SimpleNamespace(id=2)
+    for message_id, channel in enumerate([first] * 5 + [second] * 5):
+        executor.track_message(
+            SimpleNamespace(guild=guild, author=author, channel=channel, id=message_id)
+        )
+    # The first channel's messages rolled out of the per-user log
+    assert set(executor._channels) == {20}
+
+    executor.purge_user(1, 2)
+    assert set(executor._channels) == {20}
+    await asyncio.sleep(0.05)
+
+    assert second.bulk_calls == [[5, 6, 7, 8, 9]]
+    assert executor._channels == {}
+    assert executor._channel_refs == {}
@@ -0,0 +1,29 @@
+"""Smoke test for the anti-spam replay benchmark harness."""
+
+from benchmarks.anti_spam_replay import generate_messages
+from benchmarks.anti_spam_replay import make_manager
+from benchmarks.anti_spam_replay import replay_messages
+from benchmarks.anti_spam_replay import run
+
+
+def test_replay_reports_throughput_and_latency() -> None:
+    report = run(guilds=3, users=20, messages=500, joins=50, measure_memory=False)
+    assert report["messages"]["calls"] == 500
+    assert report["joins"]["calls"] == 50
+    assert report["messages"]["per_sec"] > 0
+    assert report["messages"]["p99_us"] >= report["messages"]["p50_us"]
+    # The synthetic mix contains floods, so something must trigger.
+    assert report["messages"]["triggered"] > 0
+
+
+def test_normal_chat_does_not_trigger(tmp_path) -> None:
+    events = list(generate_messages(3, 50, 1000, mix={"normal": 1.0}, rate=20.0))
+    manager = make_manager(str(tmp_path), guilds=3)
+    assert replay_messages(manager, events)["triggered"] == 0
+
+
+def test_generated_clock_never_runs_backwards() -> None:
+    events = list(generate_messages(5, 50, 3000, mix={"flood": 1.0, "normal": 1.0}))
+    assert len(events) == 3000
+    timestamps = [event[0] for event in events]
+    assert timestamps == sorted(timestamps)
@@ -0,0 +1,96 @@
+"""Tests for audit log keyset pagination and the audit indexes."""
+
+import pytest
+
+from src.cogs.core.audit_log import describe_event
+from src.cogs.core.audit_log import parse_time
+from src.utils.database_manager import DatabaseManager
+
+
+@pytest.fixture(params=[False, True], ids=["inline", "threaded"])
+async def db(request, tmp_path):
+    manager = DatabaseManager(str(tmp_path / "db.sqlite"), threaded=request.param)
+    yield manager
+    await manager.close()
+
+
+async def _seed(db) -> None:
+    entries = []
+    for i in range(45):
+        entries.append(
+            {
+                "action": "voice_join" if i % 3 else "role_add",
+                "user_id": str(i % 5),
+                "guild_id": "1",
+                # Pairs of rows share a timestamp so the id tie-breaker matters
+                "timestamp": 1000.0 + i // 2,
+                "details": {"n": i},
+            }
+        )
+    entries.append({"action": "voice_join", "user_id": "0", "guild_id": "2", "timestamp": 1010.0})
+    assert await db.log_audit_batch(entries) == 46
+
+
+async def _all_pages(db, **query) -> list:
+    pages, cursor = [], None
+    while True:
+        rows, cursor = await db.search_audit(1, **query, after=cursor, limit=7)
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+
+async def test_pages_cover_every_row_once_in_order(db) -> None:
+    await _seed(db)
+    pages = await _all_pages(db)
+
+    assert [len(page) for page in pages] == [7] * 6 + [3]
+    ns = [row["details"]["n"] for page in pages for row in page]
+    assert ns == list(range(44, -1, -1))
+
+
+async def test_filters_combine_with_pagination(db) -> None:
+    await _seed(db)
+
+    pages = await _all_pages(db, user_id=3, action="voice_join", since=1005.0, until=1020.0)
+    rows = [row for page in pages for row in page]
+    expected = [i for i in range(45) if i % 5 == 3 and i % 3 and 1005 <= 1000 + i // 2 < 1020]
+    assert [row["details"]["n"] for row in rows] == sorted(expected, reverse=True)
+    assert all(row["guild_id"] == "1" for row in rows)
+
+
+async def test_exact_page_has_no_next_cursor(db) -> None:
+    await _seed(db)
+    rows, cursor = await db.search_audit(2, limit=1)
+    assert len(rows) == 1 and cursor is None
+
+
+async def test_search_uses_guild_and_user_indexes(db) -> None:
+    def plan(conn, sql):
+        return " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, (1, 0, 0, 5)))
+
+    guild_plan = await db._read(
+        plan,
+        "SELECT id FROM audit_logs WHERE guild_id = ? AND (timestamp, id) < (?, ?) "
+        "ORDER BY timestamp DESC, id DESC LIMIT ?",
+    )
+    user_plan = await db._read(
+        plan,
+        "SELECT id FROM audit_logs WHERE guild_id = ? AND user_id = ? "
+        "AND timestamp < ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+    )
+    assert "idx_audit_guild_timestamp" in guild_plan
+    assert "idx_audit_user_timestamp" in user_plan
+    assert "TEMP B-TREE" not in guild_plan
+
+
+def test_parse_time_accepts_date_and_minutes() -> None:
+    assert parse_time("2024-01-02") == parse_time("2024-01-02 00:00")
+    assert parse_time("2024-01-02 08:00") - parse_time("2024-01-02") == 8 * 3600
+    assert parse_time("02/01/2024") is None
+
+
+def test_describe_event_formats_details() -> None:
+    assert describe_event("voice_move", {"from_channel_id": 1, "channel_id": 2}) == "<#1> → <#2>"
+    assert describe_event("role_add", {"role_ids": [5, 6]}) == "<@&5>, <@&6>"
+    assert describe_event("nick_change", {"before": None, "after": "x"}) == "(無暱稱) → x"
@@ -0,0 +1,93 @@
+"""Tests for the adaptive slowmode controller."""
+
+import pytest
+
+from src.utils.auto_slowmode import parse_levels
+from src.utils.auto_slowmode import SlowmodeController
+
+LEVELS = [(30, 2), (60, 5), (120, 10)]
+
+
+def _flood(controller, channel_id, start, seconds, per_second, current=0):
+    """Feed a steady message rate and collect requested delays."""
+    changes = []
+    now = start
+    step = 1.0 / per_second
+    while now < start + seconds:
+        delay = controller.observe(channel_id, now, LEVELS, current)
+        if delay is not None:
+            changes.append(delay)
+            current = delay
+        now += step
+    return changes, now
+
+
+def test_raises_with_traffic_and_steps_down_with_hysteresis() -> None:
+    """Slowmode should climb under load and only step down after calming."""
+    controller = SlowmodeController(tau=10.0, min_dwell=30.0, min_edit_interval=5.0)
+    changes, now = _flood(controller, 1, 0.0, 60, per_second=3)  # ~180/min
+    assert changes and changes[-1] == 10
+
+    # Traffic stops: no change until the dwell time has passed.
+    assert controller.evaluate(1, now + 1, LEVELS) is None
+    delays = []
+    t = now
+    for _ in range(40):
+        t += 10
+        delay = controller.evaluate(1, t, LEVELS)
+        if delay is not None:
+            delays.append(delay)
+    assert delays == [5, 2, 0]
+    assert controller.active_channels() == []
+
+
+def test_restores_original_delay() -> None:
+    """A channel that already had slowmode returns to its own value."""
+    controller = SlowmodeController(tau=10.0, min_dwell=0.0, min_edit_interval=0.0)
+    changes, now = _flood(controller, 2, 0.0, 30, per_second=1, current=3)
+    assert changes and all(delay >= 3 for delay in changes)
+    assert controller.evaluate(2, now + 600, ()) == 3
+
+
+def test_parse_levels_rejects_non_increasing() -> None:
+    """Delays must increase with the rate thresholds."""
+    assert parse_levels("60:5, 30:2") == [(30, 2), (60, 5)]
+    with pytest.raises(ValueError):
+        parse_levels("30:5,60:2")
+
+
+def test_failed_edit_backs_off_without_losing_state() -> None:
+    """A channel whose edits fail is retried after a back-off, not on every message."""
+    controller = SlowmodeController(tau=10.0, min_dwell=0.0, min_edit_interval=0.0)
+    changes, now = _flood(controller, 3, 0.0, 20, per_second=3)
+    assert changes
+    assert controller.edit_failed(3, now) == 60.0
+
+    # Still flooding: no retries during the back-off window.
+    retry, now = _flood(controller, 3, now, 30, per_second=3)
+    assert retry == []
+    assert controller.rate_per_minute(3, now) > 60
+
+    # After the back-off the edit is attempted again; failures double it.
+    retry, now = _flood(controller, 3, now, 40, per_second=3)
+    assert retry
+    assert controller.edit_failed(3, now) == 120.0
+
+
+def test_shrinking_levels_clamps_channels_above_the_new_top() -> None:
+    """A guild shortening its levels must not break channels at a higher level."""
+    controller = SlowmodeController(tau=10.0, min_dwell=0.0, min_edit_interval=0.0)
+    long_levels = LEVELS + [(240, 20)]
+    now = 0.0
+    while now < 60:
+        controller.observe(4, now, long_levels)
+        now += 0.2  # ~300/min
+    assert controller.active_channels() == [4]
+
+    # Still busy: the channel drops to the new top level instead of raising.
+    assert controller.evaluate(4, now, ((30, 2), (60, 5))) == 5
+    # Quiet again: steps down through the shortened config.
+    assert controller.evaluate(4, now + 600, ((30, 2), (60, 5))) == 2
+    # No levels at all restores the original delay.
+    assert controller.evaluate(4, now + 1200, ()) == 0
+    assert controller.active_channels() == []
@@ -0,0 +1,87 @@
+"""Tests for namespaced cache keys and prefix invalidation."""
+
+import sqlite3
+
+from src.utils.cache_keys import namespaces_of
+from src.utils.cache_keys import NamespaceIndex
+from src.utils.cache_keys import prefix_upper_bound
+from src.utils.config_optimizer import ConfigCache
+from src.utils.database_manager import DatabaseManager
+from src.utils.tiered_cache import TieredCache
+
+
+def test_namespaces_and_prefix_bounds() -> None:
+    assert namespaces_of("member:1:2") == ["member", "member:1"]
+    assert namespaces_of("plain") == []
+    assert prefix_upper_bound("osu:") == "osu;"
+    assert prefix_upper_bound("") is None
+
+    index = NamespaceIndex()
+    index.add("member:1:2")
+    index.add("member:1:3")
+    index.add("member:2:3")
+    assert index.keys("member:1") == {"member:1:2", "member:1:3"}
+    index.discard("member:1:2")
+    index.discard("member:1:3")
+    assert index.keys("member:1") == set() and len(index) == 2
+
+
+async def test_database_clears_by_namespace_and_prefix(tmp_path) -> None:
+    db = DatabaseManager(str(tmp_path / "db.sqlite"), threaded=True)
+    for key in ("osu:user:a", "osu:user:b", "osu:scores:1", "github:commits:x", "osux"):
+        await db.cache_set(key, 1)
+
+    assert await db.cache_clear_prefix("osu:user:") == 2
+    assert await db.cache_clear_namespace("osu") == 1
+    # Prefix matching is case sensitive and does not match "osux" for "osu:"
+    assert await db.cache_get("osux") == 1
+    assert await db.cache_clear_pattern("github:") == 1
+    assert (await db.get_cache_stats())["total_entries"] == 1
+
+    def plan(conn, sql, params):
+        return " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+    by_namespace = await db._read(
+        plan, "DELETE FROM cache_entries WHERE namespace = ?", ("osu",)
+    )
+    by_prefix = await db._read(
+        plan, "DELETE FROM cache_entries WHERE key >= ? AND key < ?", ("a", "b")
+    )
+    assert "idx_cache_namespace" in by_namespace
+    assert "INDEX" in by_prefix and "SCAN" not in by_prefix
+    await db.close()
+
+
+async def test_existing_cache_table_gains_namespace_column(tmp_path) -> None:
+    path = str(tmp_path / "old.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE cache_entries (key TEXT PRIMARY KEY, value TEXT, timestamp REAL, ttl REAL)"
+    )
+    conn.execute("INSERT INTO cache_entries VALUES ('osu:user:a', '1', 9e12, 60)")
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(path, threaded=False)
+    assert await db.cache_clear_namespace("osu") == 1
+    await db.close()
+
+
+async def test_memory_tiers_clear_only_matching_namespace(tmp_path) -> None:
+    db = DatabaseManager(str(tmp_path / "db.sqlite"), threaded=True)
+    cache = TieredCache(db)
+    await cache.set("guild:1:config", 1)
+    await cache.set("guild:1:roles", 2)
+    await cache.set("guild:2:config", 3)
+
+    assert await cache.clear_namespace("guild:1") == 2
+    assert await cache.get("guild:1:config") is None
+    assert await TieredCache(db).get("guild:1:roles") is None
+    assert await cache.get("guild:2:config") == 3
+    await db.close()
+
+    config = ConfigCache()
+    config.set("config:a.json", {})
+    config.set("other:b", {})
+    config.clear(namespace="config")
+    assert config.get("config:a.json") is None and config.size() == 1
@@ -0,0 +1,65 @@
+"""Tests for command tree sync caching."""
+
+from types import SimpleNamespace
+
+import discord
+from discord import app_commands
+
+from src.utils.command_sync import CommandSyncCache
+from src.utils.command_sync import parse_guild_ids
+from src.utils.command_sync import tree_hash
+
+
+class FakeTree(app_commands.CommandTree):
+    """Command tree that records sync calls instead of hitting the API."""
+
+    def __init__(self) -> None:
+        super().__init__(discord.Client(intents=discord.Intents.none()))
+        self.client = SimpleNamespace(application_id=42)
+        self.synced = []
+
+    async def sync(self, *, guild=None):
+        self.synced.append(guild.id if guild else None)
+        return []
+
+
+def _command(name: str, description: str = "desc") -> app_commands.Command:
+    async def callback(interaction: discord.Interaction) -> None:
+        pass
+
+    return app_commands.Command(name=name, description=description, callback=callback)
+
+
+def test_hash_is_stable_across_registration_order() -> None:
+    first, second = FakeTree(), FakeTree()
+    for name in ("alpha", "beta"):
+        first.add_command(_command(name))
+    for name in ("beta", "alpha"):
+        second.add_command(_command(name))
+    assert tree_hash(first) == tree_hash(second)
+
+    second.remove_command("beta")
+    second.add_command(_command("beta", "changed"))
+    assert tree_hash(first) != tree_hash(second)
+
+
+async def test_sync_skipped_until_tree_changes(tmp_path) -> None:
+    state_file = str(tmp_path / "hash.json")
+    tree = FakeTree()
+    tree.add_command(_command("ping"))
+
+    assert await CommandSyncCache(state_file).sync(tree) == {"global": "synced"}
+    assert await CommandSyncCache(state_file).sync(tree) == {"global": "skipped"}
+    assert await CommandSyncCache(state_file).sync(tree, force=True) == {"global": "synced"}
+
+    tree.add_command(_command("pong"))
+    assert await CommandSyncCache(state_file).sync(tree) == {"global": "synced"}
+    assert tree.synced == [None, None, None]
+
+    assert await CommandSyncCache(state_file).sync(tree, guild_ids=[7]) == {"7": "synced"}
+    assert tree.synced[-1] == 7
+
+
+def test_parse_guild_ids() -> None:
+    assert parse_guild_ids(" 1, 2,,x,3 ") == [1, 2, 3]
+    assert parse_guild_ids(None) == []
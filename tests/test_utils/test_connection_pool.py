@@ -0,0 +1,99 @@
+"""Tests for the asyncio-native SQLite connection pool."""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.utils.database_manager import DatabaseConnectionPool
+from src.utils.database_manager import DatabaseManager
+from src.utils.database_manager import PoolTimeoutError
+
+
+async def test_single_writer_and_read_only_readers(tmp_path) -> None:
+    pool = DatabaseConnectionPool(str(tmp_path / "db.sqlite"), readers=2)
+    async with pool.connection(write=True) as conn:
+        conn.execute("INSERT INTO metrics (metric_name, value) VALUES ('m', 1)")
+        conn.commit()
+
+    async with pool.connection() as first, pool.connection() as second:
+        assert first is not second
+        assert first.execute("SELECT COUNT(*) FROM metrics").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            first.execute("DELETE FROM metrics")
+
+    stats = pool.get_stats()
+    assert stats["write"]["created"] == 1 and stats["read"]["created"] == 2
+    assert stats["read"]["in_use"] == 0 and stats["read"]["idle"] == 2
+    pool.close()
+
+
+async def test_waiters_are_served_in_order_and_time_out(tmp_path) -> None:
+    pool = DatabaseConnectionPool(str(tmp_path / "db.sqlite"), readers=0)
+    held = await pool.acquire(write=True)
+    order = []
+
+    async def worker(name):
+        async with pool.connection(write=True):
+            order.append(name)
+
+    tasks = [asyncio.ensure_future(worker(i)) for i in range(5)]
+    await asyncio.sleep(0)
+    assert pool.get_stats()["write"]["waiting"] == 5
+
+    with pytest.raises(PoolTimeoutError):
+        await pool.acquire(write=True, timeout=0.01)
+    assert pool.get_stats()["timeouts"] == 1
+
+    # A late caller cannot jump ahead of queued waiters
+    pool.release(held, write=True)
+    tasks.append(asyncio.ensure_future(worker("late")))
+    await asyncio.gather(*tasks)
+    assert order == [0, 1, 2, 3, 4, "late"]
+    assert pool.get_stats()["max_wait_ms"] > 0
+    pool.close()
+
+
+async def test_cancelled_waiter_does_not_leak_connection(tmp_path) -> None:
+    pool = DatabaseConnectionPool(str(tmp_path / "db.sqlite"), readers=0)
+    held = await pool.acquire(write=True)
+    waiter = asyncio.ensure_future(pool.acquire(write=True))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    pool.release(held, write=True)
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    conn = await pool.acquire(write=True, timeout=0.1)
+    assert conn is held
+    pool.release(conn, write=True)
+    pool.close()
+
+
+async def test_broken_idle_connections_are_replaced(tmp_path) -> None:
+    pool = DatabaseConnectionPool(
+        str(tmp_path / "db.sqlite"), readers=1, health_check_interval=0
+    )
+    conn = await pool.acquire()
+    pool.release(conn)
+    conn.close()
+
+    fresh = await pool.acquire()
+    assert fresh is not conn
+    assert fresh.execute("SELECT 1").fetchone()[0] == 1
+    pool.release(fresh)
+    assert pool.get_stats()["replaced"] == 1
+
+    fresh.close()
+    assert await pool.health_check() == {"checked": 1, "replaced": 1}
+    pool.close()
+
+
+async def test_inline_manager_uses_pool_and_reports_stats() -> None:
+    db = DatabaseManager(":memory:", threaded=False)
+    assert await db.cache_set("k", {"v": 1})
+    assert await db.cache_get("k") == {"v": 1}
+    stats = db.get_pool_stats()
+    assert stats["mode"] == "inline" and stats["read"]["capacity"] == 0
+    assert stats["write"]["created"] == 1 and stats["checkouts"] >= 2
+    await db.close()
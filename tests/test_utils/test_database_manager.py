@@ -0,0 +1,127 @@
+"""Tests for DatabaseManager batch ingestion and buffered recording."""
+
+import json
+
+import pytest
+
+from src.utils import database_manager as database_module
+from src.utils.database_manager import DatabaseManager
+
+
+@pytest.fixture(params=[False, True], ids=["inline", "threaded"])
+async def db(request, tmp_path):
+    manager = DatabaseManager(str(tmp_path / "db.sqlite"), threaded=request.param)
+    yield manager
+    await manager.close()
+
+
+async def test_store_metrics_batch_writes_all_rows(db) -> None:
+    rows = [("latency", float(i), {"i": i}) for i in range(50)]
+    rows.append(("explicit", 1.0, None, 123.0))
+
+    assert await db.store_metrics_batch(rows) == 51
+    assert await db.store_metrics_batch([]) == 0
+
+    metrics = await db.get_metrics("latency")
+    assert len(metrics) == 50
+    assert {json.loads(m["metadata"])["i"] for m in metrics} == set(range(50))
+
+
+async def test_log_audit_batch_uses_single_transaction(db) -> None:
+    entries = [
+        {"action": "ban", "user_id": str(i), "guild_id": "1", "details": {"n": i}}
+        for i in range(20)
+    ]
+    assert await db.log_audit_batch(entries) == 20
+
+    def count(conn):
+        return conn.execute("SELECT COUNT(*) FROM audit_logs").fetchone()[0]
+
+    assert await db._read(count) == 20
+    if db.executor is not None:
+        # One write job, so at most one commit for the batch
+        assert db.executor.stats["commits"] == 1
+
+
+async def test_invalid_batch_is_rolled_back(db) -> None:
+    # The third value cannot be bound, so the whole executemany fails
+    rows = [("bad", 1.0), ("bad", 2.0), ("bad", object())]
+    assert await db.store_metrics_batch(rows) == 0
+    assert await db.get_metrics("bad") == []
+
+    # Entries without an action are rejected without touching the database
+    assert await db.log_audit_batch([{"action": "ok"}, {"user_id": "1"}]) == 0
+
+
+async def test_record_buffers_until_flush(db) -> None:
+    for i in range(10):
+        db.record("events", 1.0, {"i": i})
+    db.record_audit("kick", "2", "1", {"reason": "spam"})
+
+    assert await db.get_metrics("events") == []
+    assert await db.flush() == 11
+    assert len(await db.get_metrics("events")) == 10
+    assert db.buffer_stats["flushed"] == 11
+
+
+async def test_close_flushes_buffer(tmp_path) -> None:
+    path = str(tmp_path / "db.sqlite")
+    db = DatabaseManager(path, threaded=True)
+    db.record("on_close", 2.0)
+    await db.close()
+
+    reopened = DatabaseManager(path, threaded=False)
+    assert len(await reopened.get_metrics("on_close")) == 1
+    await reopened.close()
+
+
+async def test_failed_flush_keeps_rows_for_retry(db, monkeypatch) -> None:
+    store = db.store_metrics_batch
+    calls = []
+
+    async def failing_once(metrics):
+        calls.append(len(metrics))
+        if len(calls) == 1:
+            return 0
+        return await store(metrics)
+
+    monkeypatch.setattr(db, "store_metrics_batch", failing_once)
+    for i in range(5):
+        db.record("retry", float(i))
+
+    assert await db.flush() == 0
+    assert db.buffer_stats["requeued"] == 5
+    db.record("retry", 5.0)
+
+    assert await db.flush() == 6
+    values = sorted(m["value"] for m in await db.get_metrics("retry"))
+    assert values == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+async def test_requeue_is_capped(db, monkeypatch) -> None:
+    monkeypatch.setattr(database_module, "MAX_BUFFERED_ROWS", 4)
+
+    async def fail_while_new_rows_arrive(metrics):
+        for i in range(10, 13):
+            db.record("capped", float(i))
+        return 0
+
+    monkeypatch.setattr(db, "store_metrics_batch", fail_while_new_rows_arrive)
+    for i in range(3):
+        db.record("capped", float(i))
+    await db.flush()
+
+    # Failed rows go back in front; the oldest are dropped to respect the cap.
+    assert [row[1] for row in db._metric_buffer] == [2.0, 10.0, 11.0, 12.0]
+    assert db.buffer_stats["dropped"] == 2
+    assert db.buffer_stats["requeued"] == 1
+    db._metric_buffer.clear()
+
+
+async def test_periodic_flush_does_not_clear_threshold_flag(db) -> None:
+    marker = object()
+    db._flushing = marker
+    db.record("flag", 1.0)
+    await db.flush()
+    assert db._flushing is marker
+    db._flushing = None
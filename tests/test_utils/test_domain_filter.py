@@ -0,0 +1,36 @@
+"""Tests for the domain reputation trie and mmap'd global denylist."""
+
+from src.utils.domain_filter import DomainTrie
+from src.utils.domain_filter import extract_host
+from src.utils.domain_filter import GlobalDenylist
+
+
+def test_trie_wildcard_and_exact_rules() -> None:
+    trie = DomainTrie(["*.example.com", "exact.org", "https://Shop.Test/path"])
+    assert trie.match("example.com") == "*.example.com"
+    assert trie.match("a.b.example.com") == "*.example.com"
+    assert trie.match("exact.org") == "exact.org"
+    assert trie.match("sub.exact.org") is None
+    assert trie.match("shop.test") == "shop.test"
+    assert trie.match("notexample.com") is None
+    assert extract_host("https://WWW.Example.COM./x?y") == "www.example.com"
+
+
+def test_global_denylist_matches_parent_domains(tmp_path) -> None:
+    source = tmp_path / "phishing.txt"
+    lines = ["# comment", "0.0.0.0 steamcommunlty.ru", "free-nitro.gift"]
+    lines += [f"scam{i}.example" for i in range(1000)]
+    source.write_text("\n".join(lines), encoding="utf-8")
+
+    denylist = GlobalDenylist.from_source(str(source))
+    try:
+        assert len(denylist) == 1002
+        assert denylist.match("login.steamcommunlty.ru") == "steamcommunlty.ru"
+        assert denylist.match("free-nitro.gift") == "free-nitro.gift"
+        assert denylist.match("scam999.example") == "scam999.example"
+        assert denylist.match("discord.com") is None
+        assert denylist.match("gift") is None
+    finally:
+        denylist.close()
+
+    assert len(GlobalDenylist.from_source(str(tmp_path / "missing.txt"))) == 0
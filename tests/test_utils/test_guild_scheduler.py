@@ -0,0 +1,118 @@
+"""Tests for the per-guild deficit round-robin scheduler."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from src.bot import Bot
+from src.utils.guild_scheduler import GuildScheduler
+
+
+async def test_flooded_guild_does_not_starve_others() -> None:
+    scheduler = GuildScheduler(workers=1, max_queue=1000)
+    order = []
+
+    def job(guild_id):
+        async def run():
+            order.append(guild_id)
+            await asyncio.sleep(0)
+        return run
+
+    for _ in range(300):
+        scheduler.submit(1, job(1))
+    for _ in range(5):
+        scheduler.submit(2, job(2))
+
+    scheduler.start()
+    try:
+        while len(order) < 305:
+            await asyncio.sleep(0)
+    finally:
+        await scheduler.close()
+
+    # Guild 2 is interleaved with the flood instead of waiting behind it.
+    last_b = max(i for i, g in enumerate(order) if g == 2)
+    assert last_b < 12
+    assert scheduler.get_stats()["guilds"][1]["processed"] == 300
+
+
+async def test_overflow_is_shed_and_counted() -> None:
+    scheduler = GuildScheduler(workers=1, max_queue=3)
+
+    async def noop():
+        return None
+
+    accepted = [scheduler.submit(7, noop, kind="log") for _ in range(5)]
+    assert accepted == [True, True, True, False, False]
+    assert scheduler.depth(7) == 3
+    assert scheduler.get_stats()["guilds"][7]["shed"] == 2
+    assert scheduler.drain_shed(7, "log") == 2
+    assert scheduler.drain_shed(7, "log") == 0
+
+    # Commands typed by users are never shed.
+    assert scheduler.submit(7, noop, kind="commands", force=True)
+    assert scheduler.depth(7) == 4
+
+
+async def test_close_runs_forced_jobs_and_drops_the_rest() -> None:
+    scheduler = GuildScheduler(workers=1, max_queue=10)
+    ran = []
+
+    def job(name):
+        async def run():
+            ran.append(name)
+        return run
+
+    scheduler.submit(1, job("log"), kind="log")
+    scheduler.submit(1, job("command"), kind="commands", force=True)
+    scheduler.submit(2, job("other command"), kind="commands", force=True)
+    await scheduler.close()
+
+    assert ran == ["command", "other command"]
+    assert scheduler.depth(1) == 0
+
+
+async def test_blacklisted_author_is_enforced_while_queue_is_saturated() -> None:
+    bot = Bot()
+    bot.guild_scheduler = GuildScheduler(workers=1, max_queue=2)
+    bot.get_prefix = AsyncMock(return_value="!")
+    bot.blacklist_manager.check = AsyncMock(
+        side_effect=lambda user_id: {"mode": "global_ban"} if user_id == 666 else None
+    )
+    bot.process_commands = AsyncMock()
+    release = asyncio.Event()
+
+    async def busy():
+        await release.wait()
+
+    bot.guild_scheduler.start()
+    try:
+        # One job is running, two more fill the queue.
+        bot.guild_scheduler.submit(1, busy, kind="commands")
+        while bot.guild_scheduler.depth(1):
+            await asyncio.sleep(0)
+        assert bot.guild_scheduler.submit(1, busy, kind="commands")
+        assert bot.guild_scheduler.submit(1, busy, kind="commands")
+
+        guild = SimpleNamespace(id=1, ban=AsyncMock())
+
+        def message(author_id):
+            return SimpleNamespace(
+                author=SimpleNamespace(id=author_id, bot=False),
+                guild=guild,
+                content="spam",
+                reply=AsyncMock(),
+            )
+
+        banned = message(666)
+        await bot.on_message(banned)
+        guild.ban.assert_awaited_once()
+        banned.reply.assert_awaited_once()
+
+        # Ordinary traffic from other users is still shed while the queue is full.
+        await bot.on_message(message(7))
+        assert bot.guild_scheduler.get_stats()["guilds"][1]["shed"] == 1
+    finally:
+        release.set()
+        await bot.guild_scheduler.close()
+    bot.process_commands.assert_not_awaited()
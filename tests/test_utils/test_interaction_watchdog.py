@@ -0,0 +1,62 @@
+"""Tests for the interaction auto-defer watchdog."""
+
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from src.utils.interaction_watchdog import AutoDeferResponse
+from src.utils.interaction_watchdog import InteractionWatchdog
+
+
+class FakeFollowup:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def send(self, content=None, *, wait=False, **kwargs):
+        self.sent.append((content, kwargs))
+
+
+class FakeInteraction:
+    """Minimal interaction: records the initial response type."""
+
+    def __init__(self) -> None:
+        self.type = discord.InteractionType.application_command
+        self.command = SimpleNamespace(qualified_name="slow")
+        self.followup = FakeFollowup()
+        self.responses = []
+
+
+async def test_slow_handler_is_deferred_and_reply_redirected(monkeypatch) -> None:
+    async def fake_defer(self, *, ephemeral=False, thinking=False):
+        self._parent.responses.append("defer")
+        self._response_type = discord.InteractionResponseType.deferred_channel_message
+
+    async def fake_send(self, content=None, **kwargs):
+        self._parent.responses.append("message")
+        self._response_type = discord.InteractionResponseType.channel_message
+
+    monkeypatch.setattr(discord.InteractionResponse, "defer", fake_defer)
+    monkeypatch.setattr(discord.InteractionResponse, "send_message", fake_send)
+
+    watchdog = InteractionWatchdog(delay=0.01)
+
+    slow = FakeInteraction()
+    response = AutoDeferResponse(slow)
+    task = asyncio.ensure_future(watchdog._timer(slow, response))
+    await asyncio.sleep(0.03)  # handler still busy past the deadline
+    await response.send_message("done", ephemeral=True)
+    watchdog.detach(task, SimpleNamespace(response=response))
+    assert slow.responses == ["defer"]
+    assert slow.followup.sent == [("done", {"ephemeral": True})]
+
+    fast = FakeInteraction()
+    response = AutoDeferResponse(fast)
+    task = asyncio.ensure_future(watchdog._timer(fast, response))
+    await response.send_message("quick")
+    watchdog.detach(task, SimpleNamespace(response=response))
+    await asyncio.sleep(0.03)
+    assert fast.responses == ["message"] and not fast.followup.sent
+
+    assert watchdog.deadline_misses == 1
+    assert watchdog.get_stats()["slow_commands"] == [("slow", 1)]
@@ -0,0 +1,75 @@
+"""Tests for the single-flight invite resolution cache."""
+
+import asyncio
+
+import pytest
+
+from src.utils.invite_resolver import InviteResolver
+
+
+async def test_concurrent_lookups_share_one_fetch() -> None:
+    """Many messages with the same unseen code trigger a single API call."""
+    calls = []
+
+    async def fetch(code):
+        calls.append(code)
+        await asyncio.sleep(0.01)
+        return 42 if code == "partner" else None
+
+    resolver = InviteResolver(fetch)
+    results = await asyncio.gather(*(resolver.resolve("partner") for _ in range(20)))
+    assert results == [42] * 20
+    assert calls == ["partner"]
+
+    # Invalid invites are negatively cached as well.
+    assert await resolver.resolve("gone") is None
+    assert await resolver.resolve("gone") is None
+    assert calls == ["partner", "gone"]
+    assert resolver.stats["lookups"] == 2
+
+
+async def test_expiry_eviction_and_errors_are_not_cached() -> None:
+    attempts = 0
+
+    async def fetch(code):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RuntimeError("rate limited")
+        return int(code)
+
+    resolver = InviteResolver(fetch, ttl=60, max_entries=2)
+    with pytest.raises(RuntimeError):
+        await resolver.resolve("1")
+    assert await resolver.resolve("1") == 1
+
+    await resolver.resolve("2")
+    await resolver.resolve("3")
+    assert len(resolver) == 2 and not resolver.is_cached("1")
+
+    resolver.store("4", 4, now=0.0)
+    assert resolver.peek("4", now=30.0) == 4
+    assert resolver.peek("4", now=61.0) != 4
+    assert len(resolver) == 1
+
+
+async def test_cancelled_first_caller_does_not_strand_waiters() -> None:
+    """Cancelling the caller that started a lookup must not hang the others."""
+    release = asyncio.Event()
+
+    async def fetch(code):
+        await release.wait()
+        return 7
+
+    resolver = InviteResolver(fetch)
+    first = asyncio.ensure_future(resolver.resolve("abc"))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(resolver.resolve("abc"))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.wait_for(second, timeout=1) == 7
+    assert first.cancelled()
+    assert resolver.stats["lookups"] == 1
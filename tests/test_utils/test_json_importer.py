@@ -0,0 +1,141 @@
+"""Tests for schema migrations and the streaming JSON importer."""
+
+import json
+import sqlite3
+
+import pytest
+
+from src.utils.db_migrations import apply_migrations
+from src.utils.db_migrations import current_version
+from src.utils.db_migrations import latest_version
+from src.utils.json_importer import DEFAULT_SOURCES
+from src.utils.json_importer import iter_items
+from src.utils.json_importer import JsonImporter
+from src.utils.json_importer import JsonSource
+from src.utils.json_importer import JsonStreamError
+
+MESSAGE_LOG = next(s for s in DEFAULT_SOURCES if s.name == "message_log")
+
+
+def _write(path, data) -> str:
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def _message_log(count: int) -> dict:
+    return {
+        f"1_{i}": {
+            "message_id": i,
+            "guild_id": 1,
+            "channel_id": 2,
+            "author_id": 100 + i % 3,
+            "original_content": f"訊息 {i} " + "內容" * (i % 5),
+            "edit_history": ["編輯"] if i % 2 else [],
+            "deleted": False,
+            "attachments": [],
+            "created_at": f"2024-01-01T00:00:{i:02d}+08:00",
+        }
+        for i in range(count)
+    }
+
+
+def test_stream_matches_json_load_across_chunk_boundaries(tmp_path) -> None:
+    data = {"數字": 12345678, "巢狀": {"a": [1, 2.5, None, True]}, "空": {}, "字串": "中文" * 50}
+    path = _write(tmp_path / "data.json", data)
+    for chunk_size in (1, 3, 7, 64):
+        items = list(iter_items(path, chunk_size=chunk_size))
+        assert {k: v for k, v, _ in items} == data
+
+    # Resuming from any returned offset yields exactly the remaining items
+    items = list(iter_items(path, chunk_size=5))
+    for i, (_, _, offset) in enumerate(items):
+        rest = [k for k, _, _ in iter_items(path, offset, chunk_size=5)]
+        assert rest == [k for k, _, _ in items[i + 1 :]]
+
+    array = _write(tmp_path / "array.json", [{"x": 1}, 2, "三"])
+    assert [(k, v) for k, v, _ in iter_items(array, chunk_size=2)] == [
+        ("0", {"x": 1}),
+        ("1", 2),
+        ("2", "三"),
+    ]
+    assert list(iter_items(_write(tmp_path / "empty.json", {}))) == []
+
+    broken = tmp_path / "broken.json"
+    broken.write_text('{"a": 1, "b": [1, 2', encoding="utf-8")
+    with pytest.raises(JsonStreamError):
+        list(iter_items(str(broken), chunk_size=4))
+
+
+def test_migrations_upgrade_databases_created_before_versioning(tmp_path) -> None:
+    conn = sqlite3.connect(str(tmp_path / "old.sqlite"))
+    conn.execute(
+        "CREATE TABLE cache_entries (key TEXT PRIMARY KEY, value TEXT, timestamp REAL, ttl REAL)"
+    )
+    conn.execute("INSERT INTO cache_entries VALUES ('osu:a', '1', 0, 60)")
+    conn.commit()
+
+    assert current_version(conn) == 0
+    assert apply_migrations(conn) == list(range(1, latest_version() + 1))
+    assert current_version(conn) == latest_version()
+    assert apply_migrations(conn) == []
+    assert conn.execute("SELECT namespace FROM cache_entries").fetchone()[0] == "osu"
+
+
+def test_import_resumes_after_failure_and_verifies(tmp_path) -> None:
+    conn = sqlite3.connect(str(tmp_path / "db.sqlite"))
+    apply_migrations(conn)
+    data = _message_log(20)
+    source = MESSAGE_LOG._replace(path=_write(tmp_path / "message_log.json", data))
+
+    calls = 0
+
+    def flaky(name, key, value):
+        nonlocal calls
+        calls += 1
+        if calls == 8:
+            raise RuntimeError("interrupted")
+        return MESSAGE_LOG.mapper(name, key, value)
+
+    importer = JsonImporter(conn, batch_size=3)
+    with pytest.raises(RuntimeError):
+        importer.import_source(source._replace(mapper=flaky))
+    # Two full batches were committed before the failure
+    assert importer.table_rows(source) == 6
+
+    result = importer.import_source(source)
+    assert result["status"] == "imported" and result["rows"] == 20
+    assert result["resumed_from"] > 0
+    assert importer.verify(source) == {
+        "source": "message_log",
+        "file_items": 20,
+        "table_rows": 20,
+        "ok": True,
+    }
+    assert importer.import_source(source)["status"] == "up_to_date"
+
+    row = conn.execute(
+        "SELECT original_content, edit_history FROM message_logs WHERE message_id = 5"
+    ).fetchone()
+    assert row == (data["1_5"]["original_content"], '["編輯"]')
+
+
+def test_documents_are_scoped_by_source(tmp_path) -> None:
+    conn = sqlite3.connect(str(tmp_path / "db.sqlite"))
+    apply_migrations(conn)
+    importer = JsonImporter(conn)
+    links = JsonSource(
+        "osu_links",
+        _write(tmp_path / "osu_links.json", {"1": {"username": "a"}, "2": {"username": "b"}}),
+        "documents",
+        DEFAULT_SOURCES[0].mapper,
+    )
+    tickets = links._replace(name="tickets", path=_write(tmp_path / "t.json", {"9": {}}))
+
+    assert importer.import_source(links)["rows"] == 2
+    assert importer.import_source(tickets)["rows"] == 1
+    assert importer.verify(links)["ok"] and importer.verify(tickets)["ok"]
+    assert importer.import_source(links, fresh=True)["rows"] == 2
+    assert importer.table_rows(links) == 2
+
+    missing = links._replace(path=str(tmp_path / "missing.json"))
+    assert importer.import_source(missing)["status"] == "missing"
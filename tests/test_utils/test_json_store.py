@@ -0,0 +1,95 @@
+"""Tests for the debounced write-behind JSON store."""
+
+import asyncio
+import json
+import os
+
+from src.utils.json_store import flush_all
+from src.utils.json_store import get_json_store
+from src.utils.json_store import JsonStore
+
+
+def _read(path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def test_mutations_within_delay_are_written_once(tmp_path) -> None:
+    path = tmp_path / "data.json"
+    store = JsonStore(str(path), delay=0.05)
+
+    for i in range(20):
+        store.data[str(i)] = i
+        store.mark_dirty()
+    assert not path.exists()
+
+    await asyncio.sleep(0.2)
+    assert _read(path) == {str(i): i for i in range(20)}
+    assert store.stats["writes"] == 1
+    assert store.stats["coalesced"] == 19
+    assert not store.dirty
+
+
+async def test_changes_during_write_are_flushed_later(tmp_path) -> None:
+    path = tmp_path / "data.json"
+    store = JsonStore(str(path), delay=0.01)
+
+    store.set({"a": 1})
+    await asyncio.sleep(0.05)
+    store.data["b"] = 2
+    store.mark_dirty()
+    await asyncio.sleep(0.05)
+
+    assert _read(path) == {"a": 1, "b": 2}
+    assert store.stats["writes"] == 2
+
+
+async def test_flush_all_writes_pending_stores(tmp_path) -> None:
+    first = get_json_store(str(tmp_path / "a.json"), delay=60)
+    second = get_json_store(str(tmp_path / "b.json"), delay=60)
+    assert get_json_store(str(tmp_path / "a.json")) is first
+
+    first.set({"x": 1})
+    second.set(["y"])
+    assert await flush_all() >= 2
+
+    assert _read(tmp_path / "a.json") == {"x": 1}
+    assert _read(tmp_path / "b.json") == ["y"]
+    assert await first.flush() is False
+
+
+async def test_replace_is_atomic_and_keeps_backup(tmp_path) -> None:
+    path = tmp_path / "nested" / "config.json"
+    store = JsonStore(str(path), delay=60, backup=True)
+
+    store.set({"version": 1})
+    await store.flush()
+    store.set({"version": 2})
+    await store.flush()
+
+    assert _read(path) == {"version": 2}
+    assert _read(f"{path}.backup") == {"version": 1}
+    assert not os.path.exists(f"{path}.tmp")
+
+
+async def test_failed_write_stays_dirty(tmp_path) -> None:
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    store = JsonStore(str(blocker / "data.json"), delay=60)
+
+    store.set({"a": 1})
+    assert await store.flush() is False
+    assert store.dirty
+    assert store.stats["errors"] == 1
+
+
+def test_without_event_loop_writes_immediately(tmp_path) -> None:
+    path = tmp_path / "data.json"
+    path.write_text("not json", encoding="utf-8")
+    store = JsonStore(str(path), default=lambda: {"guilds": {}})
+
+    assert store.data == {"guilds": {}}
+    store.data["guilds"]["1"] = {"log_channel": 2}
+    store.mark_dirty()
+
+    assert _read(path) == {"guilds": {"1": {"log_channel": 2}}}
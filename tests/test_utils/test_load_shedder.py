@@ -0,0 +1,36 @@
+"""Tests for the event-loop lag degradation controller."""
+
+from src.utils.load_shedder import LEVEL_MODERATION_ONLY
+from src.utils.load_shedder import LEVEL_NORMAL
+from src.utils.load_shedder import LEVEL_SHED_COSMETIC
+from src.utils.load_shedder import LoadShedder
+from src.utils.load_shedder import PRIORITY_COSMETIC
+from src.utils.load_shedder import PRIORITY_STANDARD
+
+
+async def test_levels_escalate_fast_and_recover_with_hysteresis() -> None:
+    shedder = LoadShedder(thresholds=(0.25, 1.0), min_dwell=30.0, alpha=1.0)
+    changes = []
+
+    async def listener(old, new, lag):
+        changes.append((old, new))
+
+    shedder.add_listener(listener)
+
+    await shedder.observe(0.4, now=0.0)
+    assert shedder.level == LEVEL_SHED_COSMETIC
+    assert not shedder.allows(PRIORITY_COSMETIC) and shedder.allows(PRIORITY_STANDARD)
+
+    await shedder.observe(2.0, now=1.0)
+    assert shedder.level == LEVEL_MODERATION_ONLY
+    assert not shedder.allows(PRIORITY_STANDARD)
+
+    # Lag is gone, but the level holds until the dwell time has passed.
+    await shedder.observe(0.0, now=10.0)
+    assert shedder.level == LEVEL_MODERATION_ONLY
+    await shedder.observe(0.0, now=31.0)
+    assert shedder.level == LEVEL_SHED_COSMETIC
+    await shedder.observe(0.0, now=62.0)
+    assert shedder.level == LEVEL_NORMAL
+
+    assert changes == [(0, 1), (1, 2), (2, 1), (1, 0)]
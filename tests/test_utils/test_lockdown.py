@@ -0,0 +1,74 @@
+"""Tests for the snapshot/restore lockdown engine."""
+
+import asyncio
+
+import discord
+
+from src.utils.lockdown import LockdownEngine
+
+
+class FakeRole:
+    """Hashable stand-in for the @everyone role."""
+
+
+class FakeChannel:
+    """Channel storing permission overwrites in memory."""
+
+    def __init__(self, channel_id: int, role: FakeRole, overwrite=None) -> None:
+        self.id = channel_id
+        self.overwrites = {role: overwrite} if overwrite is not None else {}
+
+    def overwrites_for(self, role: FakeRole) -> discord.PermissionOverwrite:
+        current = self.overwrites.get(role)
+        return discord.PermissionOverwrite(**dict(current)) if current else (
+            discord.PermissionOverwrite()
+        )
+
+    async def set_permissions(self, role, *, overwrite=None, reason=None) -> None:
+        await asyncio.sleep(0)
+        if overwrite is None:
+            self.overwrites.pop(role, None)
+        else:
+            self.overwrites[role] = overwrite
+
+
+class FakeGuild:
+    """Guild exposing the attributes used by the engine."""
+
+    def __init__(self, channels, role) -> None:
+        self.id = 1
+        self.default_role = role
+        self.text_channels = channels
+
+    def get_channel(self, channel_id: int):
+        return next((c for c in self.text_channels if c.id == channel_id), None)
+
+
+def _state(channels, role):
+    return [dict(c.overwrites[role]) if role in c.overwrites else None for c in channels]
+
+
+async def test_lock_and_restore_preserves_previous_overwrites(tmp_path, monkeypatch) -> None:
+    """Unlocking must restore each channel exactly, including missing overwrites."""
+    monkeypatch.setattr(LockdownEngine, "SNAPSHOT_FILE", str(tmp_path / "snap.json"))
+    role = FakeRole()
+    channels = [
+        FakeChannel(1, role),
+        FakeChannel(2, role, discord.PermissionOverwrite(send_messages=True)),
+        FakeChannel(3, role, discord.PermissionOverwrite(add_reactions=False)),
+        FakeChannel(4, role, discord.PermissionOverwrite(send_messages=False)),
+    ]
+    guild = FakeGuild(channels, role)
+    before = _state(channels, role)
+
+    engine = LockdownEngine(concurrency=2)
+    result = await engine.lock(guild, reason="test")
+    assert result == {"total": 3, "done": 3, "failed": 0}
+    assert all(c.overwrites_for(role).send_messages is False for c in channels)
+
+    # A fresh engine must be able to restore from the persisted snapshot.
+    restored = LockdownEngine()
+    assert restored.is_active(guild.id)
+    await restored.unlock(guild, reason="test")
+    assert _state(channels, role) == before
+    assert not restored.is_active(guild.id)
@@ -0,0 +1,75 @@
+"""Tests for metric downsampling, retention and resolution selection."""
+
+import random
+import time
+
+from src.utils.database_manager import DatabaseManager
+from src.utils.metric_rollup import choose_resolution
+from src.utils.metric_rollup import QuantileSketch
+from src.utils.metric_rollup import SKETCH_ACCURACY
+
+
+def test_sketch_quantiles_stay_within_relative_error() -> None:
+    rng = random.Random(7)
+    values = [rng.lognormvariate(3, 1) for _ in range(5000)] + [0.0, -2.0]
+    half = len(values) // 2
+    first, second = QuantileSketch(), QuantileSketch()
+    for value in values[:half]:
+        first.add(value)
+    for value in values[half:]:
+        second.add(value)
+    # Merging two sketches equals sketching everything at once
+    merged = QuantileSketch.from_json(first.to_json())
+    merged.merge(second)
+    assert merged.count == len(values)
+
+    ordered = sorted(values)
+    for q in (0.5, 0.9, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert abs(merged.quantile(q) - exact) <= exact * SKETCH_ACCURACY * 2.5
+    assert merged.quantile(0.0) < 0
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_choose_resolution_prefers_finest_affordable() -> None:
+    now = 1_000_000_000.0
+    retention = {"raw": 3600, "1m": 86400, "1h": 30 * 86400}
+    assert choose_resolution(now - 300, now, now, retention, 500) == "raw"
+    # Within raw retention but too many raw points
+    assert choose_resolution(now - 3000, now, now, retention, 500) == "1m"
+    # Older than raw retention
+    assert choose_resolution(now - 7200, now - 7000, now, retention, 500) == "1m"
+    assert choose_resolution(now - 7 * 86400, now, now, retention, 500) == "1h"
+    # Beyond every retention falls back to the coarsest
+    assert choose_resolution(now - 365 * 86400, now, now, retention, 500) == "1h"
+
+
+async def test_rollup_merges_late_rows_and_applies_retention(tmp_path) -> None:
+    db = DatabaseManager(str(tmp_path / "db.sqlite"), threaded=True)
+    base = (time.time() // 3600 - 2) * 3600
+    rows = [("latency", float(v), None, base + i) for i, v in enumerate(range(1, 121))]
+    await db.store_metrics_batch(rows)
+    assert await db.rollup_metrics(batch_size=50) == 120
+
+    result = await db.query_metrics("latency", base, base + 120, resolution="1m")
+    assert result["resolution"] == "1m"
+    first, second = result["points"]
+    assert (first["count"], first["min"], first["max"]) == (60, 1.0, 60.0)
+    assert second["avg"] == sum(range(61, 121)) / 60
+    assert abs(first["p50"] - 30) <= 1
+
+    # A late row for an already rolled-up minute is merged, not duplicated
+    await db.store_metrics_batch([("latency", 1000.0, None, base + 5)])
+    assert await db.rollup_metrics() == 1
+    hourly = await db.query_metrics("latency", base, base + 3600, resolution="1h")
+    assert [p["count"] for p in hourly["points"]] == [121]
+    assert hourly["points"][0]["max"] == 1000.0
+
+    # Raw rows past retention are removed once rolled up; rollups survive
+    db.metric_retention["raw"] = 60
+    deleted = await db.apply_metric_retention()
+    assert deleted["raw"] == 121 and deleted["1m"] == 0
+    assert await db.get_metrics("latency") == []
+    assert len((await db.query_metrics("latency", base, base + 120))["points"]) == 2
+
+    await db.close()
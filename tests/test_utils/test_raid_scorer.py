@@ -0,0 +1,76 @@
+"""Tests for the feature-weighted raid scorer."""
+
+from src.utils.raid_scorer import DISCORD_EPOCH_MS
+from src.utils.raid_scorer import RaidScorer
+from src.utils.raid_scorer import snowflake_timestamp
+
+
+def _snowflake(created_at: float) -> int:
+    return (int(created_at * 1000) - DISCORD_EPOCH_MS) << 22
+
+
+def test_snowflake_timestamp_round_trips() -> None:
+    assert abs(snowflake_timestamp(_snowflake(1_700_000_000)) - 1_700_000_000) < 0.001
+
+
+def test_fresh_lookalike_accounts_outscore_established_members() -> None:
+    """New accounts with default avatars and similar names score far above 1."""
+    now = 1_700_000_000.0
+    scorer = RaidScorer()
+
+    old = scorer.record_join(1, now, _snowflake(now - 400 * 86400), "alice", False)
+    assert old.score == 1.0 and not old.suspicious
+
+    first = scorer.record_join(1, now + 1, _snowflake(now - 60), "raider01", True)
+    second = scorer.record_join(1, now + 2, _snowflake(now - 30), "raider02", True)
+    assert first.suspicious and not first.similar
+    assert second.similar and second.score > first.score
+
+    assert scorer.rolling_score(1, now + 2, 30) == old.score + first.score + second.score
+    cohort = scorer.cohort(1, now + 2, 30)
+    assert [r.user_id for r in cohort] == [first.user_id, second.user_id]
+
+
+def test_cooldown_keeps_cohort_for_batched_actions() -> None:
+    now = 1_700_000_000.0
+    scorer = RaidScorer()
+    ids = [_snowflake(now - 10 - i) for i in range(5)]
+    for i, uid in enumerate(ids):
+        scorer.record_join(1, now + i, uid, f"spam{i}", True)
+
+    scorer.mark_triggered(1, now + 4)
+    assert scorer.in_cooldown(1, now + 10, 30)
+    assert not scorer.in_cooldown(1, now + 40, 30)
+    # Members who joined right before the trigger remain actionable.
+    assert len(scorer.cohort(1, now + 20, 30)) == 5
+
+    scorer.discard(1, ids[:2])
+    assert [r.user_id for r in scorer.cohort(1, now + 20, 30)] == ids[2:]
+
+
+def test_default_threshold_matches_old_join_count(make_anti_spam_manager) -> None:
+    """Default settings: 10 ordinary joins trigger; fewer than 5 joins never do."""
+    from types import SimpleNamespace
+
+    def joins(manager, guild_id, members):
+        results = []
+        for member in members:
+            manager.clock += 1
+            results.append(manager.check_member_join(guild_id, member))
+        return results
+
+    manager = make_anti_spam_manager(guilds=3)
+    now = manager.now()
+
+    def member(i, fresh):
+        created = now - (30 if fresh else 400 * 86400)
+        names = ["alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi", "ivan", "judy"]
+        name = f"raider{i:02d}" if fresh else names[i]
+        return SimpleNamespace(id=_snowflake(created) + i, name=name, avatar=None if fresh else "a")
+
+    ordinary = joins(manager, 1, [member(i, False) for i in range(10)])
+    assert ordinary[:9] == [None] * 9 and ordinary[9] is not None
+
+    # Fresh, avatar-less lookalikes count double at most.
+    fresh = joins(manager, 2, [member(i, True) for i in range(6)])
+    assert fresh[:4] == [None] * 4 and any(fresh[4:])
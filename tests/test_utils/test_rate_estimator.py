@@ -0,0 +1,49 @@
+"""Tests for the constant-memory EWMA rate estimator."""
+
+from src.utils.rate_estimator import EwmaCounter
+from src.utils.rate_estimator import prune_idle
+
+
+def test_burst_counts_like_a_window() -> None:
+    """Events arriving together should add up to their count."""
+    counter = EwmaCounter()
+    for _ in range(5):
+        value = counter.add(100.0, tau=10.0)
+    assert value == 5.0
+
+
+def test_steady_rate_converges_to_rate_times_tau() -> None:
+    """A sustained rate r should settle near r * tau, matching window thresholds."""
+    counter = EwmaCounter()
+    tau = 10.0
+    now = 0.0
+    for _ in range(2000):
+        now += 0.5  # 2 events per second
+        counter.add(now, tau)
+    assert 19.0 < counter.peek(now, tau) < 21.5
+
+
+def test_idle_counters_are_pruned() -> None:
+    """Counters that decayed to nothing should be dropped."""
+    active, idle = EwmaCounter(), EwmaCounter()
+    active.add(1000.0, tau=10.0)
+    idle.add(0.0, tau=10.0)
+    counters = {"active": active, "idle": idle}
+    assert prune_idle(counters, now=1000.0, tau=10.0) == 1
+    assert list(counters) == ["active"]
+
+
+def test_pruning_uses_each_guilds_own_window(make_anti_spam_manager) -> None:
+    """A guild with a short window must not prune a long-window guild's counters."""
+    from src.utils.anti_spam import EWMA_PRUNE_INTERVAL
+
+    manager = make_anti_spam_manager(guilds=2, rate_mode="ewma")
+    manager.settings[1]["flood_window"] = 2
+    manager.settings[2]["flood_window"] = 600
+    manager._rate_counter(manager.message_rates, 1, 10).add(0.0, tau=2.0)
+    manager._rate_counter(manager.message_rates, 2, 20).add(0.0, tau=600.0)
+
+    manager._ewma_ops = EWMA_PRUNE_INTERVAL - 1
+    manager._maybe_prune_rates(now=60.0)
+    assert 1 not in manager.message_rates
+    assert 20 in manager.message_rates[2]
@@ -0,0 +1,92 @@
+"""Tests for the dedicated SQLite executor threads."""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.utils.database_manager import DatabaseManager
+from src.utils.sqlite_executor import SQLiteExecutor
+
+
+async def test_jobs_run_off_the_event_loop_thread(tmp_path) -> None:
+    executor = SQLiteExecutor(str(tmp_path / "db.sqlite"), readers=2)
+    loop_thread = threading.get_ident()
+
+    def create(conn):
+        conn.execute("CREATE TABLE t (v INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.commit()
+        return threading.current_thread().name
+
+    def read(conn):
+        return conn.execute("SELECT v FROM t").fetchone()["v"], threading.get_ident()
+
+    assert await executor.write(create) == "sqlite-writer"
+    value, reader_thread = await executor.read(read)
+    assert value == 1 and reader_thread != loop_thread
+
+    def broken(conn):
+        conn.execute("INSERT INTO t VALUES (2)")
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await executor.write(broken)
+    # Failed job is rolled back
+    assert (await executor.read(read))[0] == 1
+    assert executor.get_stats()["errors"] == 1
+
+    await executor.close()
+    assert not executor.running
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+async def test_database_manager_modes_behave_the_same(tmp_path, threaded) -> None:
+    db = DatabaseManager(str(tmp_path / "bot.db"), threaded=threaded)
+    try:
+        assert await db.cache_set("k", {"a": 1})
+        assert await db.cache_get("k") == {"a": 1}
+        assert await db.store_metric("m", 2.5, {"x": 1})
+        assert (await db.get_metrics("m"))[0]["value"] == 2.5
+        assert await db.cache_set("old", 1, ttl=-1)
+        assert await db.cache_get("old") is None
+        assert (await db.get_cache_stats())["total_entries"] == 1
+    finally:
+        await db.close()
+
+
+async def test_concurrent_writes_share_commits(tmp_path) -> None:
+    executor = SQLiteExecutor(str(tmp_path / "db.sqlite"), commit_window=0.01)
+
+    def create(conn):
+        conn.execute("CREATE TABLE t (v INTEGER)")
+
+    def insert(conn, value):
+        conn.execute("INSERT INTO t VALUES (?)", (value,))
+        if value == 3:
+            raise ValueError("only this job is rolled back")
+        return value
+
+    def count(conn):
+        return conn.execute("SELECT COUNT(*) AS n FROM t").fetchone()["n"]
+
+    await executor.write(create)
+    results = await asyncio.gather(
+        *(executor.write(insert, i) for i in range(50)), return_exceptions=True
+    )
+    assert isinstance(results[3], ValueError)
+    assert await executor.read(count) == 49
+
+    stats = executor.get_stats()
+    assert stats["commits"] < stats["writes"]
+    await executor.close()
+
+
+async def test_in_memory_database_has_schema_in_threaded_mode() -> None:
+    db = DatabaseManager(":memory:", threaded=True)
+    try:
+        assert await db.cache_set("k", 1)
+        assert await db.cache_get("k") == 1
+        assert await db.store_metric("m", 1.0)
+    finally:
+        await db.close()
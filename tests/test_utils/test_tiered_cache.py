@@ -0,0 +1,129 @@
+"""Tests for the memory + SQLite tiered cache."""
+
+import asyncio
+
+import pytest
+
+from src.utils import database_manager as database_module
+from src.utils import tiered_cache as tiered_cache_module
+from src.utils.database_manager import DatabaseManager
+from src.utils.tiered_cache import TieredCache
+
+
+@pytest.fixture
+async def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "db.sqlite"), threaded=True)
+    yield manager
+    await manager.close()
+
+
+async def test_reads_hit_memory_then_database(db) -> None:
+    cache = TieredCache(db)
+    await cache.set("k", {"v": 1}, ttl=60)
+    assert await cache.get("k") == {"v": 1}
+    assert cache.stats["memory_hits"] == 1
+
+    # A fresh process only has the database tier and backfills memory
+    cold = TieredCache(db)
+    assert await cold.get("k") == {"v": 1}
+    assert await cold.get("k") == {"v": 1}
+    assert (cold.stats["db_hits"], cold.stats["memory_hits"]) == (1, 1)
+
+    await cold.delete("k")
+    assert await TieredCache(db).get("k") is None
+
+
+async def test_memory_tier_is_bounded_by_entries_and_bytes() -> None:
+    cache = TieredCache(max_entries=3, max_bytes=10_000)
+    for i in range(5):
+        await cache.set(f"k{i}", i)
+    assert cache.get_stats()["entries"] == 3
+    assert await cache.get("k0") is None
+
+    small = TieredCache(max_entries=100, max_bytes=250)
+    for i in range(5):
+        await small.set(f"big{i}", "x" * 100)
+    stats = small.get_stats()
+    assert stats["bytes"] <= 250 and stats["entries"] == 2
+    assert stats["evictions"] == 3
+
+
+async def test_expired_entries_are_not_returned() -> None:
+    cache = TieredCache()
+    await cache.set("k", "v", ttl=-1)
+    assert await cache.get("k", "default") == "default"
+
+
+async def test_get_or_load_runs_one_loader_per_key(db) -> None:
+    cache = TieredCache(db)
+    calls = 0
+    release = asyncio.Event()
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"data": calls}
+
+    first = asyncio.ensure_future(cache.get_or_load("slow", loader, ttl=60))
+    while not calls:
+        await asyncio.sleep(0.001)
+    waiters = [asyncio.ensure_future(cache.get_or_load("slow", loader)) for _ in range(9)]
+    while cache.stats["coalesced"] < 9:
+        await asyncio.sleep(0.001)
+    # The first caller going away must not fail the others
+    first.cancel()
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert calls == 1
+    assert all(r == {"data": 1} for r in results)
+    assert cache.stats["coalesced"] == 9
+    assert await cache.get_or_load("slow", loader) == {"data": 1}
+    assert calls == 1
+
+
+async def test_loader_errors_propagate_and_are_not_cached() -> None:
+    cache = TieredCache()
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("k", flaky)
+    assert await cache.get_or_load("k", flaky) == "ok"
+
+    async def missing():
+        return None
+
+    assert await cache.get_or_load("none", missing) is None
+    assert cache.get_stats()["entries"] == 1
+
+
+async def test_init_is_idempotent_across_reconnects(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(database_module, "database_manager", None)
+    monkeypatch.setattr(tiered_cache_module, "tiered_cache", None)
+    monkeypatch.setattr(
+        database_module, "DatabaseManager", lambda: DatabaseManager(str(tmp_path / "db.sqlite"))
+    )
+    # A cog touched the cache before the first READY.
+    lazy = tiered_cache_module.get_tiered_cache()
+    assert lazy.db is None
+
+    manager = database_module.init_database_manager()
+    try:
+        assert database_module.init_database_manager() is manager
+        assert tiered_cache_module.init_tiered_cache() is lazy
+        assert lazy.db is manager
+
+        await manager.start_cleanup_task(interval=3600)
+        task = manager._cleanup_task
+        await manager.start_cleanup_task(interval=3600)
+        assert manager._cleanup_task is task
+    finally:
+        await manager.close()
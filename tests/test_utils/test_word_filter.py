@@ -0,0 +1,35 @@
+"""Tests for the Aho-Corasick banned-phrase filter."""
+
+from src.utils.word_filter import AhoCorasick
+from src.utils.word_filter import normalize_text
+
+
+def test_matches_all_patterns_in_one_pass() -> None:
+    """All overlapping phrases should be reported once each."""
+    automaton = AhoCorasick(["詐騙", "騙子", "免費", "nitro"])
+    hits = automaton.find_all("這是詐騙子 免費 nitro")
+    assert set(hits) == {"詐騙", "騙子", "免費", "nitro"}
+
+
+def test_confusable_characters_are_normalized() -> None:
+    """Leetspeak, full-width, Cyrillic and zero-width tricks should still match."""
+    automaton = AhoCorasick(["free nitro"])
+    assert automaton.search("FR3E N1TRO")
+    assert automaton.search("ｆｒｅｅ ｎｉｔｒｏ")
+    assert automaton.search("frее nitrо")  # Cyrillic е / о
+    assert automaton.search("fr\u200bee nitro")
+    assert normalize_text("Ünïcödé") == "unicode"
+
+
+def test_ascii_phrases_respect_word_boundaries() -> None:
+    """ASCII phrases must not match inside longer words."""
+    automaton = AhoCorasick(["ass"])
+    assert not automaton.search("first class")
+    assert automaton.search("what an ass!")
+
+
+def test_empty_pattern_list_never_matches() -> None:
+    """An empty automaton should be a cheap no-op."""
+    automaton = AhoCorasick([])
+    assert len(automaton) == 0
+    assert automaton.find_all("anything") == []